@@ -5,18 +5,21 @@ import certifi
 
 import pymongo
 from networksecurity.exception.exception import NetworkSecurityException
-from networksecurity.pipeline.training_pipeline import TrainingPipeline
+from networksecurity.pipeline.training_job import TrainingJobManager
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, File, UploadFile, Request
+from pydantic import BaseModel
+from typing import Dict, List, Optional
 from uvicorn import run as app_run
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from starlette.responses import RedirectResponse
 import pandas as pd
 
-from networksecurity.utils.main_utils.utils import load_object
-
-from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.registry import ModelRegistry
+from networksecurity.pipeline.batch_prediction import BatchPrediction
+from networksecurity.pipeline.micro_batch_prediction import MicroBatchPredictor
+from networksecurity.utils.main_utils.executor import InferenceExecutor
 from networksecurity.constant.training_pipeline import DATA_INGESTION_COLLECTION_NAME
 from networksecurity.constant.training_pipeline import DATA_INGESTION_DATABASE_NAME
 
@@ -47,37 +50,102 @@ from fastapi.templating import Jinja2Templates
 
 templates = Jinja2Templates(directory="./templates")
 
+## one model per worker process, hot reloaded when final_model/ changes
+model_registry = ModelRegistry()
+## blocking pandas/sklearn work runs here, never on the event loop
+inference_executor = InferenceExecutor()
+micro_batch_predictor = MicroBatchPredictor(
+    model_provider=model_registry.get_model, executor=inference_executor
+)
+## training runs in its own process, one job at a time
+training_job_manager = TrainingJobManager()
+
+
+class PredictRecordsRequest(BaseModel):
+    records: List[Dict[str, Optional[float]]]
+
+
+@app.on_event("startup")
+async def start_model_registry():
+    model_registry.start()
+    await micro_batch_predictor.start()
+
+
+@app.on_event("shutdown")
+async def stop_model_registry():
+    await micro_batch_predictor.stop()
+    model_registry.stop()
+    inference_executor.shutdown(wait=False)
+
 
 @app.get("/", tags=["authentication"])
 async def index():
     return RedirectResponse(url="/docs")
 
 
+@app.get("/metrics")
+async def metrics_route():
+    metrics = inference_executor.metrics()
+    metrics["micro_batch_queue_depth"] = micro_batch_predictor.queue_depth
+    return metrics
+
+
 @app.get("/train")
-async def train_route():
+async def train_route(resume: bool = False):
     try:
-        train_pipeline = TrainingPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training is successful")
+        active_job = training_job_manager.active_job()
+        if active_job is not None:
+            return JSONResponse(
+                {"job_id": active_job.job_id, "status": active_job.status},
+                status_code=409,
+            )
+        ## resume continues the last unfinished run after its last successful stage
+        job = training_job_manager.submit(resume=resume)
+        return JSONResponse({"job_id": job.job_id, "status": job.status}, status_code=202)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
 
+@app.get("/train/jobs")
+async def train_jobs_route():
+    return [job.to_dict() for job in training_job_manager.list()]
+
+
+@app.get("/train/jobs/{job_id}")
+async def train_job_status_route(job_id: str):
+    job = training_job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"detail": f"Unknown job {job_id}"}, status_code=404)
+    return job.to_dict()
+
+
+@app.post("/train/jobs/{job_id}/cancel")
+async def train_job_cancel_route(job_id: str):
+    job = training_job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse({"detail": f"Unknown job {job_id}"}, status_code=404)
+    return {"job_id": job.job_id, "status": job.status}
+
+
+def score_uploaded_csv(file_obj) -> str:
+    df = pd.read_csv(file_obj)
+    network_model = model_registry.get_model()
+    print(df.iloc[0])
+    y_pred = network_model.predict(df)
+    print(y_pred)
+    df["predicted_column"] = y_pred
+    print(df["predicted_column"])
+    # return df.to_json()
+    df.to_csv("prediction_output/output.csv")
+    return df.to_html(classes="table table-striped")
+
+
 @app.post("/predict")
 async def predict_route(request: Request, file: UploadFile = File(...)):
     try:
-        df = pd.read_csv(file.file)
-        preprocesor = load_object("final_model/preprocessor.pkl")
-        final_model = load_object("final_model/model.pkl")
-        network_model = NetworkModel(preprocessor=preprocesor, model=final_model)
-        print(df.iloc[0])
-        y_pred = network_model.predict(df)
-        print(y_pred)
-        df["predicted_column"] = y_pred
-        print(df["predicted_column"])
-        # return df.to_json()
-        df.to_csv("prediction_output/output.csv")
-        table_html = df.to_html(classes="table table-striped")
+        table_html = await inference_executor.run_in_thread(
+            score_uploaded_csv, file.file
+        )
         # print(table_html)
         return templates.TemplateResponse(
             "table.html", {"request": request, "table": table_html}
@@ -87,5 +155,41 @@ async def predict_route(request: Request, file: UploadFile = File(...)):
         raise NetworkSecurityException(e, sys)
 
 
+@app.post("/predict/stream")
+async def predict_stream_route(file: UploadFile = File(...), format: str = "csv"):
+    """
+    Score the upload in bounded chunks and stream the rows back as csv or ndjson
+    """
+    try:
+        batch_prediction = BatchPrediction(network_model=model_registry.get_model())
+        if format == "ndjson":
+            return StreamingResponse(
+                inference_executor.iterate_in_thread(
+                    batch_prediction.stream_ndjson(file.file)
+                ),
+                media_type="application/x-ndjson",
+            )
+        if format == "csv":
+            return StreamingResponse(
+                inference_executor.iterate_in_thread(
+                    batch_prediction.stream_csv(file.file)
+                ),
+                media_type="text/csv",
+                headers={"Content-Disposition": "attachment; filename=output.csv"},
+            )
+        return Response(f"Unsupported format: {format}", status_code=400)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@app.post("/predict/records")
+async def predict_records_route(payload: PredictRecordsRequest):
+    try:
+        predictions = await micro_batch_predictor.predict(payload.records)
+        return {"predictions": predictions}
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
 if __name__ == "__main__":
     app_run(app, host="0.0.0.0", port=8000)
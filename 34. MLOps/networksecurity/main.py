@@ -11,6 +11,9 @@ from networksecurity.entity.config_entity import (
     ModelTrainerConfig,
 )
 from networksecurity.components.model_trainer import ModelTrainer
+from networksecurity.constant.training_pipeline import REFERENCE_PROFILE_FILE_NAME
+from networksecurity.utils.main_utils.utils import load_object
+from networksecurity.utils.ml_utils.model.registry import publish_model
 
 
 import sys
@@ -51,5 +54,16 @@ if __name__ == "__main__":
 
         logging.info("Model training artifact created")
 
+        ## model, preprocessor and reference profile become visible to serving together
+        publish_model(
+            load_object(model_trainer_artifact.trained_model_file_path),
+            version=trainingpipelineconfig.timestamp,
+            model_dir=trainingpipelineconfig.model_dir,
+            extra_files={
+                REFERENCE_PROFILE_FILE_NAME: data_validation_artifact.reference_profile_file_path
+            },
+        )
+        logging.info("Model published")
+
     except Exception as e:
         raise NetworkSecurityException(e, sys)
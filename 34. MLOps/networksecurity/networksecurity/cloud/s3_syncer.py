@@ -1,13 +1,273 @@
+import hashlib
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from boto3.s3.transfer import TransferConfig
+from s3transfer.utils import ChunksizeAdjuster
+
+from networksecurity.constant.training_pipeline import (
+    S3_SYNC_MAX_WORKERS,
+    S3_SYNC_MULTIPART_CHUNKSIZE_MB,
+    S3_SYNC_MULTIPART_THRESHOLD_MB,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+
+@dataclass
+class SyncResult:
+    source: str
+    destination: str
+    transferred: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    bytes_transferred: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def parse_s3_url(aws_bucket_url: str) -> Tuple[str, str]:
+    """
+    s3://bucket/some/prefix -> (bucket, "some/prefix")
+    """
+    parsed = urlparse(aws_bucket_url)
+    if parsed.scheme != "s3" or not parsed.netloc:
+        raise ValueError(f"Not an s3 url: {aws_bucket_url}")
+    return parsed.netloc, parsed.path.strip("/")
 
 
 class S3Sync:
+    """
+    In process replacement of `aws s3 sync`.
+
+    Files are transferred on a thread pool shared by every sync of a call,
+    files above the multipart threshold (the large .npy and .pkl artifacts)
+    in parallel parts. A file is skipped when the remote object has the
+    same size and ETag as the local file; the ETag is the md5 of the file,
+    or for multipart objects the md5 of the part md5s, computed with the
+    part size this class uploads with. The boto3 client can be injected,
+    e.g. one pointed at moto or MinIO.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        max_workers: int = S3_SYNC_MAX_WORKERS,
+        multipart_threshold_mb: int = S3_SYNC_MULTIPART_THRESHOLD_MB,
+        multipart_chunksize_mb: int = S3_SYNC_MULTIPART_CHUNKSIZE_MB,
+    ):
+        self._client = client
+        self.max_workers = max(1, max_workers)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * 2**20,
+            multipart_chunksize=multipart_chunksize_mb * 2**20,
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("s3")
+        return self._client
+
+    def local_etag(self, file_path: str) -> str:
+        """
+        ETag S3 assigns to file_path when uploaded with this transfer config
+        """
+        size = os.path.getsize(file_path)
+        if size < self.transfer_config.multipart_threshold:
+            digest = hashlib.md5()
+            with open(file_path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    digest.update(block)
+            return digest.hexdigest()
+        chunksize = ChunksizeAdjuster().adjust_chunksize(
+            self.transfer_config.multipart_chunksize, size
+        )
+        part_digests = []
+        with open(file_path, "rb") as file_obj:
+            for part in iter(lambda: file_obj.read(chunksize), b""):
+                part_digests.append(hashlib.md5(part).digest())
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+    @staticmethod
+    def local_files(folder: str) -> Dict[str, str]:
+        """
+        relative key -> path of every file under folder, following the
+        symlinked stage directories of resumed runs
+        """
+        files = {}
+        for root, _, file_names in os.walk(folder, followlinks=True):
+            for file_name in file_names:
+                file_path = os.path.join(root, file_name)
+                files[os.path.relpath(file_path, folder).replace(os.sep, "/")] = file_path
+        return files
+
+    def remote_objects(self, bucket: str, prefix: str) -> Dict[str, Tuple[int, str]]:
+        """
+        relative key -> (size, etag) of every object under prefix
+        """
+        objects = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        list_prefix = f"{prefix}/" if prefix else ""
+        for page in paginator.paginate(Bucket=bucket, Prefix=list_prefix):
+            for item in page.get("Contents", []):
+                relative_key = item["Key"][len(list_prefix) :]
+                objects[relative_key] = (item["Size"], item["ETag"].strip('"'))
+        return objects
+
+    def _unchanged(self, file_path: str, remote: Tuple[int, str]) -> bool:
+        if remote is None or remote[0] != os.path.getsize(file_path):
+            return False
+        return remote[1] == self.local_etag(file_path)
+
+    def _plan_upload(self, folder: str, aws_bucket_url: str) -> tuple:
+        bucket, prefix = parse_s3_url(aws_bucket_url)
+        result = SyncResult(source=folder, destination=aws_bucket_url)
+        remote = self.remote_objects(bucket, prefix)
+        transfers = []
+        for relative_key, file_path in sorted(self.local_files(folder).items()):
+            if self._unchanged(file_path, remote.get(relative_key)):
+                result.skipped.append(relative_key)
+                continue
+            key = f"{prefix}/{relative_key}" if prefix else relative_key
+            transfers.append((relative_key, file_path, bucket, key))
+        return result, transfers
+
+    def _plan_download(self, folder: str, aws_bucket_url: str) -> tuple:
+        bucket, prefix = parse_s3_url(aws_bucket_url)
+        result = SyncResult(source=aws_bucket_url, destination=folder)
+        transfers = []
+        for relative_key, remote in sorted(self.remote_objects(bucket, prefix).items()):
+            file_path = os.path.join(folder, *relative_key.split("/"))
+            if os.path.isfile(file_path) and self._unchanged(file_path, remote):
+                result.skipped.append(relative_key)
+                continue
+            key = f"{prefix}/{relative_key}" if prefix else relative_key
+            transfers.append((relative_key, file_path, bucket, key))
+        return result, transfers
+
+    def _upload(self, file_path: str, bucket: str, key: str) -> int:
+        self.client.upload_file(file_path, bucket, key, Config=self.transfer_config)
+        return os.path.getsize(file_path)
+
+    def _download(self, file_path: str, bucket: str, key: str) -> int:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.client.download_file(bucket, key, file_path, Config=self.transfer_config)
+        return os.path.getsize(file_path)
+
+    def _run(self, plans: List[tuple], transfer, start: float) -> List[SyncResult]:
+        """
+        Runs the transfers of every plan on one pool; a failed file is
+        recorded in its SyncResult and does not stop the others
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                (result, relative_key, pool.submit(transfer, file_path, bucket, key))
+                for result, transfers in plans
+                for relative_key, file_path, bucket, key in transfers
+            ]
+            for result, relative_key, future in futures:
+                try:
+                    result.bytes_transferred += future.result()
+                    result.transferred.append(relative_key)
+                except Exception as e:
+                    result.failed[relative_key] = repr(e)
+        results = [result for result, _ in plans]
+        for result in results:
+            result.seconds = time.perf_counter() - start
+            logging.info(
+                f"Synced {result.source} to {result.destination}: "
+                f"{len(result.transferred)} transferred, {len(result.skipped)} unchanged, "
+                f"{len(result.failed)} failed"
+            )
+        return results
+
+    def sync_folders_to_s3(self, pairs: List[Tuple[str, str]]) -> List[SyncResult]:
+        """
+        Uploads every (folder, aws_bucket_url) pair concurrently
+        """
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, len(pairs))) as pool:
+                plans = list(pool.map(lambda pair: self._plan_upload(*pair), pairs))
+            return self._run(plans, self._upload, start)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     # Uploads a local folder to the specified AWS S3 bucket
-    def sync_folder_to_s3(self, folder, aws_bucket_url):
-        command = f"aws s3 sync {folder} {aws_bucket_url} "
-        os.system(command)  # Execute the sync command to upload files
+    def sync_folder_to_s3(self, folder, aws_bucket_url) -> SyncResult:
+        return self.sync_folders_to_s3([(folder, aws_bucket_url)])[0]
 
     # Downloads a folder from the specified AWS S3 bucket to local
-    def sync_folder_from_s3(self, folder, aws_bucket_url):
-        command = f"aws s3 sync {aws_bucket_url} {folder} "
-        os.system(command)  # Execute the sync command to download files
+    def sync_folder_from_s3(self, folder, aws_bucket_url) -> SyncResult:
+        try:
+            start = time.perf_counter()
+            plan = self._plan_download(folder, aws_bucket_url)
+            return self._run([plan], self._download, start)[0]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def benchmark_s3_sync(
+    n_small_files: int = 200, large_file_mb: int = 64, endpoint_url: str = None
+) -> dict:
+    """
+    Two syncs of a folder of small files and one large .npy, the second
+    should skip everything. Runs against endpoint_url (e.g. MinIO) or, when
+    not given, an in memory moto S3.
+    """
+    try:
+        import tempfile
+
+        import boto3
+        import numpy as np
+
+        def run(client) -> dict:
+            client.create_bucket(Bucket="networksecurity")
+            with tempfile.TemporaryDirectory() as folder:
+                for i in range(n_small_files):
+                    with open(os.path.join(folder, f"part-{i:04d}.yaml"), "w") as file_obj:
+                        file_obj.write(f"part: {i}\n")
+                np.save(
+                    os.path.join(folder, "train.npy"),
+                    np.random.default_rng(0).random(large_file_mb * 2**17),
+                )
+                s3_sync = S3Sync(client=client)
+                url = "s3://networksecurity/artifact/benchmark"
+                first = s3_sync.sync_folder_to_s3(folder, url)
+                second = s3_sync.sync_folder_to_s3(folder, url)
+            return {
+                "files": n_small_files + 1,
+                "first_sync_seconds": first.seconds,
+                "first_sync_transferred": len(first.transferred),
+                "first_sync_mb": first.bytes_transferred / 2**20,
+                "second_sync_seconds": second.seconds,
+                "second_sync_skipped": len(second.skipped),
+                "failed": len(first.failed) + len(second.failed),
+            }
+
+        if endpoint_url is not None:
+            return run(boto3.client("s3", endpoint_url=endpoint_url))
+        from moto import mock_aws
+
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        with mock_aws():
+            return run(boto3.client("s3", region_name="us-east-1"))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    endpoint_url = sys.argv[1] if len(sys.argv) > 1 else None
+    for key, value in benchmark_s3_sync(endpoint_url=endpoint_url).items():
+        print(f"{key}: {value}")
@@ -4,11 +4,22 @@ from networksecurity.logging.logger import logging
 ## configuration of the Data Ingestion Config
 from networksecurity.entity.config_entity import DataIngestionConfig
 from networksecurity.entity.artifact_entity import DataIngestionArtifact
+from networksecurity.utils.main_utils.artifact_store import get_artifact_store
+from networksecurity.utils.main_utils.tracing import current_span, traced
+from networksecurity.utils.main_utils.utils import (
+    load_numpy_array_data,
+    read_yaml_file,
+    save_numpy_array_data,
+    write_yaml_file,
+)
 import os
 import sys
+from datetime import datetime, timedelta, timezone
+from typing import List
 import numpy as np
 import pandas as pd
 import pymongo
+from bson import ObjectId
 from sklearn.model_selection import train_test_split
 from dotenv import load_dotenv
 
@@ -18,82 +29,307 @@ MONGO_DB_URL = os.getenv("MONGO_DB_URL")
 
 
 class DataIngestion:
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(
+        self,
+        data_ingestion_config: DataIngestionConfig,
+        mongo_client: pymongo.MongoClient = None,
+    ):
         try:
             self.data_ingestion_config = data_ingestion_config
+            ## an injected client (e.g. mongomock) replaces the MONGO_DB_URL one
+            self.mongo_client = mongo_client
+            self.artifact_store = get_artifact_store(
+                data_ingestion_config.artifact_store_format
+            )
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def export_collection_as_dataframe(self):
+    def get_collection(self):
+        if self.mongo_client is None:
+            self.mongo_client = pymongo.MongoClient(MONGO_DB_URL)
+        database_name = self.data_ingestion_config.database_name
+        collection_name = self.data_ingestion_config.collection_name
+        return self.mongo_client[database_name][collection_name]
+
+    def source_fingerprint(self) -> dict:
         """
-        Read data from mongodb
+        Document count and newest _id of the collection, cheap enough to
+        tell whether a previous ingestion can be reused
         """
         try:
-            database_name = self.data_ingestion_config.database_name
-            collection_name = self.data_ingestion_config.collection_name
-            self.mongo_client = pymongo.MongoClient(MONGO_DB_URL)
-            collection = self.mongo_client[database_name][collection_name]
+            collection = self.get_collection()
+            newest = collection.find_one({}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)])
+            return {
+                "count": collection.count_documents({}),
+                "newest_id": str(newest["_id"]) if newest else None,
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            df = pd.DataFrame(list(collection.find()))
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
+    @staticmethod
+    def documents_to_dataframe(documents: List[dict], columns: List[str]) -> pd.DataFrame:
+        """
+        Convert a batch of documents into one typed buffer per column.
+        "na" becomes NaN; columns without missing values stay int64.
+        """
+        buffers = {}
+        for column in columns:
+            values = np.array(
+                [document.get(column, np.nan) for document in documents], dtype=object
+            )
+            values[values == "na"] = np.nan
+            values = values.astype(np.float64)
+            if not np.isnan(values).any() and np.array_equal(values, np.trunc(values)):
+                values = values.astype(np.int64)
+            buffers[column] = values
+        return pd.DataFrame(buffers, columns=columns)
 
-            df.replace({"na": np.nan}, inplace=True)
-            return df
-        except Exception as e:
-            raise NetworkSecurityException
+    def write_cursor(self, cursor, file_path: str, columns: List[str] = None) -> tuple:
+        """
+        Append cursor documents to the artifact store at file_path, one batch
+        at a time. Returns (rows written, columns, _id of the last document
+        if projected).
+        """
+        batch_size = self.data_ingestion_config.export_batch_size
+        batch = []
+        rows = 0
+        last_id = None
+        for document in cursor:
+            batch.append(document)
+            if len(batch) < batch_size:
+                continue
+            columns = columns or [key for key in batch[0] if key != "_id"]
+            self.artifact_store.append_frame(
+                file_path, self.documents_to_dataframe(batch, columns)
+            )
+            rows += len(batch)
+            last_id = batch[-1].get("_id")
+            batch = []
+        if batch:
+            columns = columns or [key for key in batch[0] if key != "_id"]
+            self.artifact_store.append_frame(
+                file_path, self.documents_to_dataframe(batch, columns)
+            )
+            rows += len(batch)
+            last_id = batch[-1].get("_id")
+        current_span().add(rows=rows)
+        return rows, columns, last_id
 
-    def export_data_into_feature_store(self, dataframe: pd.DataFrame):
+    def export_collection_to_feature_store(self) -> str:
+        """
+        Stream the collection into the feature store in batches of
+        export_batch_size documents, so memory holds one batch at a time
+        """
         try:
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            # creating folder
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
-            return dataframe
+            batch_size = self.data_ingestion_config.export_batch_size
+            self.artifact_store.remove(feature_store_file_path)
 
+            cursor = self.get_collection().find({}, {"_id": 0}, batch_size=batch_size)
+            rows, _, _ = self.write_cursor(cursor, feature_store_file_path)
+            logging.info(f"Exported {rows} documents to {feature_store_file_path}")
+            return feature_store_file_path
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def split_data_as_train_test(self, dataframe: pd.DataFrame):
+    def read_watermark(self) -> dict:
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        if not os.path.exists(watermark_file_path):
+            return {"last_id": None, "partitions": []}
+        return read_yaml_file(watermark_file_path)
+
+    def partition_ids_file_path(self, partition: str) -> str:
+        ## sorted _ids (24 hex chars) of the documents of a partition
+        return os.path.join(self.data_ingestion_config.partition_dir, f"{partition}.ids.npy")
+
+    def exported_ids_since(self, partitions: List[str], lower_id: ObjectId) -> set:
+        """
+        _ids from lower_id on that the partitions already hold
+        """
+        lower = str(lower_id).encode()
+        exported = set()
+        for partition in partitions:
+            ids_file_path = self.partition_ids_file_path(partition)
+            if not os.path.exists(ids_file_path):
+                logging.info(f"Partition {partition} has no _id file, it is not deduplicated")
+                continue
+            ids = load_numpy_array_data(ids_file_path, mmap_mode="r")
+            exported.update(ids[np.searchsorted(ids, lower) :].tolist())
+        return exported
+
+    def unfinished_bulk_load(self) -> dict:
+        """
+        Oldest bulk load of push_data.py that is running or was interrupted
+        on the collection, None without one
+        """
+        config = self.data_ingestion_config
+        loads = self.get_collection().database[config.bulk_load_collection_name]
+        return loads.find_one({}, sort=[("started_at", pymongo.ASCENDING)])
+
+    def export_new_partition(self) -> dict:
+        """
+        Fetch documents newer than the watermark into a new partition, then
+        advance the watermark. Returns the updated watermark.
+
+        Only _ids older than watermark_lag_seconds are read, and the same lag
+        below the watermark is read again with the _ids already exported
+        skipped, so a document that reaches mongo after a newer _id (an
+        unfinished concurrent insert, a client with a skewed clock) is still
+        picked up when it lands within the lag. Nothing from the start of an
+        unfinished bulk load on is read, its rows share its start time
+        however long it runs or whenever it is resumed.
+        """
         try:
-            train_set, test_set = train_test_split(
-                dataframe, test_size=self.data_ingestion_config.train_test_split_ratio
+            config = self.data_ingestion_config
+            watermark = self.read_watermark()
+            lag = timedelta(seconds=config.watermark_lag_seconds)
+            upper = datetime.now(timezone.utc) - lag
+            bulk_load = self.unfinished_bulk_load()
+            if bulk_load is not None:
+                load_started = datetime.fromtimestamp(bulk_load["started_at"], timezone.utc)
+                logging.info(
+                    f"Bulk load {bulk_load['_id']} of {bulk_load['file_path']} is unfinished, "
+                    f"reading only documents before {load_started}"
+                )
+                upper = min(upper, load_started)
+            query = {"_id": {"$lt": ObjectId.from_datetime(upper)}}
+            exported = set()
+            if watermark["last_id"] is not None:
+                lower_id = ObjectId.from_datetime(
+                    ObjectId(watermark["last_id"]).generation_time - lag
+                )
+                query["_id"]["$gte"] = lower_id
+                exported = self.exported_ids_since(watermark["partitions"], lower_id)
+
+            ## keep every partition on the column order of the first one
+            columns = None
+            if watermark["partitions"]:
+                first_partition = os.path.join(
+                    config.partition_dir, watermark["partitions"][0]
+                )
+                columns = self.artifact_store.columns(first_partition)
+
+            os.makedirs(config.partition_dir, exist_ok=True)
+            cursor = (
+                self.get_collection()
+                .find(query, batch_size=config.export_batch_size)
+                .sort("_id", pymongo.ASCENDING)
             )
-            logging.info("Performed train test split on the dataframe")
+            new_ids = []
+
+            def new_documents():
+                for document in cursor:
+                    document_id = str(document["_id"]).encode()
+                    if document_id in exported:
+                        continue
+                    new_ids.append(document_id)
+                    yield document
+
+            tmp_file_path = config.partition_file_path + ".tmp"
+            self.artifact_store.remove(tmp_file_path)
+            rows, _, last_id = self.write_cursor(new_documents(), tmp_file_path, columns)
+
+            if rows == 0:
+                self.artifact_store.remove(tmp_file_path)
+                logging.info("No documents newer than the watermark")
+                return watermark
 
+            partition = os.path.basename(config.partition_file_path)
+            save_numpy_array_data(
+                self.partition_ids_file_path(partition), np.array(new_ids, dtype="S24")
+            )
+            os.replace(tmp_file_path, config.partition_file_path)
+            if watermark["last_id"] is not None:
+                ## late documents of the overlap sort below the previous watermark
+                last_id = max(last_id, ObjectId(watermark["last_id"]))
+            watermark = {
+                "last_id": str(last_id),
+                "partitions": watermark["partitions"] + [partition],
+            }
+            ## the watermark only moves once the partition is in place
+            write_yaml_file(config.watermark_file_path + ".tmp", watermark)
+            os.replace(config.watermark_file_path + ".tmp", config.watermark_file_path)
             logging.info(
-                "Exited split_data_as_train_test method of Data_Ingestion class"
+                f"Exported {rows} new documents to {config.partition_file_path}"
             )
+            return watermark
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
+    def combine_partitions_into_feature_store(self, partitions: List[str]) -> str:
+        try:
+            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
+            self.artifact_store.concat(
+                [
+                    os.path.join(self.data_ingestion_config.partition_dir, partition)
+                    for partition in partitions
+                ],
+                feature_store_file_path,
+            )
+            return feature_store_file_path
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            os.makedirs(dir_path, exist_ok=True)
+    @traced()
+    def export_feature_store(self) -> str:
+        """
+        Export mongodb into the feature store and return its path
+        """
+        try:
+            if self.data_ingestion_config.incremental:
+                watermark = self.export_new_partition()
+                feature_store_file_path = self.combine_partitions_into_feature_store(
+                    watermark["partitions"]
+                )
+            else:
+                feature_store_file_path = self.export_collection_to_feature_store()
+            return feature_store_file_path
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            logging.info(f"Exporting train and test file path.")
+    @traced()
+    def split_data_as_train_test(self, feature_store_file_path: str):
+        """
+        Split the feature store rows into train/test index arrays; the rows
+        themselves are never copied
+        """
+        try:
+            num_rows = self.artifact_store.num_rows(feature_store_file_path)
+            current_span().add(rows=num_rows)
+            train_index, test_index = train_test_split(
+                np.arange(num_rows),
+                test_size=self.data_ingestion_config.train_test_split_ratio,
+            )
+            logging.info("Performed train test split on the feature store")
 
-            train_set.to_csv(
-                self.data_ingestion_config.training_file_path, index=False, header=True
+            logging.info(
+                "Exited split_data_as_train_test method of Data_Ingestion class"
             )
 
-            test_set.to_csv(
-                self.data_ingestion_config.testing_file_path, index=False, header=True
+            logging.info(f"Exporting train and test index file path.")
+
+            ## sorted, so reads walk the memory mapped columns sequentially
+            save_numpy_array_data(
+                self.data_ingestion_config.train_index_file_path, np.sort(train_index)
+            )
+            save_numpy_array_data(
+                self.data_ingestion_config.test_index_file_path, np.sort(test_index)
             )
-            logging.info(f"Exported train and test file path.")
+            logging.info(f"Exported train and test index file path.")
 
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def initiate_data_ingestion(self):
         try:
-            dataframe = self.export_collection_as_dataframe()
-            dataframe = self.export_data_into_feature_store(dataframe)
-            self.split_data_as_train_test(dataframe)
+            feature_store_file_path = self.export_feature_store()
+            self.split_data_as_train_test(feature_store_file_path)
             dataingestionartifact = DataIngestionArtifact(
-                trained_file_path=self.data_ingestion_config.training_file_path,
-                test_file_path=self.data_ingestion_config.testing_file_path,
+                feature_store_file_path=feature_store_file_path,
+                train_index_file_path=self.data_ingestion_config.train_index_file_path,
+                test_index_file_path=self.data_ingestion_config.test_index_file_path,
             )
             return dataingestionartifact
 
         except Exception as e:
-            raise NetworkSecurityException
+            raise NetworkSecurityException(e, sys)
@@ -1,11 +1,12 @@
 import sys
-import numpy as np
 import pandas as pd
 from sklearn.impute import KNNImputer
 from sklearn.pipeline import Pipeline
 
 from networksecurity.constant.training_pipeline import TARGET_COLUMN
 from networksecurity.constant.training_pipeline import (
+    DATA_TRANSFORMATION_IMPUTER,
+    DATA_TRANSFORMATION_IMPUTER_MAX_MEMORY_MB,
     DATA_TRANSFORMATION_IMPUTER_PARAMS,
 )
 
@@ -17,7 +18,11 @@ from networksecurity.entity.artifact_entity import (
 from networksecurity.entity.config_entity import DataTransformationConfig
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.artifact_store import read_split
+from networksecurity.utils.main_utils.tracing import current_span, span, traced
 from networksecurity.utils.main_utils.utils import save_numpy_array_data, save_object
+from networksecurity.utils.ml_utils.model.knn_imputer import ChunkedKNNImputer
+from networksecurity.utils.ml_utils.model.model_cache import estimator_identity
 
 
 class DataTransformation:
@@ -36,10 +41,14 @@ class DataTransformation:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    @traced("DataTransformation.read_data")
+    def read_data(self, index_file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            dataframe = read_split(
+                self.data_validation_artifact.feature_store_file_path, index_file_path
+            )
+            current_span().add(rows=len(dataframe))
+            return dataframe
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
@@ -47,6 +56,8 @@ class DataTransformation:
         """
         It initialises a KNNImputer object with the parameters specified in the training_pipeline.py file
         and returns a Pipeline object with the KNNImputer object as the first step.
+        With DATA_TRANSFORMATION_IMPUTER set to "chunked_knn" the ChunkedKNNImputer
+        is used instead, it only searches donors for rows with missing values.
 
         Args:
           cls: DataTransformation
@@ -58,80 +69,97 @@ class DataTransformation:
             "Entered get_data_trnasformer_object method of Transformation class"
         )
         try:
-            imputer: KNNImputer = KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
+            if DATA_TRANSFORMATION_IMPUTER == "chunked_knn":
+                imputer = ChunkedKNNImputer(
+                    **DATA_TRANSFORMATION_IMPUTER_PARAMS,
+                    max_memory_mb=DATA_TRANSFORMATION_IMPUTER_MAX_MEMORY_MB,
+                )
+            else:
+                imputer = KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
             logging.info(
-                f"Initialise KNNImputer with {DATA_TRANSFORMATION_IMPUTER_PARAMS}"
+                f"Initialise {type(imputer).__name__} with {DATA_TRANSFORMATION_IMPUTER_PARAMS}"
             )
             processor: Pipeline = Pipeline([("imputer", imputer)])
             return processor
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
+    def transformer_identity(self) -> list:
+        """
+        The preprocessor that would be fit, part of the stage fingerprint
+        """
+        return estimator_identity(self.get_data_transformer_object())
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         logging.info(
             "Entered initiate_data_transformation method of DataTransformation class"
         )
         try:
             logging.info("Starting data transformation")
-            train_df = DataTransformation.read_data(
-                self.data_validation_artifact.valid_train_file_path
+            train_df = self.read_data(
+                self.data_validation_artifact.valid_train_index_file_path
             )
-            test_df = DataTransformation.read_data(
-                self.data_validation_artifact.valid_test_file_path
+            test_df = self.read_data(
+                self.data_validation_artifact.valid_test_index_file_path
             )
 
             ## training dataframe
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
             target_feature_train_df = train_df[TARGET_COLUMN]
             target_feature_train_df = target_feature_train_df.replace(-1, 0)
 
             # testing dataframe
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
             target_feature_test_df = test_df[TARGET_COLUMN]
             target_feature_test_df = target_feature_test_df.replace(-1, 0)
 
             preprocessor = self.get_data_transformer_object()
 
-            preprocessor_object = preprocessor.fit(input_feature_train_df)
-            transformed_input_train_feature = preprocessor_object.transform(
-                input_feature_train_df
-            )
-            transformed_input_test_feature = preprocessor_object.transform(
-                input_feature_test_df
-            )
-
-            train_arr = np.c_[
-                transformed_input_train_feature, np.array(target_feature_train_df)
-            ]
-            test_arr = np.c_[
-                transformed_input_test_feature, np.array(target_feature_test_df)
-            ]
-
-            # save numpy array data
-            save_numpy_array_data(
-                self.data_transformation_config.transformed_train_file_path,
-                array=train_arr,
-            )
-            save_numpy_array_data(
-                self.data_transformation_config.transformed_test_file_path,
-                array=test_arr,
-            )
+            with span("imputer_fit", rows=len(input_feature_train_df)):
+                preprocessor_object = preprocessor.fit(input_feature_train_df)
+            with span(
+                "imputer_transform",
+                rows=len(input_feature_train_df) + len(input_feature_test_df),
+            ):
+                transformed_input_train_feature = preprocessor_object.transform(
+                    input_feature_train_df
+                )
+                transformed_input_test_feature = preprocessor_object.transform(
+                    input_feature_test_df
+                )
+
+            # save numpy array data, features and target as separate row aligned
+            # files so they are written without concatenation and can be memory mapped
+            with span("save_arrays"):
+                save_numpy_array_data(
+                    self.data_transformation_config.transformed_train_file_path,
+                    array=transformed_input_train_feature,
+                )
+                save_numpy_array_data(
+                    self.data_transformation_config.transformed_train_target_file_path,
+                    array=target_feature_train_df.to_numpy(),
+                )
+                save_numpy_array_data(
+                    self.data_transformation_config.transformed_test_file_path,
+                    array=transformed_input_test_feature,
+                )
+                save_numpy_array_data(
+                    self.data_transformation_config.transformed_test_target_file_path,
+                    array=target_feature_test_df.to_numpy(),
+                )
             save_object(
                 self.data_transformation_config.transformed_object_file_path,
                 preprocessor_object,
             )
 
-            save_object(
-                "final_model/preprocessor.pkl",
-                preprocessor_object,
-            )
-
             # preparing artifacts
 
             data_transformation_artifact = DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
                 transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+                transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path,
             )
             return data_transformation_artifact
 
@@ -5,11 +5,32 @@ from networksecurity.entity.artifact_entity import (
 from networksecurity.entity.config_entity import DataValidationConfig
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
-from networksecurity.constant.training_pipeline import SCHEMA_FILE_PATH
-from scipy.stats import ks_2samp
+from networksecurity.constant.training_pipeline import (
+    DATA_VALIDATION_DRIFT_THRESHOLD,
+    REFERENCE_PROFILE_FILE_NAME,
+    SCHEMA_FILE_PATH,
+)
 import pandas as pd
 import os, sys
-from networksecurity.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from typing import Iterable
+from networksecurity.utils.main_utils.artifact_store import read_split
+from networksecurity.utils.main_utils.tracing import current_span, traced
+from networksecurity.utils.main_utils.schema_validator import (
+    SchemaValidationResult,
+    SchemaValidator,
+)
+from networksecurity.utils.main_utils.utils import (
+    load_numpy_array_data,
+    read_yaml_file,
+    save_numpy_array_data,
+    write_yaml_file,
+)
+from networksecurity.utils.ml_utils.metric.drift_metric import (
+    DriftDetector,
+    drift_report,
+)
+from networksecurity.utils.ml_utils.metric.reference_profile import ReferenceProfile
+from networksecurity.utils.ml_utils.model.registry import published_file_path
 
 
 class DataValidation:
@@ -22,101 +43,196 @@ class DataValidation:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
             self._schema_config = read_yaml_file(SCHEMA_FILE_PATH)
+            self.schema_validator = SchemaValidator(self._schema_config)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    @traced("DataValidation.read_data")
+    def read_data(self, index_file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            dataframe = read_split(
+                self.data_ingestion_artifact.feature_store_file_path, index_file_path
+            )
+            current_span().add(rows=len(dataframe))
+            return dataframe
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def validate_number_of_columns(self, dataframe: pd.DataFrame) -> bool:
         try:
-            number_of_columns = len(self._schema_config)
+            number_of_columns = len(self.schema_validator.column_names)
             logging.info(f"Required number of columns:{number_of_columns}")
             logging.info(f"Dataframe has columns:{len(dataframe.columns)}")
-            if len(dataframe.columns) == number_of_columns:
-                return True
-            return False
+            missing_columns, unexpected_columns = self.schema_validator.check_columns(
+                list(dataframe.columns)
+            )
+            if missing_columns or unexpected_columns:
+                logging.info(
+                    f"Missing columns:{missing_columns} unexpected columns:{unexpected_columns}"
+                )
+                return False
+            return True
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def detect_dataset_drift(self, base_df, current_df, threshold=0.05) -> bool:
+    @traced()
+    def split_valid_rows(
+        self,
+        dataframe: pd.DataFrame,
+        index_file_path: str,
+        valid_index_file_path: str,
+        invalid_index_file_path: str,
+    ) -> tuple:
+        """
+        Run the compiled schema checks and split the index array behind
+        dataframe into valid and invalid rows. Returns the valid rows and the
+        SchemaValidationResult.
+        """
         try:
-            report = {}
-            for column in base_df.columns:
-                d1 = base_df[column]
-                d2 = current_df[column]
-                is_same_dist = ks_2samp(d1, d2)
-                if threshold <= is_same_dist.pvalue:
-                    is_found = False
-                else:
-                    is_found = True
-                report.update(
-                    {
-                        column: {
-                            "p_value": float(is_same_dist.pvalue),
-                            "drift_status": is_found,
-                        }
-                    }
-                )
+            result: SchemaValidationResult = self.schema_validator.validate(dataframe)
+            current_span().add(rows=result.n_rows)
+            rows = load_numpy_array_data(index_file_path)
+            save_numpy_array_data(valid_index_file_path, rows[result.valid_mask])
+            save_numpy_array_data(invalid_index_file_path, rows[~result.valid_mask])
+            logging.info(
+                f"{result.n_invalid} of {result.n_rows} rows failed schema validation: "
+                f"{result.failures}"
+            )
+            return dataframe[result.valid_mask].reset_index(drop=True), result
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @traced()
+    def detect_dataset_drift(
+        self, base_df, current_df, threshold=DATA_VALIDATION_DRIFT_THRESHOLD
+    ) -> bool:
+        """
+        Chi-square/PSI for the categorical columns, KS for the rest.
+        Returns True when no column drifted.
+        """
+        try:
+            current_span().add(rows=len(base_df) + len(current_df))
+            results = DriftDetector(threshold=threshold).detect(base_df, current_df)
+            return self.write_drift_report(results)
+
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def write_drift_report(self, results: dict) -> bool:
+        try:
+            drifted = [
+                column for column, result in results.items() if result["drift_status"]
+            ]
+            logging.info(f"Drift detected in columns: {drifted}")
+            report = drift_report(results)
             drift_report_file_path = self.data_validation_config.drift_report_file_path
 
             # Create directory
             dir_path = os.path.dirname(drift_report_file_path)
             os.makedirs(dir_path, exist_ok=True)
             write_yaml_file(file_path=drift_report_file_path, content=report)
+            return not drifted
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
+    @traced()
+    def save_reference_profile(self, dataframe: pd.DataFrame) -> ReferenceProfile:
+        """
+        Persist the profile of the train split with the run artifacts; it
+        is published next to the trained model, where detect_batch_drift
+        picks it up
+        """
+        try:
+            profile = ReferenceProfile().update(dataframe)
+            profile.save(self.data_validation_config.reference_profile_file_path)
+            logging.info(
+                f"Saved reference profile of {profile.rows} rows to "
+                f"{self.data_validation_config.reference_profile_file_path}"
+            )
+            return profile
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def detect_batch_drift(
+        self,
+        batches: Iterable[pd.DataFrame],
+        reference_profile_file_path: str = None,
+        threshold=DATA_VALIDATION_DRIFT_THRESHOLD,
+    ) -> bool:
+        """
+        Compare a stream of new batches with the persisted reference profile.
+        Batches are profiled one at a time, the training rows are never read.
+        """
+        try:
+            reference_profile_file_path = reference_profile_file_path or published_file_path(
+                REFERENCE_PROFILE_FILE_NAME, self.data_validation_config.final_model_dir
+            )
+            reference = ReferenceProfile.load(reference_profile_file_path)
+            current = ReferenceProfile.from_batches(
+                batches,
+                max_categories=reference.max_categories,
+                compression=reference.compression,
+            )
+            results = reference.compare(current, threshold=threshold)
+            return self.write_drift_report(results)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def initiate_data_validation(self) -> DataValidationArtifact:
         try:
-            train_file_path = self.data_ingestion_artifact.trained_file_path
-            test_file_path = self.data_ingestion_artifact.test_file_path
+            train_index_file_path = self.data_ingestion_artifact.train_index_file_path
+            test_index_file_path = self.data_ingestion_artifact.test_index_file_path
 
             ## read the data from train and test
-            train_dataframe = DataValidation.read_data(train_file_path)
-            test_dataframe = DataValidation.read_data(test_file_path)
+            train_dataframe = self.read_data(train_index_file_path)
+            test_dataframe = self.read_data(test_index_file_path)
 
             ## validate number of columns
-            status = self.validate_number_of_columns(dataframe=train_dataframe)
-            if not status:
-                error_message = f"Train dataframe does not contain all columns.\n"
-            status = self.validate_number_of_columns(dataframe=test_dataframe)
-            if not status:
-                error_message = f"Test dataframe does not contain all columns.\n"
+            columns_status = True
+            if not self.validate_number_of_columns(dataframe=train_dataframe):
+                columns_status = False
+                logging.info("Train dataframe does not contain all columns.")
+            if not self.validate_number_of_columns(dataframe=test_dataframe):
+                columns_status = False
+                logging.info("Test dataframe does not contain all columns.")
 
-            ## lets check datadrift
-            status = self.detect_dataset_drift(
-                base_df=train_dataframe, current_df=test_dataframe
+            ## route rows failing the schema to invalid_data_dir
+            config = self.data_validation_config
+            train_dataframe, train_result = self.split_valid_rows(
+                train_dataframe,
+                train_index_file_path,
+                config.valid_train_index_file_path,
+                config.invalid_train_index_file_path,
             )
-            dir_path = os.path.dirname(
-                self.data_validation_config.valid_train_file_path
+            test_dataframe, test_result = self.split_valid_rows(
+                test_dataframe,
+                test_index_file_path,
+                config.valid_test_index_file_path,
+                config.invalid_test_index_file_path,
             )
-            os.makedirs(dir_path, exist_ok=True)
-
-            train_dataframe.to_csv(
-                self.data_validation_config.valid_train_file_path,
-                index=False,
-                header=True,
+            write_yaml_file(
+                file_path=config.schema_report_file_path,
+                content={
+                    "train": train_result.to_report(),
+                    "test": test_result.to_report(),
+                },
             )
 
-            test_dataframe.to_csv(
-                self.data_validation_config.valid_test_file_path,
-                index=False,
-                header=True,
+            ## lets check datadrift
+            drift_status = self.detect_dataset_drift(
+                base_df=train_dataframe, current_df=test_dataframe
             )
+            self.save_reference_profile(train_dataframe)
 
             data_validation_artifact = DataValidationArtifact(
-                validation_status=status,
-                valid_train_file_path=self.data_ingestion_artifact.trained_file_path,
-                valid_test_file_path=self.data_ingestion_artifact.test_file_path,
-                invalid_train_file_path=None,
-                invalid_test_file_path=None,
+                validation_status=columns_status and drift_status,
+                feature_store_file_path=self.data_ingestion_artifact.feature_store_file_path,
+                valid_train_index_file_path=config.valid_train_index_file_path,
+                valid_test_index_file_path=config.valid_test_index_file_path,
+                invalid_train_index_file_path=config.invalid_train_index_file_path,
+                invalid_test_index_file_path=config.invalid_test_index_file_path,
                 drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                reference_profile_file_path=self.data_validation_config.reference_profile_file_path,
             )
             return data_validation_artifact
         except Exception as e:
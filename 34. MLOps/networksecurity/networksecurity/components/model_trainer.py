@@ -8,7 +8,19 @@ from networksecurity.entity.artifact_entity import (
     ModelTrainerArtifact,
 )
 from networksecurity.entity.config_entity import ModelTrainerConfig
+from networksecurity.constant.training_pipeline import (
+    COMPILED_ENGINE_ENABLED,
+    MODEL_CACHE_ENABLED,
+    MODEL_TRAINER_MODE,
+)
 from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.incremental import IncrementalTrainer
+from networksecurity.utils.ml_utils.model.model_cache import (
+    FittedModelCache,
+    estimator_identity,
+)
+from networksecurity.utils.main_utils.experiment_tracker import ExperimentTracker
+from networksecurity.utils.main_utils.tracing import span, traced
 from networksecurity.utils.main_utils.utils import save_object, load_object
 from networksecurity.utils.main_utils.utils import (
     load_numpy_array_data,
@@ -17,24 +29,14 @@ from networksecurity.utils.main_utils.utils import (
 from networksecurity.utils.ml_utils.metric.classification_metric import (
     get_classification_score,
 )
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import GaussianNB
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import (
     AdaBoostClassifier,
     GradientBoostingClassifier,
     RandomForestClassifier,
 )
-import mlflow
-from urllib.parse import urlparse
-
-
-# dagshub.init(repo_owner='ribhavjain', repo_name='networksecurity', mlflow=True)
-
-os.environ["MLFLOW_TRACKING_URI"] = (
-    "https://dagshub.com/ribhavjain/networksecurity.mlflow"
-)
-os.environ["MLFLOW_TRACKING_USERNAME"] = "ribhavjain"
-os.environ["MLFLOW_TRACKING_PASSWORD"] = ""
 
 
 class ModelTrainer:
@@ -42,38 +44,31 @@ class ModelTrainer:
         self,
         model_trainer_config: ModelTrainerConfig,
         data_transformation_artifact: DataTransformationArtifact,
+        experiment_tracker: ExperimentTracker = None,
     ):
         try:
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            ## the pipeline shares one tracker across runs and flushes it at the end
+            self.experiment_tracker = experiment_tracker
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def track_mlflow(self, best_model, classificationmetric):
-        mlflow.set_registry_uri("https://dagshub.com/ribhavjain/networksecurity.mlflow")
-        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-        with mlflow.start_run():
-            f1_score = classificationmetric.f1_score
-            precision_score = classificationmetric.precision_score
-            recall_score = classificationmetric.recall_score
-
-            mlflow.log_metric("f1_score", f1_score)
-            mlflow.log_metric("precision", precision_score)
-            mlflow.log_metric("recall_score", recall_score)
-            mlflow.sklearn.log_model(best_model, "model")
-            # Model registry does not work with file store
-            if tracking_url_type_store != "file":
-                # Register the model
-                # There are other ways to use the Model Registry, which depends on the use case,
-                # please refer to the doc for more information:
-                # https://mlflow.org/docs/latest/model-registry.html#api-workflow
-                mlflow.sklearn.log_model(
-                    best_model, "model", registered_model_name=best_model
-                )
-            else:
-                mlflow.sklearn.log_model(best_model, "model")
+    def track_mlflow(self, run, classificationmetric, prefix: str = ""):
+        ## only queued here, the tracker worker sends them in one batch
+        self.experiment_tracker.log_metrics(
+            run,
+            {
+                f"{prefix}f1_score": classificationmetric.f1_score,
+                f"{prefix}precision": classificationmetric.precision_score,
+                f"{prefix}recall_score": classificationmetric.recall_score,
+            },
+        )
 
-    def train_model(self, X_train, y_train, x_test, y_test):
+    def search_candidates(self) -> tuple:
+        """
+        (models, params) of the model search
+        """
         models = {
             "Random Forest": RandomForestClassifier(verbose=1),
             "Decision Tree": DecisionTreeClassifier(),
@@ -106,14 +101,50 @@ class ModelTrainer:
                 "n_estimators": [8, 16, 32, 64, 128, 256],
             },
         }
-        model_report: dict = evaluate_models(
-            X_train=X_train,
-            y_train=y_train,
-            X_test=x_test,
-            y_test=y_test,
-            models=models,
-            param=params,
-        )
+        return models, params
+
+    @staticmethod
+    def incremental_candidates() -> dict:
+        return {
+            "SGD Logistic Regression": SGDClassifier(loss="log_loss", random_state=42),
+            "Gaussian Naive Bayes": GaussianNB(),
+        }
+
+    def candidates_identity(self) -> dict:
+        """
+        Models and grids of the configured mode, part of the stage fingerprint
+        so a changed grid or estimator is trained instead of linked
+        """
+        if MODEL_TRAINER_MODE == "incremental":
+            models, params = self.incremental_candidates(), {}
+        else:
+            models, params = self.search_candidates()
+        return {
+            "mode": MODEL_TRAINER_MODE,
+            "models": {name: estimator_identity(model) for name, model in models.items()},
+            "params": params,
+        }
+
+    def train_model(self, X_train, y_train, x_test, y_test):
+        models, params = self.search_candidates()
+        ## fits of earlier runs on the same arrays and grid are reused
+        model_cache = None
+        if MODEL_CACHE_ENABLED:
+            model_cache = FittedModelCache(
+                self.model_trainer_config.model_cache_dir,
+                self.model_trainer_config.model_cache_max_size_mb,
+            )
+        with span("model_search", rows=len(X_train)):
+            model_report: dict = evaluate_models(
+                X_train=X_train,
+                y_train=y_train,
+                X_test=x_test,
+                y_test=y_test,
+                models=models,
+                param=params,
+                search_report_file_path=self.model_trainer_config.search_report_file_path,
+                cache=model_cache,
+            )
 
         ## To get best model score from dict
         best_model_score = max(sorted(model_report.values()))
@@ -129,15 +160,62 @@ class ModelTrainer:
             y_true=y_train, y_pred=y_train_pred
         )
 
-        ## Track the experiements with mlflow
-        self.track_mlflow(best_model, classification_train_metric)
-
         y_test_pred = best_model.predict(x_test)
         classification_test_metric = get_classification_score(
             y_true=y_test, y_pred=y_test_pred
         )
 
-        self.track_mlflow(best_model, classification_test_metric)
+        return self.save_model(
+            best_model_name,
+            best_model,
+            classification_train_metric,
+            classification_test_metric,
+        )
+
+    def train_model_incremental(self, X_train, y_train, x_test, y_test):
+        """
+        Out of core alternative to train_model: the models are trained with
+        partial_fit on chunks of the memory mapped arrays and scored in one
+        streaming pass over the test arrays
+        """
+        models = self.incremental_candidates()
+        with span("incremental_fit", rows=len(X_train)):
+            trainer = IncrementalTrainer(models).fit(X_train, y_train)
+        with span("incremental_score", rows=len(x_test)):
+            test_metrics = trainer.score_stream(x_test, y_test)
+        logging.info(f"Incremental model test metrics: {test_metrics}")
+
+        ## To get best model name by test f1 score
+        best_model_name = max(test_metrics, key=lambda name: test_metrics[name].f1_score)
+        best_model = trainer.models_[best_model_name]
+        classification_train_metric = trainer.score_stream(
+            X_train, y_train, models={best_model_name: best_model}
+        )[best_model_name]
+
+        return self.save_model(
+            best_model_name,
+            best_model,
+            classification_train_metric,
+            test_metrics[best_model_name],
+        )
+
+    @traced()
+    def save_model(
+        self,
+        best_model_name,
+        best_model,
+        classification_train_metric,
+        classification_test_metric,
+    ) -> ModelTrainerArtifact:
+        ## Track the experiements with mlflow, one run per training
+        run = self.experiment_tracker.start_run(run_name=best_model_name)
+        self.experiment_tracker.log_params(
+            run, {"model": best_model_name, **best_model.get_params()}
+        )
+        self.track_mlflow(run, classification_train_metric, prefix="train_")
+        self.track_mlflow(run, classification_test_metric, prefix="test_")
+        self.experiment_tracker.log_model(run, best_model, "model")
+        self.experiment_tracker.end_run(run)
 
         preprocessor = load_object(
             file_path=self.data_transformation_artifact.transformed_object_file_path
@@ -149,9 +227,10 @@ class ModelTrainer:
         os.makedirs(model_dir_path, exist_ok=True)
 
         network_Model = NetworkModel(preprocessor=preprocessor, model=best_model)
-        save_object(self.model_trainer_config.trained_model_file_path, obj=NetworkModel)
-        # model pusher
-        save_object("final_model/model.pkl", best_model)
+        ## export tree ensembles to flat arrays for the vectorized engine
+        if COMPILED_ENGINE_ENABLED:
+            network_Model.compile()
+        save_object(self.model_trainer_config.trained_model_file_path, obj=network_Model)
 
         ## Model Trainer Artifact
         model_trainer_artifact = ModelTrainerArtifact(
@@ -171,18 +250,46 @@ class ModelTrainer:
                 self.data_transformation_artifact.transformed_test_file_path
             )
 
-            # loading training array and testing array
-            train_arr = load_numpy_array_data(train_file_path)
-            test_arr = load_numpy_array_data(test_file_path)
-
-            x_train, y_train, x_test, y_test = (
-                train_arr[:, :-1],
-                train_arr[:, -1],
-                test_arr[:, :-1],
-                test_arr[:, -1],
-            )
+            # memory mapping training and testing arrays, the search workers
+            # map the same files instead of receiving copies
+            artifact = self.data_transformation_artifact
+            if artifact.transformed_train_target_file_path is not None:
+                x_train = load_numpy_array_data(train_file_path, mmap_mode="r")
+                y_train = load_numpy_array_data(
+                    artifact.transformed_train_target_file_path, mmap_mode="r"
+                )
+                x_test = load_numpy_array_data(test_file_path, mmap_mode="r")
+                y_test = load_numpy_array_data(
+                    artifact.transformed_test_target_file_path, mmap_mode="r"
+                )
+            else:
+                ## older artifacts: target is the last column
+                train_arr = load_numpy_array_data(train_file_path)
+                test_arr = load_numpy_array_data(test_file_path)
+                x_train, y_train, x_test, y_test = (
+                    train_arr[:, :-1],
+                    train_arr[:, -1],
+                    test_arr[:, :-1],
+                    test_arr[:, -1],
+                )
 
-            model_trainer_artifact = self.train_model(x_train, y_train, x_test, y_test)
+            ## standalone use: own tracker, flushed before returning
+            owns_tracker = self.experiment_tracker is None
+            if owns_tracker:
+                self.experiment_tracker = ExperimentTracker()
+            try:
+                if MODEL_TRAINER_MODE == "incremental":
+                    model_trainer_artifact = self.train_model_incremental(
+                        x_train, y_train, x_test, y_test
+                    )
+                else:
+                    model_trainer_artifact = self.train_model(
+                        x_train, y_train, x_test, y_test
+                    )
+            finally:
+                if owns_tracker:
+                    self.experiment_tracker.close()
+                    self.experiment_tracker = None
             return model_trainer_artifact
 
         except Exception as e:
@@ -12,11 +12,36 @@ FILE_NAME: str = "phisingData.csv"
 TRAIN_FILE_NAME: str = "train.csv"
 TEST_FILE_NAME: str = "test.csv"
 
+## train/test splits are row index arrays over the feature store
+TRAIN_INDEX_FILE_NAME: str = "train_index.npy"
+TEST_INDEX_FILE_NAME: str = "test_index.npy"
+
+## storage of tabular artifacts: "columnar" (memory mapped, one binary file per column) or "csv"
+ARTIFACT_STORE_FORMAT: str = "columnar"
+
 SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
 
 SAVED_MODEL_DIR = os.path.join("saved_models")
 MODEL_FILE_NAME = "model.pkl"
 
+FINAL_MODEL_DIR: str = "final_model"
+FINAL_MODEL_FILE_NAME: str = "model.pkl"
+FINAL_PREPROCESSOR_FILE_NAME: str = "preprocessor.pkl"
+## every published model is a final_model/<run timestamp> directory, CURRENT names the served one
+FINAL_MODEL_CURRENT_FILE_NAME: str = "CURRENT"
+## written last into a version directory, a version without it is incomplete
+FINAL_MODEL_MANIFEST_FILE_NAME: str = "manifest.yaml"
+## published versions kept on disk, older ones are deleted
+FINAL_MODEL_KEEP_VERSIONS: int = 3
+REFERENCE_PROFILE_FILE_NAME: str = "reference_profile.yaml"
+
+## per run record of stage status, input fingerprints and artifacts
+PIPELINE_MANIFEST_FILE_NAME: str = "run_manifest.yaml"
+## link the artifact of an earlier run when a stage's inputs and config are unchanged
+PIPELINE_STAGE_CACHE_ENABLED: bool = True
+## fingerprint input files by sha256 instead of size and mtime
+PIPELINE_MANIFEST_USE_CHECKSUM: bool = False
+
 
 """
 Data Ingestion related constant start with DATA_INGESTION VAR NAME
@@ -27,6 +52,19 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATION: float = 0.2
+## documents pulled from the mongo cursor and written to the feature store at a time
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10_000
+## fetch only documents newer than the persisted watermark and keep them as partitions
+DATA_INGESTION_INCREMENTAL: bool = False
+DATA_INGESTION_PARTITION_DIR_NAME: str = "feature_store_partitions"
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.yaml"
+## writes can reach mongo out of _id order (concurrent inserts, client clocks): documents
+## whose _id is younger than this are left for the next run, and this window below the
+## watermark is read again, skipping the _ids already exported
+DATA_INGESTION_WATERMARK_LAG_SECONDS: int = 300
+## push_data.py registers unfinished bulk loads of a collection in <collection><suffix>;
+## ingestion does not read past the oldest one, all its rows carry its start time
+DATA_INGESTION_BULK_LOAD_COLLECTION_SUFFIX: str = "_bulk_loads"
 
 """
 Data Validation related constant start with DATA_VALIDATION VAR NAME
@@ -36,6 +74,17 @@ DATA_VALIDATION_VALID_DIR: str = "validated"
 DATA_VALIDATION_INVALID_DIR: str = "invalid"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
 DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME: str = "schema_report.yaml"
+DATA_VALIDATION_DRIFT_THRESHOLD: float = 0.05
+## integer columns spanning at most this many values get chi-square/PSI, the rest KS
+DATA_VALIDATION_DRIFT_MAX_CATEGORIES: int = 64
+DATA_VALIDATION_DRIFT_PSI_BINS: int = 10
+## cells (rows x columns) histogrammed per step, bounds the memory of the drift pass
+DATA_VALIDATION_DRIFT_BLOCK_CELLS: int = 4_000_000
+DATA_VALIDATION_DRIFT_MAX_WORKERS: int = os.cpu_count() or 1
+## reference profile of the train split, compared with new batches instead of the raw rows
+DATA_VALIDATION_REFERENCE_PROFILE_DIR: str = "reference_profile"
+DATA_VALIDATION_SKETCH_COMPRESSION: int = 200
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
 """
@@ -51,8 +100,15 @@ DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = {
     "n_neighbors": 3,
     "weights": "uniform",
 }
+## "chunked_knn" (indexed donors, only incomplete rows searched) or "knn" (sklearn KNNImputer)
+DATA_TRANSFORMATION_IMPUTER: str = "chunked_knn"
+## memory cap of the distance chunks of the chunked_knn imputer
+DATA_TRANSFORMATION_IMPUTER_MAX_MEMORY_MB: int = 256
 DATA_TRANSFORMATION_TRAIN_FILE_PATH: str = "train.npy"
 DATA_TRANSFORMATION_TEST_FILE_PATH: str = "test.npy"
+## targets are stored next to the feature arrays, row aligned
+DATA_TRANSFORMATION_TRAIN_TARGET_FILE_PATH: str = "train_target.npy"
+DATA_TRANSFORMATION_TEST_TARGET_FILE_PATH: str = "test_target.npy"
 
 """
 Model Trainer ralated constant start with MODE TRAINER VAR NAME
@@ -62,5 +118,101 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD: float = 0.05
+## folds of the hyperparameter search, as GridSearchCV(cv=3)
+MODEL_TRAINER_SEARCH_CV: int = 3
+## worker processes shared by the (model, params, fold) tasks of every family
+MODEL_TRAINER_SEARCH_N_JOBS: int = os.cpu_count() or 1
+## score every n_estimators value of a grid from one staged or warm started fit
+MODEL_TRAINER_SEARCH_PATH_AWARE: bool = True
+MODEL_TRAINER_SEARCH_REPORT_FILE_NAME: str = "search_report.yaml"
+## "search" (grid search in memory) or "incremental" (partial_fit over chunks,
+## for transformed arrays larger than the memory)
+MODEL_TRAINER_MODE: str = "search"
+## rows per partial_fit call and passes over the training arrays
+MODEL_TRAINER_INCREMENTAL_CHUNK_SIZE: int = 50_000
+MODEL_TRAINER_INCREMENTAL_EPOCHS: int = 5
+## fitted estimators and cv scores reused across training runs, outside the timestamped artifacts
+MODEL_CACHE_ENABLED: bool = True
+MODEL_CACHE_DIR: str = os.path.join("model_cache")
+MODEL_CACHE_MAX_SIZE_MB: int = 1024
+## serve tree ensembles through the vectorized compiled engine when supported
+COMPILED_ENGINE_ENABLED: bool = True
+## larger batches go to sklearn, whose per row cost is lower once call overhead is amortised
+COMPILED_ENGINE_MAX_ROWS: int = 256
+## rows evaluated per step by the compiled engine, bounds its scratch memory
+COMPILED_ENGINE_BATCH_ROWS: int = 512
 
 TRAINING_BUCKET_NAME = "networksecurity"
+
+"""
+S3 sync related constant start with S3_SYNC VAR NAME
+"""
+## files transferred at once across the artifact and model syncs
+S3_SYNC_MAX_WORKERS: int = 16
+## files from this size on (the large .npy and .pkl artifacts) go in parallel parts
+S3_SYNC_MULTIPART_THRESHOLD_MB: int = 8
+S3_SYNC_MULTIPART_CHUNKSIZE_MB: int = 8
+
+"""
+Model serving related constant start with MODEL_REGISTRY VAR NAME
+"""
+## seconds between artifact change checks of the serving model registry
+MODEL_REGISTRY_POLL_INTERVAL: float = 5.0
+## verify the files of a version against the sha256 checksums of its manifest before loading
+MODEL_REGISTRY_USE_CHECKSUM: bool = False
+
+"""
+Batch prediction related constant start with PREDICTION VAR NAME
+"""
+## rows read from an uploaded csv per predict call in streaming mode
+PREDICTION_STREAM_CHUNK_SIZE: int = 50_000
+
+## json records coalesced into one predict call by the micro batcher
+MICRO_BATCH_MAX_BATCH_SIZE: int = 1024
+## longest time the first queued request waits for others to join its batch
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+
+## thread pool for numpy/pandas/sklearn work that releases the GIL
+EXECUTOR_THREAD_WORKERS: int = min(32, (os.cpu_count() or 1) + 4)
+## start method of the process the training job runs in
+EXECUTOR_PROCESS_START_METHOD: str = "spawn"
+
+"""
+Training job related constant start with TRAINING_JOB VAR NAME
+"""
+## finished jobs kept in memory for the status endpoints
+TRAINING_JOB_HISTORY_SIZE: int = 20
+## nice increment of the training process so serving keeps the cpu
+TRAINING_JOB_NICENESS: int = 10
+
+"""
+Experiment tracking related constant start with EXPERIMENT_TRACKING VAR NAME
+"""
+## local store used unless MLFLOW_TRACKING_URI points somewhere else,
+## run artifacts go to ./mlruns
+EXPERIMENT_TRACKING_URI: str = "sqlite:///mlflow.db"
+EXPERIMENT_TRACKING_EXPERIMENT_NAME: str = "networksecurity"
+## most queued tracking operations the background worker sends at once
+EXPERIMENT_TRACKING_BATCH_SIZE: int = 1000
+## seconds the worker lets operations pile up before sending them
+EXPERIMENT_TRACKING_FLUSH_INTERVAL: float = 2.0
+## registry name for the trained model, None to only log it to the run
+EXPERIMENT_TRACKING_REGISTERED_MODEL_NAME: str = None
+
+"""
+Tracing related constant start with TRACING VAR NAME
+"""
+## record spans of the pipeline stages, a disabled span does nothing
+TRACING_ENABLED: bool = True
+## trace of a run, written next to its artifacts
+TRACING_FILE_NAME: str = "trace.json"
+
+"""
+Logging related constant start with LOG VAR NAME
+"""
+## directory under the working directory, one json lines file per process
+LOG_DIR_NAME: str = "logs"
+LOG_LEVEL: str = "INFO"
+## a log file is rotated at this size, keeping LOG_BACKUP_COUNT old files
+LOG_MAX_BYTES: int = 10 * 2**20
+LOG_BACKUP_COUNT: int = 5
@@ -3,18 +3,21 @@ from dataclasses import dataclass
 
 @dataclass
 class DataIngestionArtifact:
-    trained_file_path: str
-    test_file_path: str
+    feature_store_file_path: str
+    train_index_file_path: str
+    test_index_file_path: str
 
 
 @dataclass
 class DataValidationArtifact:
     validation_status: bool
-    valid_train_file_path: str
-    valid_test_file_path: str
-    invalid_train_file_path: str
-    invalid_test_file_path: str
+    feature_store_file_path: str
+    valid_train_index_file_path: str
+    valid_test_index_file_path: str
+    invalid_train_index_file_path: str
+    invalid_test_index_file_path: str
     drift_report_file_path: str
+    reference_profile_file_path: str
 
 
 @dataclass
@@ -22,6 +25,9 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    ## None for artifacts of the older format, features and target in one array
+    transformed_train_target_file_path: str = None
+    transformed_test_target_file_path: str = None
 
 
 @dataclass
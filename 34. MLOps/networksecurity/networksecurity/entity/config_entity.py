@@ -1,14 +1,18 @@
 from datetime import datetime
 import os
 from networksecurity.constant import training_pipeline
+from networksecurity.utils.main_utils.artifact_store import get_artifact_store
 
 print(training_pipeline.PIPELINE_NAME)
 print(training_pipeline.ARTIFACT_DIR)
 
 
 class TrainingPipelineConfig:
-    def __init__(self, timestamp=datetime.now()):
-        timestamp = timestamp.strftime("%m_%d_%Y_%H_%M_%S")
+    TIMESTAMP_FORMAT = "%m_%d_%Y_%H_%M_%S"
+
+    def __init__(self, timestamp: datetime = None):
+        ## a default of datetime.now() would be evaluated once, at import
+        timestamp = (timestamp or datetime.now()).strftime(self.TIMESTAMP_FORMAT)
         self.pipeline_name = training_pipeline.PIPELINE_NAME
         self.artifact_name = training_pipeline.ARTIFACT_DIR
         self.artifact_dir = os.path.join(self.artifact_name, timestamp)
@@ -22,26 +26,47 @@ class DataIngestionConfig:
             training_pipeline_config.artifact_dir,
             training_pipeline.DATA_INGESTION_DIR_NAME,
         )
-        self.feature_store_file_path: str = os.path.join(
-            self.data_ingestion_dir,
-            training_pipeline.DATA_INGESTION_FEATURE_STORE_DIR,
-            training_pipeline.FILE_NAME,
+        self.artifact_store_format: str = training_pipeline.ARTIFACT_STORE_FORMAT
+        artifact_store = get_artifact_store(self.artifact_store_format)
+        self.feature_store_file_path: str = artifact_store.path_for(
+            os.path.join(
+                self.data_ingestion_dir,
+                training_pipeline.DATA_INGESTION_FEATURE_STORE_DIR,
+                training_pipeline.FILE_NAME,
+            )
         )
-        self.training_file_path: str = os.path.join(
+        self.train_index_file_path: str = os.path.join(
             self.data_ingestion_dir,
             training_pipeline.DATA_INGESTION_INGESTED_DIR,
-            training_pipeline.TRAIN_FILE_NAME,
+            training_pipeline.TRAIN_INDEX_FILE_NAME,
         )
-        self.testing_file_path: str = os.path.join(
+        self.test_index_file_path: str = os.path.join(
             self.data_ingestion_dir,
             training_pipeline.DATA_INGESTION_INGESTED_DIR,
-            training_pipeline.TEST_FILE_NAME,
+            training_pipeline.TEST_INDEX_FILE_NAME,
         )
         self.train_test_split_ratio: float = (
             training_pipeline.DATA_INGESTION_TRAIN_TEST_SPLIT_RATION
         )
         self.collection_name: str = training_pipeline.DATA_INGESTION_COLLECTION_NAME
         self.database_name: str = training_pipeline.DATA_INGESTION_DATABASE_NAME
+        self.bulk_load_collection_name: str = (
+            self.collection_name + training_pipeline.DATA_INGESTION_BULK_LOAD_COLLECTION_SUFFIX
+        )
+        self.export_batch_size: int = training_pipeline.DATA_INGESTION_EXPORT_BATCH_SIZE
+        self.incremental: bool = training_pipeline.DATA_INGESTION_INCREMENTAL
+        ## partitions outlive a single run, so they sit beside the timestamped dirs
+        self.partition_dir: str = os.path.join(
+            training_pipeline_config.artifact_name,
+            training_pipeline.DATA_INGESTION_PARTITION_DIR_NAME,
+        )
+        self.partition_file_path: str = artifact_store.path_for(
+            os.path.join(self.partition_dir, f"part-{training_pipeline_config.timestamp}")
+        )
+        self.watermark_file_path: str = os.path.join(
+            self.partition_dir, training_pipeline.DATA_INGESTION_WATERMARK_FILE_NAME
+        )
+        self.watermark_lag_seconds: int = training_pipeline.DATA_INGESTION_WATERMARK_LAG_SECONDS
 
 
 class DataValidationConfig:
@@ -56,23 +81,34 @@ class DataValidationConfig:
         self.invalid_data_dir: str = os.path.join(
             self.data_validation_dir, training_pipeline.DATA_VALIDATION_INVALID_DIR
         )
-        self.valid_train_file_path: str = os.path.join(
-            self.valid_data_dir, training_pipeline.TRAIN_FILE_NAME
+        self.valid_train_index_file_path: str = os.path.join(
+            self.valid_data_dir, training_pipeline.TRAIN_INDEX_FILE_NAME
         )
-        self.valid_test_file_path: str = os.path.join(
-            self.valid_data_dir, training_pipeline.TEST_FILE_NAME
+        self.valid_test_index_file_path: str = os.path.join(
+            self.valid_data_dir, training_pipeline.TEST_INDEX_FILE_NAME
         )
-        self.invalid_train_file_path: str = os.path.join(
-            self.invalid_data_dir, training_pipeline.TRAIN_FILE_NAME
+        self.invalid_train_index_file_path: str = os.path.join(
+            self.invalid_data_dir, training_pipeline.TRAIN_INDEX_FILE_NAME
         )
-        self.invalid_test_file_path: str = os.path.join(
-            self.invalid_data_dir, training_pipeline.TEST_FILE_NAME
+        self.invalid_test_index_file_path: str = os.path.join(
+            self.invalid_data_dir, training_pipeline.TEST_INDEX_FILE_NAME
         )
         self.drift_report_file_path: str = os.path.join(
             self.data_validation_dir,
             training_pipeline.DATA_VALIDATION_DRIFT_REPORT_DIR,
             training_pipeline.DATA_VALIDATION_DRIFT_REPORT_FILE_NAME,
         )
+        self.schema_report_file_path: str = os.path.join(
+            self.data_validation_dir,
+            training_pipeline.DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME,
+        )
+        self.reference_profile_file_path: str = os.path.join(
+            self.data_validation_dir,
+            training_pipeline.DATA_VALIDATION_REFERENCE_PROFILE_DIR,
+            training_pipeline.REFERENCE_PROFILE_FILE_NAME,
+        )
+        ## the reference profile of the served model is published in its version directory
+        self.final_model_dir: str = training_pipeline_config.model_dir
 
 
 class DataTransformationConfig:
@@ -91,6 +127,16 @@ class DataTransformationConfig:
             training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
             training_pipeline.TEST_FILE_NAME.replace("csv", "npy"),
         )
+        self.transformed_train_target_file_path: str = os.path.join(
+            self.data_transformation_dir,
+            training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+            training_pipeline.DATA_TRANSFORMATION_TRAIN_TARGET_FILE_PATH,
+        )
+        self.transformed_test_target_file_path: str = os.path.join(
+            self.data_transformation_dir,
+            training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+            training_pipeline.DATA_TRANSFORMATION_TEST_TARGET_FILE_PATH,
+        )
         self.transformed_object_file_path: str = os.path.join(
             self.data_transformation_dir,
             training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
@@ -109,6 +155,12 @@ class ModelTrainerConfig:
             training_pipeline.MODEL_TRAINER_TRAINED_MODEL_DIR,
             training_pipeline.MODEL_FILE_NAME,
         )
+        self.search_report_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_SEARCH_REPORT_FILE_NAME,
+        )
+        self.model_cache_dir: str = training_pipeline.MODEL_CACHE_DIR
+        self.model_cache_max_size_mb: int = training_pipeline.MODEL_CACHE_MAX_SIZE_MB
         self.expected_accuracy: float = training_pipeline.MODEL_TRAINER_EXPECTED_SCORE
         self.overfitting_underfitting_threshold = (
             training_pipeline.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
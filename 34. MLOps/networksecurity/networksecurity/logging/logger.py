@@ -1,16 +1,146 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import multiprocessing.util
 import os
-from datetime import datetime
+import queue
+from datetime import datetime, timezone
+
+from networksecurity.constant.training_pipeline import (
+    LOG_BACKUP_COUNT,
+    LOG_DIR_NAME,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+)
 
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 
-logs_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
+logs_path = os.path.join(os.getcwd(), LOG_DIR_NAME)
 os.makedirs(logs_path, exist_ok=True)
 
-LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
+## attributes every LogRecord has, anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+
+def log_file_path(pid: int = None) -> str:
+    """
+    Every process writes its own file, so rotation never races another
+    process (serving workers, the training job, search workers)
+    """
+    stem, extension = os.path.splitext(LOG_FILE)
+    return os.path.join(logs_path, f"{stem}_{pid or os.getpid()}{extension}")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per line, with the fields passed through extra=
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "lineno": record.lineno,
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Only what is cheap and has to happen in the calling thread: merge
+        the args and render the traceback, the listener does the rest
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler() -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(
+        log_file_path(),
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        delay=True,
+    )
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _start_listener() -> logging.handlers.QueueListener:
+    listener = logging.handlers.QueueListener(
+        _queue_handler.queue, _file_handler(), respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+## logging.info and friends only put the record on a queue, a background
+## listener thread writes it to the rotating file
+_queue_handler = _QueueHandler(queue.SimpleQueue())
+_listener = _start_listener()
+
+root_logger = logging.getLogger()
+root_logger.setLevel(LOG_LEVEL)
+root_logger.addHandler(_queue_handler)
+
+LOG_FILE_PATH = log_file_path()
+
+
+def stop_logging():
+    """
+    Writes every queued record and stops the listener; runs at exit
+    """
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    try:
+        listener.stop()
+    finally:
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _after_fork_in_child():
+    ## the listener thread does not survive a fork, the child starts its own
+    ## on a fresh queue and its own file
+    global _listener, LOG_FILE_PATH
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = _start_listener()
+    LOG_FILE_PATH = log_file_path()
+
+
+def _register_finalizer(_=None):
+    ## multiprocessing children (pool workers) leave through os._exit, which
+    ## skips atexit but runs the multiprocessing finalizers. A child clears
+    ## the finalizers it inherited right after it starts, so the after fork
+    ## hook registers the finalizer again in every child
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+
+
+atexit.register(stop_logging)
+_register_finalizer()
+multiprocessing.util.register_after_fork(_queue_handler, _register_finalizer)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,51 @@
+import sys
+from typing import IO, Iterator
+
+import pandas as pd
+
+from networksecurity.constant.training_pipeline import PREDICTION_STREAM_CHUNK_SIZE
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+
+class BatchPrediction:
+    """
+    Scores a csv file chunk by chunk so memory stays bounded by
+    chunksize rows whatever the size of the input.
+    """
+
+    def __init__(
+        self,
+        network_model: NetworkModel,
+        chunksize: int = PREDICTION_STREAM_CHUNK_SIZE,
+    ):
+        try:
+            self.network_model = network_model
+            self.chunksize = chunksize
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def iter_predicted_chunks(self, file_obj: IO) -> Iterator[pd.DataFrame]:
+        try:
+            rows = 0
+            for chunk in pd.read_csv(file_obj, chunksize=self.chunksize):
+                chunk["predicted_column"] = self.network_model.predict(chunk)
+                rows += len(chunk)
+                yield chunk
+            logging.info(f"Batch prediction scored {rows} rows")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stream_csv(self, file_obj: IO) -> Iterator[str]:
+        ## the chunked reader keeps a running index, so the output matches
+        ## the one shot to_csv of the full frame
+        header = True
+        for chunk in self.iter_predicted_chunks(file_obj):
+            yield chunk.to_csv(header=header)
+            header = False
+
+    def stream_ndjson(self, file_obj: IO) -> Iterator[str]:
+        for chunk in self.iter_predicted_chunks(file_obj):
+            lines = chunk.to_json(orient="records", lines=True)
+            yield lines if lines.endswith("\n") else lines + "\n"
@@ -0,0 +1,137 @@
+import asyncio
+import sys
+from typing import Callable, List
+
+import pandas as pd
+
+from networksecurity.constant.training_pipeline import (
+    MICRO_BATCH_MAX_BATCH_SIZE,
+    MICRO_BATCH_MAX_WAIT_MS,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.executor import InferenceExecutor
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+
+class MicroBatchPredictor:
+    """
+    Coalesces concurrent json prediction requests into one vectorized
+    NetworkModel.predict call.
+
+    The first request waits at most max_wait_ms for others to join; a batch
+    is dispatched as soon as it holds max_batch_size records. Results are
+    split back per request in submission order.
+    """
+
+    def __init__(
+        self,
+        model_provider: Callable[[], NetworkModel],
+        max_batch_size: int = MICRO_BATCH_MAX_BATCH_SIZE,
+        max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS,
+        executor: InferenceExecutor = None,
+    ):
+        try:
+            self.model_provider = model_provider
+            self.executor = executor
+            self.max_batch_size = max_batch_size
+            self.max_wait = max_wait_ms / 1000.0
+            self._queue: asyncio.Queue = None
+            self._worker: asyncio.Task = None
+            ## requests taken off the queue whose futures are not resolved yet
+            self._batch: list = []
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops the worker; requests still queued, being collected or being
+        predicted fail instead of waiting forever
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            pending, self._batch = self._batch, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro batch predictor stopped"))
+
+    @property
+    def queue_depth(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def predict(self, records: List[dict]) -> list:
+        if not records:
+            return []
+        if self._worker is None:
+            raise RuntimeError("Micro batch predictor is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = self._batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _predict_batch(self, records: List[dict]) -> list:
+        network_model = self.model_provider()
+        frame = pd.DataFrame.from_records(records)
+        ## json objects carry no column order; align with what the preprocessor was fit on
+        columns = getattr(network_model.preprocessor, "feature_names_in_", None)
+        if columns is not None:
+            frame = frame.reindex(columns=columns)
+        return network_model.predict(frame).tolist()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            records = [record for item in batch for record in item[0]]
+            try:
+                if self.executor is not None:
+                    predictions = await self.executor.run_in_thread(
+                        self._predict_batch, records
+                    )
+                else:
+                    predictions = await loop.run_in_executor(
+                        None, self._predict_batch, records
+                    )
+            except Exception as e:
+                logging.info(f"Micro batch of {len(records)} records failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._batch = []
+                continue
+
+            offset = 0
+            for item_records, future in batch:
+                end = offset + len(item_records)
+                if not future.done():
+                    future.set_result(predictions[offset:end])
+                offset = end
+            self._batch = []
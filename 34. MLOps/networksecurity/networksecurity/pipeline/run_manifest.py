@@ -0,0 +1,261 @@
+import hashlib
+import os
+import shutil
+import sys
+import time
+from dataclasses import asdict, fields, is_dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from networksecurity.constant import training_pipeline
+from networksecurity.constant.training_pipeline import (
+    PIPELINE_MANIFEST_FILE_NAME,
+    PIPELINE_MANIFEST_USE_CHECKSUM,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.utils import read_yaml_file, write_yaml_file
+
+
+def _plain(value):
+    ## numpy scalars (sklearn metrics) would need unsafe yaml tags
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def artifact_to_dict(artifact) -> dict:
+    return _plain(asdict(artifact))
+
+
+def artifact_from_dict(artifact_class, data: dict):
+    """
+    Rebuilds an artifact dataclass, including nested artifact dataclasses
+    """
+    values = {}
+    for artifact_field in fields(artifact_class):
+        value = data.get(artifact_field.name)
+        if is_dataclass(artifact_field.type) and isinstance(value, dict):
+            value = artifact_from_dict(artifact_field.type, value)
+        values[artifact_field.name] = value
+    return artifact_class(**values)
+
+
+def _artifact_paths(data: dict) -> List[str]:
+    paths = []
+    for value in data.values():
+        if isinstance(value, dict):
+            paths.extend(_artifact_paths(value))
+        elif isinstance(value, str) and os.sep in os.path.normpath(value):
+            paths.append(value)
+    return paths
+
+
+def _rebase(data: dict, old_dir: str, new_dir: str) -> dict:
+    rebased = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            value = _rebase(value, old_dir, new_dir)
+        elif isinstance(value, str) and value.startswith(old_dir + os.sep):
+            value = new_dir + value[len(old_dir) :]
+        rebased[key] = value
+    return rebased
+
+
+class RunManifest:
+    """
+    artifact_dir/run_manifest.yaml of one TrainingPipeline run: the run
+    status and, per stage, its status, the fingerprint of its inputs and
+    config, and its artifact.
+
+    A stage fingerprint covers the stage config (with the run directory
+    and timestamp factored out), the pipeline constants, the files of the input artifact
+    and any extra input such as the schema or the source collection. Files
+    are compared by size and mtime, or by sha256 with use_checksum. Two
+    runs whose stage fingerprints match would produce the same artifact,
+    so the later run links the earlier stage directory instead.
+    """
+
+    def __init__(
+        self, artifact_dir: str, use_checksum: bool = PIPELINE_MANIFEST_USE_CHECKSUM
+    ):
+        try:
+            self.artifact_dir = artifact_dir
+            self.use_checksum = use_checksum
+            self.file_path = os.path.join(artifact_dir, PIPELINE_MANIFEST_FILE_NAME)
+            if os.path.exists(self.file_path):
+                self.data = read_yaml_file(self.file_path)
+            else:
+                self.data = {
+                    "artifact_dir": artifact_dir,
+                    "status": "created",
+                    "created_at": time.time(),
+                    "stages": {},
+                }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @property
+    def status(self) -> str:
+        return self.data["status"]
+
+    def save(self):
+        tmp_path = self.file_path + ".tmp"
+        write_yaml_file(tmp_path, self.data)
+        os.replace(tmp_path, self.file_path)
+
+    def set_status(self, status: str):
+        self.data["status"] = status
+        self.data["updated_at"] = time.time()
+        self.save()
+
+    def _file_fingerprint(self, path: str) -> list:
+        if os.path.isdir(path):
+            entries = []
+            for root, dirs, files in os.walk(path, followlinks=True):
+                dirs.sort()
+                for file_name in sorted(files):
+                    file_path = os.path.join(root, file_name)
+                    entries.append(
+                        [os.path.relpath(file_path, path)] + self._file_fingerprint(file_path)
+                    )
+            return entries
+        if not os.path.exists(path):
+            return ["missing"]
+        if self.use_checksum:
+            digest = hashlib.sha256()
+            with open(path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    digest.update(block)
+            return [digest.hexdigest()]
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def _constants() -> list:
+        return sorted(
+            (name, repr(value))
+            for name, value in vars(training_pipeline).items()
+            if name.isupper() and isinstance(value, (str, int, float, bool, list, dict, tuple))
+        )
+
+    def stage_fingerprint(
+        self, stage: str, config=None, input_artifact=None, extra_files=(), extra=None
+    ) -> str:
+        """
+        sha256 of everything the output of stage depends on
+        """
+        try:
+            ## run specific paths (e.g. ingestion partitions) carry the run timestamp
+            timestamp = os.path.basename(os.path.normpath(self.artifact_dir))
+            config_values = {}
+            for key, value in sorted(vars(config).items() if config is not None else []):
+                if isinstance(value, str):
+                    value = value.replace(self.artifact_dir, "<artifact_dir>")
+                    value = value.replace(timestamp, "<timestamp>")
+                config_values[key] = repr(value)
+            inputs = []
+            if input_artifact is not None:
+                for path in _artifact_paths(artifact_to_dict(input_artifact)):
+                    inputs.append(self._file_fingerprint(path))
+            identity = [
+                stage,
+                config_values,
+                self._constants(),
+                inputs,
+                [self._file_fingerprint(path) for path in extra_files],
+                repr(extra),
+            ]
+            return hashlib.sha256(repr(identity).encode()).hexdigest()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stage(self, stage: str) -> Optional[dict]:
+        return self.data["stages"].get(stage)
+
+    def succeeded_artifact(self, stage: str, artifact_class):
+        entry = self.stage(stage)
+        if entry is None or entry["status"] != "succeeded":
+            return None
+        return artifact_from_dict(artifact_class, entry["artifact"])
+
+    def start_stage(self, stage: str, fingerprint: str = None):
+        self.data["stages"][stage] = {
+            "status": "running",
+            "fingerprint": fingerprint,
+            "started_at": time.time(),
+        }
+        self.set_status("running")
+
+    def finish_stage(self, stage: str, artifact=None, status: str = "succeeded", **details):
+        entry = self.data["stages"].setdefault(stage, {"started_at": time.time()})
+        entry.update(
+            status=status,
+            finished_at=time.time(),
+            artifact=artifact_to_dict(artifact) if is_dataclass(artifact) else None,
+            **details,
+        )
+        self.save()
+
+    @classmethod
+    def runs(cls, artifact_root: str = training_pipeline.ARTIFACT_DIR) -> List["RunManifest"]:
+        """
+        Manifests of every run under artifact_root, newest first
+        """
+        if not os.path.isdir(artifact_root):
+            return []
+        manifests = [
+            cls(os.path.join(artifact_root, name))
+            for name in os.listdir(artifact_root)
+            if os.path.exists(os.path.join(artifact_root, name, PIPELINE_MANIFEST_FILE_NAME))
+        ]
+        return sorted(manifests, key=lambda manifest: -manifest.data["created_at"])
+
+    def find_previous_stage(self, stage: str, fingerprint: str) -> Optional["RunManifest"]:
+        """
+        Newest other run whose stage succeeded with the same fingerprint and
+        whose artifact files still exist
+        """
+        root = os.path.dirname(os.path.normpath(self.artifact_dir))
+        for manifest in self.runs(root):
+            if os.path.normpath(manifest.artifact_dir) == os.path.normpath(self.artifact_dir):
+                continue
+            entry = manifest.stage(stage)
+            if entry is None or entry["status"] != "succeeded":
+                continue
+            if entry.get("fingerprint") != fingerprint:
+                continue
+            if all(os.path.exists(path) for path in _artifact_paths(entry["artifact"] or {})):
+                return manifest
+        return None
+
+    def link_stage(self, previous: "RunManifest", stage: str, stage_dir_name: str) -> dict:
+        """
+        Links the stage directory of previous into this run and returns the
+        previous artifact with its paths moved into this run
+        """
+        try:
+            source = os.path.realpath(os.path.join(previous.artifact_dir, stage_dir_name))
+            target = os.path.join(self.artifact_dir, stage_dir_name)
+            if os.path.lexists(target):
+                if os.path.islink(target) or not os.path.isdir(target):
+                    os.remove(target)
+                else:
+                    shutil.rmtree(target)
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            try:
+                os.symlink(source, target, target_is_directory=True)
+            except OSError:
+                ## no symlink support (e.g. windows without privileges)
+                shutil.copytree(source, target)
+            return _rebase(
+                previous.stage(stage)["artifact"],
+                os.path.normpath(previous.artifact_dir),
+                os.path.normpath(self.artifact_dir),
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, is_dataclass
+from typing import Dict, List, Optional
+
+from networksecurity.constant.training_pipeline import (
+    EXECUTOR_PROCESS_START_METHOD,
+    TRAINING_JOB_HISTORY_SIZE,
+    TRAINING_JOB_NICENESS,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.pipeline.training_pipeline import run_training_pipeline
+
+
+@dataclass
+class TrainingStageStatus:
+    status: str
+    started_at: float
+    finished_at: Optional[float] = None
+    elapsed_seconds: Optional[float] = None
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "pending"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    current_stage: Optional[str] = None
+    stages: Dict[str, TrainingStageStatus] = field(default_factory=dict)
+    error: Optional[str] = None
+    result: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _training_job_process(event_queue, resume: bool = False):
+    """
+    Entry point of the training process; reports progress through event_queue
+    """
+    try:
+        if TRAINING_JOB_NICENESS and hasattr(os, "nice"):
+            os.nice(TRAINING_JOB_NICENESS)
+
+        def stage_callback(stage, status, timestamp):
+            event_queue.put(("stage", stage, status, timestamp))
+
+        artifact = run_training_pipeline(stage_callback=stage_callback, resume=resume)
+        result = asdict(artifact) if is_dataclass(artifact) else {"artifact": str(artifact)}
+        event_queue.put(("succeeded", result, time.time()))
+    except BaseException as e:
+        event_queue.put(("failed", str(e), time.time()))
+
+
+class TrainingJobManager:
+    """
+    Runs TrainingPipeline in a separate process, one job at a time, and keeps
+    the status of the last TRAINING_JOB_HISTORY_SIZE jobs for the api.
+    """
+
+    def __init__(
+        self,
+        history_size: int = TRAINING_JOB_HISTORY_SIZE,
+        start_method: str = EXECUTOR_PROCESS_START_METHOD,
+    ):
+        try:
+            self.history_size = history_size
+            self._context = multiprocessing.get_context(start_method)
+            self._jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+            self._active_job: TrainingJob = None
+            self._active_process = None
+            self._cancel_requested = False
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def active_job(self) -> Optional[TrainingJob]:
+        with self._lock:
+            return self._active_job
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[TrainingJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def submit(self, resume: bool = False) -> TrainingJob:
+        """
+        Starts a training job; with resume it continues the last unfinished run
+        """
+        try:
+            with self._lock:
+                if self._active_job is not None:
+                    raise Exception(
+                        f"Training job {self._active_job.job_id} is already running"
+                    )
+                job = TrainingJob(job_id=uuid.uuid4().hex)
+                event_queue = self._context.Queue()
+                process = self._context.Process(
+                    target=_training_job_process,
+                    args=(event_queue, resume),
+                    name=f"training-job-{job.job_id}",
+                    daemon=False,
+                )
+                process.start()
+                job.status = "running"
+                job.started_at = time.time()
+                self._active_job = job
+                self._active_process = process
+                self._cancel_requested = False
+                self._jobs[job.job_id] = job
+                while len(self._jobs) > self.history_size:
+                    self._jobs.popitem(last=False)
+
+            threading.Thread(
+                target=self._monitor,
+                args=(job, process, event_queue),
+                name=f"training-job-monitor-{job.job_id}",
+                daemon=True,
+            ).start()
+            logging.info(f"Started training job {job.job_id} pid {process.pid}")
+            return job
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def cancel(self, job_id: str) -> Optional[TrainingJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job is not self._active_job:
+                return job
+            self._cancel_requested = True
+            self._active_process.terminate()
+            logging.info(f"Cancellation requested for training job {job_id}")
+            return job
+
+    def _apply_event(self, job: TrainingJob, event: tuple):
+        kind = event[0]
+        with self._lock:
+            if kind == "stage":
+                _, stage, status, timestamp = event
+                if status == "running":
+                    job.current_stage = stage
+                    job.stages[stage] = TrainingStageStatus(
+                        status=status, started_at=timestamp
+                    )
+                else:
+                    stage_status = job.stages[stage]
+                    stage_status.status = status
+                    stage_status.finished_at = timestamp
+                    stage_status.elapsed_seconds = timestamp - stage_status.started_at
+            elif kind == "succeeded":
+                job.status, job.result, job.finished_at = event
+                job.current_stage = None
+            elif kind == "failed":
+                job.status, job.error, job.finished_at = event
+
+    def _monitor(self, job: TrainingJob, process, event_queue):
+        while True:
+            try:
+                self._apply_event(job, event_queue.get(timeout=0.5))
+                continue
+            except queue.Empty:
+                pass
+            if not process.is_alive():
+                ## drain whatever the process wrote before exiting
+                while True:
+                    try:
+                        self._apply_event(job, event_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                break
+
+        process.join()
+        with self._lock:
+            if self._cancel_requested and job.status == "running":
+                job.status = "cancelled"
+            elif job.status == "running":
+                job.status = "failed"
+                job.error = f"Training process exited with code {process.exitcode}"
+            if job.finished_at is None:
+                job.finished_at = time.time()
+            if job.current_stage is not None:
+                stage_status = job.stages[job.current_stage]
+                if stage_status.status == "running":
+                    stage_status.status = job.status
+                    stage_status.finished_at = job.finished_at
+                    stage_status.elapsed_seconds = (
+                        job.finished_at - stage_status.started_at
+                    )
+            self._active_job = None
+            self._active_process = None
+        logging.info(f"Training job {job.job_id} finished with status {job.status}")
@@ -1,4 +1,8 @@
+import os
 import sys
+import time
+from datetime import datetime
+from typing import Callable
 
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
@@ -23,14 +27,137 @@ from networksecurity.entity.artifact_entity import (
     ModelTrainerArtifact,
 )
 
-from networksecurity.constant.training_pipeline import TRAINING_BUCKET_NAME
-from networksecurity.cloud.s3_syncer import S3Sync
+from networksecurity.constant.training_pipeline import (
+    DATA_INGESTION_DIR_NAME,
+    DATA_TRANSFORMATION_DIR_NAME,
+    DATA_VALIDATION_DIR_NAME,
+    MODEL_TRAINER_DIR_NAME,
+    PIPELINE_STAGE_CACHE_ENABLED,
+    REFERENCE_PROFILE_FILE_NAME,
+    SCHEMA_FILE_PATH,
+    TRACING_FILE_NAME,
+    TRAINING_BUCKET_NAME,
+)
+from networksecurity.cloud.s3_syncer import S3Sync, SyncResult
+from networksecurity.utils.main_utils.experiment_tracker import ExperimentTracker
+from networksecurity.utils.main_utils.tracing import Tracer, current_span, set_tracer, span
+from networksecurity.utils.main_utils.utils import load_object
+from networksecurity.utils.ml_utils.model.registry import publish_model
+from networksecurity.pipeline.run_manifest import RunManifest, artifact_from_dict
 
 
 class TrainingPipeline:
-    def __init__(self):
+    ## stages whose artifact can be reused: stage directory and artifact class
+    CACHEABLE_STAGES = {
+        "data_ingestion": (DATA_INGESTION_DIR_NAME, DataIngestionArtifact),
+        "data_validation": (DATA_VALIDATION_DIR_NAME, DataValidationArtifact),
+        "data_transformation": (DATA_TRANSFORMATION_DIR_NAME, DataTransformationArtifact),
+        "model_trainer": (MODEL_TRAINER_DIR_NAME, ModelTrainerArtifact),
+    }
+
+    def __init__(
+        self,
+        stage_callback: Callable[[str, str, float], None] = None,
+        stage_cache: bool = PIPELINE_STAGE_CACHE_ENABLED,
+    ):
         self.training_pipeline_config = TrainingPipelineConfig()
         self.s3_sync = S3Sync()
+        self.experiment_tracker = None
+        self.tracer: Tracer = None
+        ## called with (stage, status, timestamp) as each stage starts and ends
+        self.stage_callback = stage_callback
+        self.stage_cache = stage_cache
+        self.manifest: RunManifest = None
+
+    def _notify(self, stage: str, status: str):
+        if self.stage_callback is not None:
+            self.stage_callback(stage, status, time.time())
+
+    def _stage_fingerprint(self, stage: str, input_artifact) -> str:
+        if stage == "data_ingestion":
+            config = DataIngestionConfig(training_pipeline_config=self.training_pipeline_config)
+            return self.manifest.stage_fingerprint(
+                stage, config, extra=DataIngestion(config).source_fingerprint()
+            )
+        if stage == "data_validation":
+            config = DataValidationConfig(training_pipeline_config=self.training_pipeline_config)
+            return self.manifest.stage_fingerprint(
+                stage, config, input_artifact, extra_files=[SCHEMA_FILE_PATH]
+            )
+        ## estimators and grids are built in code, their parameters are hashed too
+        if stage == "data_transformation":
+            config = DataTransformationConfig(
+                training_pipeline_config=self.training_pipeline_config
+            )
+            extra = DataTransformation(input_artifact, config).transformer_identity()
+        else:
+            config = ModelTrainerConfig(training_pipeline_config=self.training_pipeline_config)
+            extra = ModelTrainer(config, input_artifact).candidates_identity()
+        return self.manifest.stage_fingerprint(stage, config, input_artifact, extra=extra)
+
+    def _reuse_stage(self, stage: str, input_artifact):
+        """
+        Artifact of stage when it does not have to run: it already succeeded
+        in this (resumed) run, or an earlier run ran it on the same inputs
+        and config, in which case its directory is linked into this run.
+        Returns (artifact, fingerprint)
+        """
+        stage_dir_name, artifact_class = self.CACHEABLE_STAGES[stage]
+        artifact = self.manifest.succeeded_artifact(stage, artifact_class)
+        if artifact is not None:
+            logging.info(f"Stage {stage} already succeeded in this run")
+            return artifact, None
+
+        fingerprint = self._stage_fingerprint(stage, input_artifact)
+        previous = (
+            self.manifest.find_previous_stage(stage, fingerprint) if self.stage_cache else None
+        )
+        if previous is None:
+            return None, fingerprint
+        artifact = artifact_from_dict(
+            artifact_class, self.manifest.link_stage(previous, stage, stage_dir_name)
+        )
+        self.manifest.start_stage(stage, fingerprint)
+        self.manifest.finish_stage(stage, artifact, reused_from=previous.artifact_dir)
+        logging.info(f"Stage {stage} inputs unchanged, linked from {previous.artifact_dir}")
+        return artifact, fingerprint
+
+    def _run_stage(self, stage: str, fn: Callable, **kwargs):
+        self._notify(stage, "running")
+        try:
+            with span(stage) as stage_span:
+                fingerprint = None
+                if stage in self.CACHEABLE_STAGES:
+                    input_artifact = next(iter(kwargs.values()), None)
+                    artifact, fingerprint = self._reuse_stage(stage, input_artifact)
+                    if artifact is not None:
+                        stage_span.add(skipped=True)
+                        self._notify(stage, "skipped")
+                        return artifact
+                self.manifest.start_stage(stage, fingerprint)
+                result = fn(**kwargs)
+        except Exception as e:
+            self.manifest.finish_stage(stage, status="failed", error=str(e))
+            self._notify(stage, "failed")
+            raise
+        self.manifest.finish_stage(stage, result)
+        self._notify(stage, "succeeded")
+        return result
+
+    def _resume_latest_run(self):
+        """
+        Continue in the artifact directory of the newest run if it did not
+        succeed, so its finished stages are kept
+        """
+        runs = RunManifest.runs(self.training_pipeline_config.artifact_name)
+        if not runs or runs[0].status == "succeeded":
+            logging.info("No unfinished run to resume, starting a new run")
+            return
+        timestamp = os.path.basename(os.path.normpath(runs[0].artifact_dir))
+        self.training_pipeline_config = TrainingPipelineConfig(
+            timestamp=datetime.strptime(timestamp, TrainingPipelineConfig.TIMESTAMP_FORMAT)
+        )
+        logging.info(f"Resuming run {timestamp}")
 
     def start_data_ingestion(self):
         try:
@@ -95,6 +222,7 @@ class TrainingPipeline:
             model_trainer = ModelTrainer(
                 data_transformation_artifact=data_transformation_artifact,
                 model_trainer_config=self.model_trainer_config,
+                experiment_tracker=self.experiment_tracker,
             )
 
             model_trainer_artifact = model_trainer.initiate_model_trainer()
@@ -104,44 +232,158 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    ## local artifact is going to s3 bucket
-    def sync_artifact_dir_to_s3(self):
+    def start_model_pusher(
+        self,
+        data_validation_artifact: DataValidationArtifact,
+        model_trainer_artifact: ModelTrainerArtifact,
+    ) -> str:
+        """
+        Publish the trained (or linked) model with the reference profile of
+        its training data as this run's version, in one atomic step
+        """
         try:
-            aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/artifact/{self.training_pipeline_config.timestamp}"
-            self.s3_sync.sync_folder_to_s3(
-                folder=self.training_pipeline_config.artifact_dir,
-                aws_bucket_url=aws_bucket_url,
+            network_model = load_object(model_trainer_artifact.trained_model_file_path)
+            return publish_model(
+                network_model,
+                version=self.training_pipeline_config.timestamp,
+                model_dir=self.training_pipeline_config.model_dir,
+                extra_files={
+                    REFERENCE_PROFILE_FILE_NAME: data_validation_artifact.reference_profile_file_path
+                },
             )
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
+    def _artifact_dir_sync(self) -> tuple:
+        aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/artifact/{self.training_pipeline_config.timestamp}"
+        return self.training_pipeline_config.artifact_dir, aws_bucket_url
+
+    def _saved_model_dir_sync(self) -> tuple:
+        ## only the version this run published
+        aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/final_model/{self.training_pipeline_config.timestamp}"
+        return (
+            os.path.join(
+                self.training_pipeline_config.model_dir,
+                self.training_pipeline_config.timestamp,
+            ),
+            aws_bucket_url,
+        )
+
+    ## local artifact is going to s3 bucket
+    def sync_artifact_dir_to_s3(self) -> SyncResult:
+        try:
+            return self.s3_sync.sync_folder_to_s3(*self._artifact_dir_sync())
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     ## local final model is going to s3 bucket
-    def sync_saved_model_dir_to_s3(self):
+    def sync_saved_model_dir_to_s3(self) -> SyncResult:
+        try:
+            return self.s3_sync.sync_folder_to_s3(*self._saved_model_dir_sync())
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def sync_dirs_to_s3(self):
+        """
+        Artifact and final model directories uploaded concurrently; fails
+        when any file could not be uploaded, a resumed run only uploads
+        what is still missing
+        """
         try:
-            aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/final_model/{self.training_pipeline_config.timestamp}"
-            self.s3_sync.sync_folder_to_s3(
-                folder=self.training_pipeline_config.model_dir,
-                aws_bucket_url=aws_bucket_url,
+            results = self.s3_sync.sync_folders_to_s3(
+                [self._artifact_dir_sync(), self._saved_model_dir_sync()]
+            )
+            current_span().add(
+                bytes_uploaded=sum(result.bytes_transferred for result in results),
+                files_uploaded=sum(len(result.transferred) for result in results),
             )
+            failed = {
+                result.destination: result.failed for result in results if not result.ok
+            }
+            if failed:
+                raise Exception(f"S3 sync failed for {failed}")
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def run_pipeline(self):
+    def run_pipeline(self, resume: bool = False):
+        """
+        Runs every stage, skipping the ones whose inputs and config match a
+        succeeded stage of an earlier run. With resume, an unfinished last
+        run is continued after its last successful stage.
+        """
+        self.tracer = Tracer()
+        previous_tracer = set_tracer(self.tracer)
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(
-                data_ingestion_artifact=data_ingestion_artifact
+            if resume:
+                self._resume_latest_run()
+            self.manifest = RunManifest(self.training_pipeline_config.artifact_dir)
+            self.experiment_tracker = ExperimentTracker()
+
+            data_ingestion_artifact = self._run_stage(
+                "data_ingestion", self.start_data_ingestion
+            )
+            data_validation_artifact = self._run_stage(
+                "data_validation",
+                self.start_data_validation,
+                data_ingestion_artifact=data_ingestion_artifact,
             )
-            data_transformation_artifact = self.start_data_transformation(
-                data_validation_artifact=data_validation_artifact
+            data_transformation_artifact = self._run_stage(
+                "data_transformation",
+                self.start_data_transformation,
+                data_validation_artifact=data_validation_artifact,
             )
-            model_trainer_artifact = self.start_model_trainer(
-                data_transformation_artifact=data_transformation_artifact
+            model_trainer_artifact = self._run_stage(
+                "model_trainer",
+                self.start_model_trainer,
+                data_transformation_artifact=data_transformation_artifact,
+            )
+            ## runs for a linked trainer stage too, serving gets this run's model
+            self._run_stage(
+                "model_pusher",
+                self.start_model_pusher,
+                data_validation_artifact=data_validation_artifact,
+                model_trainer_artifact=model_trainer_artifact,
             )
 
-            self.sync_artifact_dir_to_s3()
-            self.sync_saved_model_dir_to_s3()
+            self._run_stage("sync_dirs_to_s3", self.sync_dirs_to_s3)
 
+            self.manifest.set_status("succeeded")
             return model_trainer_artifact
         except Exception as e:
+            if self.manifest is not None:
+                self.manifest.set_status("failed")
             raise NetworkSecurityException(e, sys)
+        finally:
+            ## every queued metric and model is sent before the run returns
+            if self.experiment_tracker is not None:
+                self.experiment_tracker.close()
+                self.experiment_tracker = None
+            set_tracer(previous_tracer)
+            self.save_trace()
+
+    def save_trace(self):
+        """
+        Writes the spans of the run to artifact_dir/trace.json and logs them
+        as a flame style summary
+        """
+        try:
+            if not self.tracer.enabled:
+                return
+            trace_file_path = os.path.join(
+                self.training_pipeline_config.artifact_dir, TRACING_FILE_NAME
+            )
+            self.tracer.save(trace_file_path)
+            logging.info(f"Run trace saved to {trace_file_path}\n{self.tracer.summary()}")
+        except Exception as e:
+            ## a missing trace must not fail the run
+            logging.error(f"Saving the run trace failed: {NetworkSecurityException(e, sys)}")
+
+
+def run_training_pipeline(
+    stage_callback: Callable[[str, str, float], None] = None,
+    resume: bool = False,
+) -> ModelTrainerArtifact:
+    """
+    Module level entry point so the pipeline can be submitted to a process pool
+    """
+    return TrainingPipeline(stage_callback=stage_callback).run_pipeline(resume=resume)
@@ -0,0 +1,273 @@
+import os
+import shutil
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, List, Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+from networksecurity.constant.training_pipeline import ARTIFACT_STORE_FORMAT
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.utils import (
+    load_numpy_array_data,
+    read_yaml_file,
+    write_yaml_file,
+)
+
+Columns = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+
+def to_column_arrays(data: Columns) -> Dict[str, np.ndarray]:
+    """
+    Column name to 1d array, without copying. Accepts a DataFrame or a
+    mapping such as ColumnarArtifactStore.read_columns
+    """
+    if isinstance(data, pd.DataFrame):
+        return {column: data[column].to_numpy() for column in data.columns}
+    return {column: np.asarray(values) for column, values in data.items()}
+
+
+class ArtifactStore(ABC):
+    """
+    Storage format of the tabular pipeline artifacts (feature store and
+    ingestion partitions). Stages only go through this interface, so the
+    format is chosen in one place with ARTIFACT_STORE_FORMAT.
+    """
+
+    extension: str = ""
+
+    def path_for(self, file_path: str) -> str:
+        return os.path.splitext(file_path)[0] + self.extension
+
+    @staticmethod
+    def remove(path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write_frame(self, path: str, dataframe: pd.DataFrame):
+        self.remove(path)
+        self.append_frame(path, dataframe)
+
+    @abstractmethod
+    def append_frame(self, path: str, dataframe: pd.DataFrame):
+        """
+        Appends the rows of dataframe, creating the artifact at path if needed
+        """
+
+    @abstractmethod
+    def read_frame(
+        self, path: str, rows: np.ndarray = None, columns: List[str] = None
+    ) -> pd.DataFrame:
+        """
+        The artifact at path, only the given rows and columns when passed
+        """
+
+    @abstractmethod
+    def columns(self, path: str) -> List[str]:
+        """
+        Column names of the artifact at path
+        """
+
+    @abstractmethod
+    def num_rows(self, path: str) -> int:
+        """
+        Number of rows of the artifact at path
+        """
+
+    @abstractmethod
+    def concat(self, paths: List[str], out_path: str):
+        """
+        Writes the rows of paths, in order, as one artifact at out_path
+        """
+
+
+class CsvArtifactStore(ArtifactStore):
+    """
+    Plain csv, kept for interoperability with the original artifacts
+    """
+
+    extension = ".csv"
+
+    def append_frame(self, path: str, dataframe: pd.DataFrame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = not os.path.exists(path) or os.path.getsize(path) == 0
+        dataframe.to_csv(path, mode="a", header=header, index=False)
+
+    def read_frame(
+        self, path: str, rows: np.ndarray = None, columns: List[str] = None
+    ) -> pd.DataFrame:
+        dataframe = pd.read_csv(path, usecols=columns)
+        if rows is not None:
+            dataframe = dataframe.iloc[rows].reset_index(drop=True)
+        return dataframe
+
+    def columns(self, path: str) -> List[str]:
+        return pd.read_csv(path, nrows=0).columns.to_list()
+
+    def num_rows(self, path: str) -> int:
+        with open(path, "rb") as file_obj:
+            lines = sum(block.count(b"\n") for block in iter(lambda: file_obj.read(1 << 20), b""))
+        return max(lines - 1, 0)
+
+    def concat(self, paths: List[str], out_path: str):
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "w", newline="") as out_file:
+            for i, path in enumerate(paths):
+                with open(path, "r", newline="") as in_file:
+                    header = in_file.readline()
+                    if i == 0:
+                        out_file.write(header)
+                    shutil.copyfileobj(in_file, out_file)
+
+
+class ColumnarArtifactStore(ArtifactStore):
+    """
+    A directory with one raw, typed binary file per column and a
+    _schema.yaml holding column names, dtypes and the row count.
+
+    Columns are opened with np.memmap, so reading involves no parsing and
+    only the rows that are actually indexed get copied into memory. Appends
+    write raw bytes; a column is rewritten only when its dtype has to be
+    promoted (e.g. int64 to float64 the first time a NaN shows up).
+    """
+
+    extension = ".columns"
+    SCHEMA_FILE_NAME = "_schema.yaml"
+
+    def _schema_path(self, path: str) -> str:
+        return os.path.join(path, self.SCHEMA_FILE_NAME)
+
+    def _read_schema(self, path: str, missing_ok: bool = False) -> dict:
+        if not os.path.exists(self._schema_path(path)):
+            if not missing_ok:
+                raise FileNotFoundError(f"No columnar artifact at {path}")
+            return {"num_rows": 0, "columns": []}
+        return read_yaml_file(self._schema_path(path))
+
+    def _write_schema(self, path: str, schema: dict):
+        ## the schema is written last and atomically, it commits the append
+        tmp_path = self._schema_path(path) + ".tmp"
+        write_yaml_file(tmp_path, schema)
+        os.replace(tmp_path, self._schema_path(path))
+
+    @staticmethod
+    def _column_file(path: str, position: int) -> str:
+        return os.path.join(path, f"{position:05d}.bin")
+
+    def append_columns(self, path: str, columns: Dict[str, np.ndarray]):
+        os.makedirs(path, exist_ok=True)
+        schema = self._read_schema(path, missing_ok=True)
+        if not schema["columns"]:
+            schema["columns"] = [
+                {"name": name, "dtype": np.asarray(values).dtype.str}
+                for name, values in columns.items()
+            ]
+        names = [column["name"] for column in schema["columns"]]
+        if list(columns) != names:
+            raise ValueError(f"Columns {list(columns)} do not match store {names}")
+
+        n_rows = None
+        for position, column in enumerate(schema["columns"]):
+            values = np.asarray(columns[column["name"]])
+            if values.dtype == object:
+                raise ValueError(f"Column {column['name']} is not numeric")
+            n_rows = len(values) if n_rows is None else n_rows
+            column_file = self._column_file(path, position)
+            dtype = np.dtype(column["dtype"])
+            promoted = np.result_type(dtype, values.dtype)
+            if promoted != dtype:
+                if os.path.exists(column_file):
+                    np.fromfile(column_file, dtype=dtype).astype(promoted).tofile(
+                        column_file
+                    )
+                column["dtype"] = promoted.str
+                dtype = promoted
+            with open(column_file, "ab") as file_obj:
+                np.ascontiguousarray(values, dtype=dtype).tofile(file_obj)
+        schema["num_rows"] += n_rows or 0
+        self._write_schema(path, schema)
+
+    def append_frame(self, path: str, dataframe: pd.DataFrame):
+        self.append_columns(
+            path, {column: dataframe[column].to_numpy() for column in dataframe.columns}
+        )
+
+    def read_columns(self, path: str, columns: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Memory mapped, read only view of every column
+        """
+        schema = self._read_schema(path)
+        arrays = {}
+        for position, column in enumerate(schema["columns"]):
+            if columns is not None and column["name"] not in columns:
+                continue
+            dtype = np.dtype(column["dtype"])
+            if schema["num_rows"] == 0:
+                arrays[column["name"]] = np.empty(0, dtype=dtype)
+            else:
+                arrays[column["name"]] = np.memmap(
+                    self._column_file(path, position),
+                    dtype=dtype,
+                    mode="r",
+                    shape=(schema["num_rows"],),
+                )
+        return arrays
+
+    def read_frame(
+        self, path: str, rows: np.ndarray = None, columns: List[str] = None
+    ) -> pd.DataFrame:
+        arrays = self.read_columns(path, columns)
+        if rows is not None:
+            arrays = {name: values[rows] for name, values in arrays.items()}
+        else:
+            arrays = {name: np.array(values) for name, values in arrays.items()}
+        return pd.DataFrame(arrays, columns=list(arrays))
+
+    def columns(self, path: str) -> List[str]:
+        return [column["name"] for column in self._read_schema(path)["columns"]]
+
+    def num_rows(self, path: str) -> int:
+        return self._read_schema(path)["num_rows"]
+
+    def concat(self, paths: List[str], out_path: str):
+        self.remove(out_path)
+        for path in paths:
+            self.append_columns(out_path, self.read_columns(path))
+
+
+ARTIFACT_STORES = {
+    "csv": CsvArtifactStore,
+    "columnar": ColumnarArtifactStore,
+}
+
+
+def get_artifact_store(store_format: str = ARTIFACT_STORE_FORMAT) -> ArtifactStore:
+    try:
+        return ARTIFACT_STORES[store_format]()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_artifact_store_for(file_path: str) -> ArtifactStore:
+    """
+    Store that wrote file_path, falling back to ARTIFACT_STORE_FORMAT
+    """
+    for store_class in ARTIFACT_STORES.values():
+        if file_path.endswith(store_class.extension):
+            return store_class()
+    return get_artifact_store()
+
+
+def read_split(feature_store_file_path: str, index_file_path: str) -> pd.DataFrame:
+    """
+    Rows of the feature store selected by a train/test/valid index array
+    """
+    try:
+        store = get_artifact_store_for(feature_store_file_path.rstrip(os.sep))
+        rows = load_numpy_array_data(index_file_path)
+        return store.read_frame(feature_store_file_path, rows=rows)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator
+
+from networksecurity.constant.training_pipeline import EXECUTOR_THREAD_WORKERS
+from networksecurity.exception.exception import NetworkSecurityException
+
+_EXHAUSTED = object()
+
+
+class PoolMetrics:
+    """
+    Counters for one pool, updated from future done callbacks.
+    in flight work beyond max_workers is reported as queued.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def on_done(self, future: Future, started_at: float):
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.latency_seconds += time.perf_counter() - started_at
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            in_flight = self.submitted - self.completed - self.failed
+            running = min(in_flight, self.max_workers)
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "running": running,
+                "queue_depth": in_flight - running,
+                "saturation": running / self.max_workers,
+                "latency_seconds": self.latency_seconds,
+            }
+
+
+class InferenceExecutor:
+    """
+    Offloads blocking work from the event loop.
+
+    run_in_thread is for pandas/numpy/sklearn calls that release the GIL.
+    The pool is created lazily so importing the app stays cheap; training
+    runs in its own process through TrainingJobManager.
+    """
+
+    def __init__(self, thread_workers: int = EXECUTOR_THREAD_WORKERS):
+        try:
+            self.thread_workers = thread_workers
+            self.thread_metrics = PoolMetrics(thread_workers)
+            self._thread_pool: ThreadPoolExecutor = None
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_workers, thread_name_prefix="inference"
+                )
+            return self._thread_pool
+
+    @staticmethod
+    async def _submit(pool: Executor, metrics: PoolMetrics, fn: Callable, *args):
+        metrics.on_submit()
+        started_at = time.perf_counter()
+        future = pool.submit(fn, *args)
+        future.add_done_callback(
+            functools.partial(metrics.on_done, started_at=started_at)
+        )
+        return await asyncio.wrap_future(future)
+
+    async def run_in_thread(self, fn: Callable, *args, **kwargs):
+        return await self._submit(
+            self.thread_pool, self.thread_metrics, functools.partial(fn, **kwargs), *args
+        )
+
+    async def iterate_in_thread(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Drive a blocking iterator from the thread pool, one item per hop
+        """
+        while True:
+            item = await self.run_in_thread(next, iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                break
+            yield item
+
+    def metrics(self) -> dict:
+        return {"thread_pool": self.thread_metrics.snapshot()}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=wait)
+                self._thread_pool = None
@@ -0,0 +1,251 @@
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from networksecurity.constant.training_pipeline import (
+    EXPERIMENT_TRACKING_BATCH_SIZE,
+    EXPERIMENT_TRACKING_EXPERIMENT_NAME,
+    EXPERIMENT_TRACKING_FLUSH_INTERVAL,
+    EXPERIMENT_TRACKING_REGISTERED_MODEL_NAME,
+    EXPERIMENT_TRACKING_URI,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+## log_batch limits of the mlflow tracking api
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+MAX_PARAM_VALUE_LENGTH = 6000
+
+_BATCHED = ("metrics", "params", "tags")
+
+
+class ExperimentTracker:
+    """
+    Non blocking mlflow tracking.
+
+    Every call only puts an operation on a queue and returns; a daemon
+    worker wakes up every flush_interval seconds (or on flush) and sends
+    the queued metrics, params and tags of a run with one log_batch call,
+    and model artifacts, run creation and termination in queue order. It
+    talks to the tracking server through MlflowClient with explicit run
+    ids, so no global active run is involved. Tracking failures are logged
+    and counted in errors, they never reach training.
+
+    The tracking uri is MLFLOW_TRACKING_URI when set, else a local store.
+    flush() blocks until everything queued before it has been sent, close()
+    flushes and stops the worker.
+    """
+
+    def __init__(
+        self,
+        tracking_uri: str = None,
+        experiment_name: str = EXPERIMENT_TRACKING_EXPERIMENT_NAME,
+        batch_size: int = EXPERIMENT_TRACKING_BATCH_SIZE,
+        flush_interval: float = EXPERIMENT_TRACKING_FLUSH_INTERVAL,
+        registered_model_name: str = EXPERIMENT_TRACKING_REGISTERED_MODEL_NAME,
+    ):
+        self.tracking_uri = tracking_uri or os.getenv(
+            "MLFLOW_TRACKING_URI", EXPERIMENT_TRACKING_URI
+        )
+        self.experiment_name = experiment_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.registered_model_name = registered_model_name
+        self.errors = 0
+        self._client = None
+        self._experiment_id = None
+        self._run_ids: Dict[str, str] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._work, name="experiment-tracker", daemon=True
+        )
+        self._worker.start()
+
+    def _put(self, kind: str, run: str = None, payload=None):
+        if self._closed:
+            raise RuntimeError("ExperimentTracker is closed")
+        self._queue.put((kind, run, payload))
+
+    def start_run(self, run_name: str = None, tags: dict = None) -> str:
+        """
+        Returns a run handle for the other calls; the mlflow run is created
+        by the worker
+        """
+        run = uuid.uuid4().hex
+        self._put("start_run", run, {"run_name": run_name, "tags": tags or {}})
+        return run
+
+    def log_metrics(self, run: str, metrics: dict, step: int = 0):
+        timestamp = int(time.time() * 1000)
+        self._put(
+            "metrics",
+            run,
+            [(key, float(value), timestamp, step) for key, value in metrics.items()],
+        )
+
+    def log_params(self, run: str, params: dict):
+        self._put(
+            "params",
+            run,
+            [(key, str(value)[:MAX_PARAM_VALUE_LENGTH]) for key, value in params.items()],
+        )
+
+    def set_tags(self, run: str, tags: dict):
+        self._put("tags", run, [(key, str(value)) for key, value in tags.items()])
+
+    def log_model(self, run: str, model, artifact_path: str = "model"):
+        """
+        Saves the sklearn model into the run artifacts in the background, so
+        model must not be modified afterwards
+        """
+        self._put("model", run, {"model": model, "artifact_path": artifact_path})
+
+    def end_run(self, run: str, status: str = "FINISHED"):
+        self._put("end_run", run, status)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Blocks until every operation queued before the call is sent; False
+        if timeout expired first
+        """
+        done = threading.Event()
+        self._put("flush", payload=done)
+        self._wake.set()
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None):
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(("stop", None, None))
+        self._wake.set()
+        self._worker.join(timeout)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+            experiment = self._client.get_experiment_by_name(self.experiment_name)
+            self._experiment_id = (
+                experiment.experiment_id
+                if experiment is not None
+                else self._client.create_experiment(self.experiment_name)
+            )
+        return self._client
+
+    def _work(self):
+        while True:
+            operations = [self._queue.get()]
+            ## let more operations pile up unless a flush or close is waiting
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while len(operations) < self.batch_size:
+                try:
+                    operations.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._process(operations)
+            for _ in operations:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _process(self, operations: List[tuple]) -> bool:
+        pending = defaultdict(lambda: {kind: [] for kind in _BATCHED})
+        stop = False
+        for kind, run, payload in operations:
+            if kind in _BATCHED:
+                pending[run][kind].extend(payload)
+                continue
+            ## keep the queue order: batched values go out before anything else
+            self._send_batches(pending)
+            pending.clear()
+            if kind == "flush":
+                payload.set()
+            elif kind == "stop":
+                stop = True
+            else:
+                self._guarded(self._apply, kind, run, payload)
+        self._send_batches(pending)
+        return stop
+
+    def _guarded(self, function, *args):
+        try:
+            function(*args)
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Experiment tracking failed: {NetworkSecurityException(e, sys)}")
+
+    def _apply(self, kind: str, run: str, payload):
+        if kind == "start_run":
+            tags = {"mlflow.runName": payload["run_name"]} if payload["run_name"] else {}
+            tags.update(payload["tags"])
+            self._run_ids[run] = self.client.create_run(
+                self._experiment_id, tags={key: str(value) for key, value in tags.items()}
+            ).info.run_id
+            return
+        run_id = self._run_ids[run]
+        if kind == "model":
+            self._log_model(run_id, payload["model"], payload["artifact_path"])
+        elif kind == "end_run":
+            self.client.set_terminated(run_id, status=payload)
+            del self._run_ids[run]
+
+    def _log_model(self, run_id: str, model, artifact_path: str):
+        import mlflow.sklearn
+        from skops.io import dumps, get_untrusted_types
+
+        local_dir = tempfile.mkdtemp(prefix="tracked_model_")
+        try:
+            model_path = os.path.join(local_dir, "model")
+            ## skops refuses types like sklearn's Tree unless they are trusted,
+            ## the model was built in this process so its own types are
+            mlflow.sklearn.save_model(
+                model, model_path, skops_trusted_types=get_untrusted_types(data=dumps(model))
+            )
+            self.client.log_artifacts(run_id, model_path, artifact_path)
+        finally:
+            shutil.rmtree(local_dir, ignore_errors=True)
+        ## the model registry needs a database backed tracking server
+        if self.registered_model_name and not self.tracking_uri.startswith("file:"):
+            import mlflow
+
+            mlflow.set_tracking_uri(self.tracking_uri)
+            mlflow.register_model(f"runs:/{run_id}/{artifact_path}", self.registered_model_name)
+
+    def _send_batches(self, pending: dict):
+        from mlflow.entities import Metric, Param, RunTag
+
+        for run, batch in pending.items():
+            if run not in self._run_ids:
+                self.errors += 1
+                logging.error(f"Experiment tracking dropped values of unknown run {run}")
+                continue
+            metrics = [Metric(*values) for values in batch["metrics"]]
+            params = [Param(*values) for values in batch["params"]]
+            tags = [RunTag(*values) for values in batch["tags"]]
+            while metrics or params or tags:
+                self._guarded(
+                    self.client.log_batch,
+                    self._run_ids[run],
+                    metrics[:MAX_METRICS_PER_BATCH],
+                    params[:MAX_PARAMS_PER_BATCH],
+                    tags[:MAX_TAGS_PER_BATCH],
+                )
+                metrics = metrics[MAX_METRICS_PER_BATCH:]
+                params = params[MAX_PARAMS_PER_BATCH:]
+                tags = tags[MAX_TAGS_PER_BATCH:]
@@ -0,0 +1,223 @@
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from networksecurity.constant.training_pipeline import SCHEMA_FILE_PATH
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.artifact_store import Columns, to_column_arrays
+from networksecurity.utils.main_utils.utils import read_yaml_file
+
+## allowed integer sets spanning at most this many values are checked with a lookup table
+LOOKUP_TABLE_MAX_SPAN = 4096
+
+
+@dataclass
+class ColumnRule:
+    name: str
+    dtype: np.dtype
+    nullable: bool = True
+    low: float = None
+    high: float = None
+    allowed: np.ndarray = None
+    lookup_low: int = None
+    lookup_table: np.ndarray = None
+
+
+@dataclass
+class SchemaValidationResult:
+    valid_mask: np.ndarray
+    missing_columns: List[str] = field(default_factory=list)
+    unexpected_columns: List[str] = field(default_factory=list)
+    failures: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.valid_mask.size)
+
+    @property
+    def n_invalid(self) -> int:
+        return int(self.n_rows - np.count_nonzero(self.valid_mask))
+
+    def to_report(self) -> dict:
+        return {
+            "rows": self.n_rows,
+            "invalid_rows": self.n_invalid,
+            "missing_columns": self.missing_columns,
+            "unexpected_columns": self.unexpected_columns,
+            "failures": self.failures,
+        }
+
+
+class SchemaValidator:
+    """
+    data_schema/schema.yaml compiled into vectorized column checks.
+
+    columns gives presence and dtype, ranges min/max bounds, allowed_values
+    value sets and not_null_columns the columns that may not be missing.
+    Every check is a whole column numpy expression and the row verdict is
+    the AND of the boolean masks, so no python code runs per row. Small
+    integer value sets use a boolean lookup table instead of np.isin.
+    """
+
+    def __init__(self, schema: dict):
+        try:
+            ranges = schema.get("ranges") or {}
+            allowed_values = schema.get("allowed_values") or {}
+            not_null = set(schema.get("not_null_columns") or [])
+            self.rules: List[ColumnRule] = []
+            for entry in schema["columns"]:
+                for name, dtype in entry.items():
+                    rule = ColumnRule(
+                        name=name, dtype=np.dtype(dtype), nullable=name not in not_null
+                    )
+                    if name in ranges:
+                        rule.low = ranges[name].get("min")
+                        rule.high = ranges[name].get("max")
+                    if name in allowed_values:
+                        self._compile_allowed(rule, allowed_values[name])
+                    self.rules.append(rule)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @classmethod
+    def from_yaml(cls, file_path: str = SCHEMA_FILE_PATH) -> "SchemaValidator":
+        return cls(read_yaml_file(file_path))
+
+    @staticmethod
+    def _compile_allowed(rule: ColumnRule, values: list):
+        allowed = np.unique(np.asarray(values))
+        rule.allowed = allowed
+        if allowed.dtype.kind in "iu" and allowed[-1] - allowed[0] < LOOKUP_TABLE_MAX_SPAN:
+            rule.lookup_low = int(allowed[0])
+            rule.lookup_table = np.zeros(int(allowed[-1] - allowed[0]) + 1, dtype=bool)
+            rule.lookup_table[allowed - allowed[0]] = True
+
+    @property
+    def column_names(self) -> List[str]:
+        return [rule.name for rule in self.rules]
+
+    def check_columns(self, columns: List[str]) -> tuple:
+        """
+        (schema columns missing from columns, columns not in the schema)
+        """
+        expected = self.column_names
+        present = set(columns)
+        return (
+            [column for column in expected if column not in present],
+            [column for column in columns if column not in set(expected)],
+        )
+
+    @staticmethod
+    def _allowed_mask(rule: ColumnRule, values: np.ndarray) -> np.ndarray:
+        if rule.lookup_table is None:
+            return np.isin(values, rule.allowed)
+        high = rule.lookup_low + rule.lookup_table.size - 1
+        in_span = (values >= rule.lookup_low) & (values <= high)
+        if values.dtype.kind == "f":
+            positions = np.where(in_span, values - rule.lookup_low, 0).astype(np.intp)
+        else:
+            positions = np.subtract(values, rule.lookup_low, dtype=np.intp)
+            positions[~in_span] = 0
+        return in_span & rule.lookup_table[positions]
+
+    def _column_mask(self, rule: ColumnRule, values: np.ndarray) -> tuple:
+        failures = {}
+        invalid = np.zeros(values.shape[0], dtype=bool)
+        if values.dtype == object:
+            numeric = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(
+                dtype=np.float64
+            )
+            failed = np.isnan(numeric) & ~pd.isna(values)
+            failures["dtype"] = failed
+            values = numeric
+
+        missing = np.isnan(values) if values.dtype.kind == "f" else None
+        if missing is not None and not rule.nullable:
+            failures["null"] = missing
+        if rule.dtype.kind in "iu" and values.dtype.kind == "f":
+            ## NaN turns int columns into float, only fractional values are wrong
+            failures["dtype"] = failures.get("dtype", invalid) | (np.mod(values, 1) > 0)
+        if rule.low is not None:
+            failures["min"] = values < rule.low
+        if rule.high is not None:
+            failures["max"] = values > rule.high
+        if rule.allowed is not None:
+            failed = ~self._allowed_mask(rule, values)
+            failures["allowed"] = failed if missing is None else failed & ~missing
+
+        for failed in failures.values():
+            invalid |= failed
+        counts = {check: int(np.count_nonzero(failed)) for check, failed in failures.items()}
+        return invalid, {check: count for check, count in counts.items() if count}
+
+    def validate(self, data: Columns) -> SchemaValidationResult:
+        """
+        valid_mask has one entry per row; a row is valid when every rule
+        holds. Missing schema columns make every row invalid.
+        """
+        try:
+            arrays = to_column_arrays(data)
+            n_rows = len(next(iter(arrays.values()))) if arrays else 0
+            missing_columns, unexpected_columns = self.check_columns(list(arrays))
+            result = SchemaValidationResult(
+                valid_mask=np.full(n_rows, not missing_columns, dtype=bool),
+                missing_columns=missing_columns,
+                unexpected_columns=unexpected_columns,
+            )
+            invalid = np.zeros(n_rows, dtype=bool)
+            with np.errstate(invalid="ignore"):
+                for rule in self.rules:
+                    if rule.name not in arrays:
+                        continue
+                    column_invalid, counts = self._column_mask(rule, arrays[rule.name])
+                    if counts:
+                        invalid |= column_invalid
+                        result.failures[rule.name] = counts
+            result.valid_mask &= ~invalid
+            return result
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def benchmark_schema_validator(
+    n_rows: int = 10_000_000, invalid_share: float = 0.001, seed: int = 42
+) -> dict:
+    """
+    Rows per second of SchemaValidator.validate over the phishing schema,
+    single threaded, with invalid_share of the rows holding a bad value
+    """
+    try:
+        rng = np.random.default_rng(seed)
+        validator = SchemaValidator.from_yaml()
+        data = {
+            name: rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=n_rows)
+            for name in validator.column_names
+        }
+        data["Result"] = rng.choice(np.array([-1, 1], dtype=np.int8), size=n_rows)
+        bad_rows = rng.choice(n_rows, size=int(n_rows * invalid_share), replace=False)
+        data["URL_Length"][bad_rows] = 7
+
+        start = time.perf_counter()
+        result = validator.validate(data)
+        seconds = time.perf_counter() - start
+        if result.n_invalid != bad_rows.size:
+            raise ValueError(f"Expected {bad_rows.size} invalid rows, got {result.n_invalid}")
+        return {
+            "rows": n_rows,
+            "columns": len(data),
+            "invalid_rows": result.n_invalid,
+            "seconds": seconds,
+            "rows_per_sec": n_rows / seconds,
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    for key, value in benchmark_schema_validator(n_rows).items():
+        print(f"{key}: {value}")
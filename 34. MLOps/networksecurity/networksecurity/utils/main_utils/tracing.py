@@ -0,0 +1,292 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from networksecurity.constant.training_pipeline import TRACING_ENABLED
+from networksecurity.exception.exception import NetworkSecurityException
+
+PROC_IO_FILE = "/proc/self/io"
+
+
+def read_process_io() -> Dict[str, int]:
+    """
+    Bytes the process has read and written so far (rchar and wchar of
+    /proc/self/io, page cache hits included), empty where /proc is missing
+    """
+    try:
+        with open(PROC_IO_FILE) as file_obj:
+            counters = dict(line.split(": ") for line in file_obj.read().splitlines())
+        return {"read": int(counters["rchar"]), "write": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+class _NullSpan:
+    """
+    What span() returns while tracing is disabled: one shared object whose
+    methods do nothing
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, **counters):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    A timed region. add() accumulates numeric counters such as rows and
+    stores anything else as an attribute.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, counters: dict):
+        self.tracer = tracer
+        self.name = name
+        self.counters = {}
+        self.add(**counters)
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.counters[key] = self.counters.get(key, 0) + value
+            else:
+                self.counters[key] = value
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        self.path = f"{self.parent.path};{self.name}" if self.parent else self.name
+        stack.append(self)
+        self.io = read_process_io()
+        self.start_cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        end_cpu = time.process_time()
+        io = read_process_io()
+        self.tracer._stack().pop()
+        record = {
+            "name": self.name,
+            "path": self.path,
+            "thread": threading.current_thread().name,
+            "start": self.start - self.tracer.origin,
+            "wall_seconds": end - self.start,
+            "cpu_seconds": end_cpu - self.start_cpu,
+            "io_read_bytes": io["read"] - self.io["read"] if io and self.io else None,
+            "io_write_bytes": io["write"] - self.io["write"] if io and self.io else None,
+            "error": exc_type.__name__ if exc_type is not None else None,
+            **self.counters,
+        }
+        with self.tracer._lock:
+            self.tracer.spans.append(record)
+        return False
+
+
+class Tracer:
+    """
+    Collects nested spans of wall time, process cpu time and process I/O,
+    per thread. Disabled, span() only returns NULL_SPAN.
+
+    save() writes the spans and the same data as Chrome trace events (open
+    the file in chrome://tracing or Perfetto); summary() renders them as a
+    flame style tree.
+    """
+
+    def __init__(self, enabled: bool = TRACING_ENABLED):
+        self.enabled = enabled
+        self.spans: List[dict] = []
+        self.origin = time.perf_counter()
+        self.origin_wall = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def span(self, name: str, **counters):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, counters)
+
+    def current_span(self):
+        if not self.enabled:
+            return NULL_SPAN
+        stack = self._stack()
+        return stack[-1] if stack else NULL_SPAN
+
+    def to_dict(self) -> dict:
+        pid = os.getpid()
+        return {
+            "started_at": self.origin_wall,
+            "spans": self.spans,
+            "traceEvents": [
+                {
+                    "name": record["name"],
+                    "ph": "X",
+                    "ts": record["start"] * 1e6,
+                    "dur": record["wall_seconds"] * 1e6,
+                    "pid": pid,
+                    "tid": record["thread"],
+                    "args": {
+                        key: value
+                        for key, value in record.items()
+                        if key not in ("name", "start", "thread")
+                    },
+                }
+                for record in self.spans
+            ],
+        }
+
+    def save(self, file_path: str):
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "w") as file_obj:
+                json.dump(self.to_dict(), file_obj)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def summary(self) -> str:
+        return summarize(self.spans)
+
+
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """
+    Makes tracer the one span() and traced() record into, returns the
+    previous one
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, **counters):
+    return _tracer.span(name, **counters)
+
+
+def current_span():
+    return _tracer.current_span()
+
+
+def traced(name: str = None):
+    """
+    Decorator running the function inside a span named name or its
+    qualified name
+    """
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return function(*args, **kwargs)
+            with _tracer.span(span_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _megabytes(value) -> str:
+    return "" if value is None else f"{value / 2**20:.1f}"
+
+
+def summarize(spans: List[dict]) -> str:
+    """
+    Spans of the same path merged and printed as a tree, children under
+    their parent with their share of its wall time
+    """
+    merged: Dict[str, dict] = {}
+    for record in sorted(spans, key=lambda record: record["start"]):
+        entry = merged.setdefault(
+            record["path"],
+            defaultdict(float, calls=0, io_read_bytes=None, io_write_bytes=None),
+        )
+        entry["calls"] += 1
+        entry["wall_seconds"] += record["wall_seconds"]
+        entry["cpu_seconds"] += record["cpu_seconds"]
+        entry["rows"] += record.get("rows", 0)
+        for key in ("io_read_bytes", "io_write_bytes"):
+            if record.get(key) is not None:
+                entry[key] = (entry[key] or 0) + record[key]
+    total = sum(
+        entry["wall_seconds"] for path, entry in merged.items() if ";" not in path
+    )
+    lines = [
+        f"{'wall s':>9} {'cpu s':>9} {'%':>6} {'calls':>6} {'rows':>10} "
+        f"{'read MB':>9} {'write MB':>9}  span"
+    ]
+    for path, entry in merged.items():
+        parent = path.rpartition(";")[0]
+        parent_wall = merged[parent]["wall_seconds"] if parent in merged else total
+        share = 100 * entry["wall_seconds"] / parent_wall if parent_wall else 0.0
+        depth = path.count(";")
+        lines.append(
+            f"{entry['wall_seconds']:9.3f} {entry['cpu_seconds']:9.3f} {share:6.1f} "
+            f"{entry['calls']:6d} {int(entry['rows']) or '':>10} "
+            f"{_megabytes(entry['io_read_bytes']):>9} {_megabytes(entry['io_write_bytes']):>9}  "
+            f"{'  ' * depth}{path.rpartition(';')[2]}"
+        )
+    return "\n".join(lines)
+
+
+def load_trace(file_path: str) -> dict:
+    try:
+        with open(file_path) as file_obj:
+            return json.load(file_obj)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def benchmark_tracing_overhead(n_spans: int = 100_000) -> dict:
+    """
+    Cost of one span when tracing is disabled and when it is enabled
+    """
+    try:
+        results = {}
+        for enabled in (False, True):
+            tracer = Tracer(enabled=enabled)
+            start = time.perf_counter()
+            for _ in range(n_spans):
+                with tracer.span("benchmark") as benchmark_span:
+                    benchmark_span.add(rows=1)
+            key = "enabled" if enabled else "disabled"
+            results[f"{key}_microseconds_per_span"] = (
+                (time.perf_counter() - start) / n_spans * 1e6
+            )
+        return results
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ## python -m networksecurity.utils.main_utils.tracing Artifacts/<run>/trace.json
+        print(summarize(load_trace(sys.argv[1])["spans"]))
+    else:
+        for key, value in benchmark_tracing_overhead().items():
+            print(f"{key}: {value}")
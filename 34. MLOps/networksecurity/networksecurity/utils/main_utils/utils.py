@@ -8,7 +8,10 @@ import numpy as np
 import pickle
 
 from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
+
+from networksecurity.constant.training_pipeline import MODEL_TRAINER_SEARCH_N_JOBS
+from networksecurity.utils.ml_utils.model.model_cache import FittedModelCache
+from networksecurity.utils.ml_utils.model.search import ParallelModelSearch
 
 
 def read_yaml_file(file_path: str) -> dict:
@@ -41,7 +44,8 @@ def save_numpy_array_data(file_path: str, array: np.array):
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         with open(file_path, "wb") as file_obj:
-            np.save(file_obj, array)
+            ## c order so the file can be memory mapped without a copy
+            np.save(file_obj, np.ascontiguousarray(array))
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
 
@@ -70,32 +74,53 @@ def load_object(
         raise NetworkSecurityException(e, sys) from e
 
 
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: "r" to memory map the file instead of reading it, processes
+        mapping the same file share its pages
     return: np.array data loaded
     """
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path, "rb") as file_obj:
             return np.load(file_obj)
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
 
 
-def evaluate_models(X_train, y_train, X_test, y_test, models, param):
+def evaluate_models(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    models,
+    param,
+    n_jobs: int = MODEL_TRAINER_SEARCH_N_JOBS,
+    search_report_file_path: str = None,
+    cache: FittedModelCache = None,
+):
+    """
+    Grid searches every model family on one shared process pool and replaces
+    the entries of models with their best estimator refit on the train set.
+    Returns the test r2 score per family; the timing and utilization report
+    of the search is logged and written to search_report_file_path. Fits
+    found in cache are not repeated.
+    """
     try:
         report = {}
 
+        search = ParallelModelSearch(models, param, n_jobs=n_jobs, cache=cache).fit(X_train, y_train)
+        search_report = search.report()
+        logging.info(f"Model search report: {search_report}")
+        if search_report_file_path:
+            write_yaml_file(search_report_file_path, search_report, replace=True)
+        models.update(search.best_estimators_)
+
         for i in range(len(list(models))):
             model = list(models.values())[i]
-            para = param[list(models.keys())[i]]
-
-            gs = GridSearchCV(model, para, cv=3)
-            gs.fit(X_train, y_train)
-
-            model.set_params(**gs.best_params_)
-            model.fit(X_train, y_train)
 
             # model.fit(X_train, y_train)  # Train model
 
@@ -1,20 +1,271 @@
 from networksecurity.entity.artifact_entity import ClassificationMetricArtifact
 from networksecurity.exception.exception import NetworkSecurityException
-from sklearn.metrics import f1_score, precision_score, recall_score
+from dataclasses import dataclass
+from typing import Sequence
+import numpy as np
 import sys
 
+## np.trapz was renamed in numpy 2.0
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+def _check_binary(labels: np.ndarray):
+    ## as sklearn's average="binary", a multiclass target is not scored one-vs-rest
+    if len(labels) > 2:
+        raise ValueError(
+            f"Binary scores need at most two classes, the target has {len(labels)}: "
+            f"{labels[:10]}"
+        )
+
+
+class ConfusionMatrix:
+    """
+    Confusion matrix built with one bincount over the encoded (true, pred)
+    pairs; every metric is derived from it, nothing re-reads the labels.
+
+    update() can be called once per chunk of a stream, the counts are
+    summed, so metrics over data larger than memory need one pass. labels
+    have to be known up front when streaming; from_predictions infers them.
+    Division by zero gives 0.0, as sklearn's default zero_division.
+    precision, recall and f1 are binary scores of pos_label and raise a
+    ValueError for more than two labels.
+    """
+
+    def __init__(self, labels: Sequence = (0, 1)):
+        self.labels = np.unique(np.asarray(labels))
+        n_labels = len(self.labels)
+        self.matrix = np.zeros((n_labels, n_labels), dtype=np.int64)
+
+    @classmethod
+    def from_predictions(cls, y_true, y_pred, sample_weight=None) -> "ConfusionMatrix":
+        y_true, y_pred = np.asarray(y_true).ravel(), np.asarray(y_pred).ravel()
+        matrix = cls(np.union1d(y_true, y_pred))
+        return matrix.update(y_true, y_pred, sample_weight)
+
+    def _encode(self, values: np.ndarray) -> np.ndarray:
+        index = np.searchsorted(self.labels, values)
+        index = np.minimum(index, len(self.labels) - 1)
+        if not np.array_equal(self.labels[index], values):
+            unknown = np.setdiff1d(values, self.labels)
+            raise ValueError(f"Labels {unknown[:10]} not in {self.labels}")
+        return index
+
+    def update(self, y_true, y_pred, sample_weight=None) -> "ConfusionMatrix":
+        """
+        Adds the pairs of one chunk
+        """
+        y_true, y_pred = np.asarray(y_true).ravel(), np.asarray(y_pred).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"{len(y_true)} true labels but {len(y_pred)} predictions")
+        n_labels = len(self.labels)
+        counts = np.bincount(
+            self._encode(y_true) * n_labels + self._encode(y_pred),
+            weights=sample_weight,
+            minlength=n_labels * n_labels,
+        ).reshape(n_labels, n_labels)
+        if sample_weight is not None and self.matrix.dtype.kind != "f":
+            self.matrix = self.matrix.astype(np.float64)
+        self.matrix += counts.astype(self.matrix.dtype, copy=False)
+        return self
+
+    def merge(self, other: "ConfusionMatrix") -> "ConfusionMatrix":
+        if not np.array_equal(self.labels, other.labels):
+            raise ValueError(f"Labels {other.labels} do not match {self.labels}")
+        self.matrix = self.matrix + other.matrix
+        return self
+
+    def _position(self, pos_label) -> int:
+        position = np.flatnonzero(self.labels == pos_label)
+        if len(position) == 0:
+            ## sklearn scores a positive class that never occurs as 0
+            return None
+        return int(position[0])
+
+    def counts(self, pos_label=1) -> tuple:
+        """
+        (tp, fp, fn, tn) of pos_label against the other label
+        """
+        _check_binary(self.labels)
+        position = self._position(pos_label)
+        total = self.matrix.sum()
+        if position is None:
+            return 0, 0, 0, total
+        tp = self.matrix[position, position]
+        fp = self.matrix[:, position].sum() - tp
+        fn = self.matrix[position, :].sum() - tp
+        return tp, fp, fn, total - tp - fp - fn
+
+    def precision(self, pos_label=1) -> float:
+        tp, fp, _, _ = self.counts(pos_label)
+        return float(tp / (tp + fp)) if tp + fp else 0.0
+
+    def recall(self, pos_label=1) -> float:
+        tp, _, fn, _ = self.counts(pos_label)
+        return float(tp / (tp + fn)) if tp + fn else 0.0
+
+    def f1(self, pos_label=1) -> float:
+        tp, fp, fn, _ = self.counts(pos_label)
+        return float(2 * tp / (2 * tp + fp + fn)) if tp else 0.0
+
+    def accuracy(self) -> float:
+        total = self.matrix.sum()
+        return float(np.trace(self.matrix) / total) if total else 0.0
+
+    def to_metric_artifact(self, pos_label=1) -> ClassificationMetricArtifact:
+        return ClassificationMetricArtifact(
+            f1_score=self.f1(pos_label),
+            precision_score=self.precision(pos_label),
+            recall_score=self.recall(pos_label),
+        )
+
+
+@dataclass
+class ThresholdCurve:
+    """
+    Confusion counts at every distinct score, highest threshold first; a
+    sample is predicted positive when its score is >= threshold
+    """
+
+    thresholds: np.ndarray
+    tps: np.ndarray
+    fps: np.ndarray
+
+    @property
+    def positives(self) -> float:
+        return self.tps[-1] if len(self.tps) else 0
+
+    @property
+    def negatives(self) -> float:
+        return self.fps[-1] if len(self.fps) else 0
+
+    @property
+    def precision(self) -> np.ndarray:
+        predicted = self.tps + self.fps
+        return np.divide(self.tps, predicted, out=np.zeros(len(predicted)), where=predicted > 0)
+
+    @property
+    def recall(self) -> np.ndarray:
+        return self.tps / self.positives if self.positives else np.zeros(len(self.tps))
+
+    @property
+    def fpr(self) -> np.ndarray:
+        return self.fps / self.negatives if self.negatives else np.zeros(len(self.fps))
+
+    @property
+    def f1(self) -> np.ndarray:
+        denominator = self.tps + self.positives + self.fps
+        return np.divide(
+            2 * self.tps, denominator, out=np.zeros(len(denominator)), where=denominator > 0
+        )
+
+    def roc_auc(self) -> float:
+        fpr, tpr = np.r_[0.0, self.fpr], np.r_[0.0, self.recall]
+        return float(_trapezoid(tpr, fpr))
+
+    def average_precision(self) -> float:
+        ## step wise area, as sklearn's average_precision_score
+        recall = np.r_[0.0, self.recall]
+        return float(np.sum(np.diff(recall) * self.precision))
+
+    def best_threshold(self) -> tuple:
+        """
+        (threshold, f1) with the highest f1
+        """
+        best = int(np.argmax(self.f1))
+        return float(self.thresholds[best]), float(self.f1[best])
+
+
+def threshold_curve(y_true, scores, pos_label=1, sample_weight=None) -> ThresholdCurve:
+    """
+    Precision/recall and ROC curves at every threshold from one sort of
+    scores: cumulative sums of positives and negatives in descending score
+    order, read at the last position of every distinct score
+    """
+    try:
+        y_true, scores = np.asarray(y_true).ravel(), np.asarray(scores).ravel()
+        if len(y_true):
+            low, high = y_true.min(), y_true.max()
+            if np.any((y_true != low) & (y_true != high)):
+                _check_binary(np.unique(y_true))
+        order = np.argsort(scores, kind="mergesort")[::-1]
+        scores = scores[order]
+        positive = (y_true[order] == pos_label).astype(np.float64)
+        weight = 1.0 if sample_weight is None else np.asarray(sample_weight)[order]
+        last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+        tps = np.cumsum(positive * weight)[last]
+        fps = np.cumsum((1 - positive) * weight)[last]
+        return ThresholdCurve(thresholds=scores[last], tps=tps, fps=fps)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
 
 def get_classification_score(y_true, y_pred) -> ClassificationMetricArtifact:
     try:
-        model_f1_score = f1_score(y_true, y_pred)
-        model_recall_score = recall_score(y_true, y_pred)
-        model_precision_score = precision_score(y_true, y_pred)
-
-        classification_metric = ClassificationMetricArtifact(
-            f1_score=model_f1_score,
-            precision_score=model_precision_score,
-            recall_score=model_recall_score,
-        )
+        ## one confusion matrix for all three scores
+        confusion_matrix = ConfusionMatrix.from_predictions(y_true, y_pred)
+        classification_metric = confusion_matrix.to_metric_artifact(pos_label=1)
         return classification_metric
     except Exception as e:
         raise NetworkSecurityException(e, sys)
+
+
+def benchmark_classification_metrics(n_samples: int = 5_000_000, repeat: int = 3) -> dict:
+    """
+    Seconds of the sklearn f1/recall/precision calls against the
+    confusion matrix engine, and of the sklearn curves against one sweep
+    """
+    try:
+        import time
+
+        from sklearn.metrics import (
+            average_precision_score,
+            f1_score,
+            precision_score,
+            recall_score,
+            roc_auc_score,
+        )
+
+        rng = np.random.default_rng(0)
+        y_true = rng.integers(0, 2, n_samples)
+        scores = np.clip(y_true * 0.3 + rng.random(n_samples), 0, 1).round(3)
+        y_pred = (scores >= 0.65).astype(np.int64)
+
+        def timed(function) -> tuple:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = function()
+            return (time.perf_counter() - start) / repeat, result
+
+        sklearn_seconds, expected = timed(
+            lambda: (
+                f1_score(y_true, y_pred),
+                precision_score(y_true, y_pred),
+                recall_score(y_true, y_pred),
+            )
+        )
+        engine_seconds, artifact = timed(lambda: get_classification_score(y_true, y_pred))
+        sklearn_curve_seconds, expected_curve = timed(
+            lambda: (roc_auc_score(y_true, scores), average_precision_score(y_true, scores))
+        )
+        sweep_seconds, curve = timed(lambda: threshold_curve(y_true, scores))
+        return {
+            "samples": n_samples,
+            "sklearn_scores_seconds": sklearn_seconds,
+            "engine_scores_seconds": engine_seconds,
+            "scores_match": np.allclose(
+                expected,
+                (artifact.f1_score, artifact.precision_score, artifact.recall_score),
+            ),
+            "sklearn_curves_seconds": sklearn_curve_seconds,
+            "sweep_seconds": sweep_seconds,
+            "curves_match": np.allclose(
+                expected_curve, (curve.roc_auc(), curve.average_precision())
+            ),
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    for key, value in benchmark_classification_metrics().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,318 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.stats import chi2, ks_2samp
+
+from networksecurity.constant.training_pipeline import (
+    DATA_VALIDATION_DRIFT_BLOCK_CELLS,
+    DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+    DATA_VALIDATION_DRIFT_MAX_WORKERS,
+    DATA_VALIDATION_DRIFT_PSI_BINS,
+    DATA_VALIDATION_DRIFT_THRESHOLD,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.artifact_store import Columns, to_column_arrays
+
+PSI_EPSILON = 1e-4
+
+
+def discrete_range(arrays: List[np.ndarray], max_categories: int) -> Tuple[int, int]:
+    """
+    (low, n_values) when every non missing value of arrays is an integer
+    within max_categories consecutive values, else None
+    """
+    low, high = np.inf, -np.inf
+    for values in arrays:
+        if values.size == 0:
+            continue
+        if values.dtype.kind in "iub":
+            ## python ints, max - min + 1 would overflow in int8/int16
+            low, high = min(low, int(values.min())), max(high, int(values.max()))
+        elif values.dtype.kind == "f":
+            missing = np.isnan(values)
+            if missing.all():
+                continue
+            low = min(low, np.nanmin(values))
+            high = max(high, np.nanmax(values))
+            if high - low + 1 > max_categories:
+                return None
+            if np.any(np.mod(values, 1) > 0):
+                return None
+        else:
+            return None
+        if high - low + 1 > max_categories:
+            return None
+    if low > high:
+        ## only missing values, one empty bin keeps the column in the report
+        return 0, 1
+    return int(low), int(high - low + 1)
+
+
+def histogram_columns(
+    arrays: List[np.ndarray],
+    lows: np.ndarray,
+    n_bins: int,
+    block_cells: int = DATA_VALIDATION_DRIFT_BLOCK_CELLS,
+) -> np.ndarray:
+    """
+    Value counts of several integer valued columns with a single bincount
+    per block of rows. Returns (n_columns, n_bins + 1) counts where value v
+    of column j lands in bin v - lows[j] and NaN in the last bin.
+    """
+    n_columns = len(arrays)
+    n_rows = len(arrays[0]) if n_columns else 0
+    slots = n_bins + 1
+    counts = np.zeros(n_columns * slots, dtype=np.int64)
+    if n_rows == 0:
+        return counts.reshape(n_columns, slots)
+
+    ## shift every column into its own slot range of one flat bincount
+    shifts = lows - np.arange(n_columns) * slots
+    block_rows = max(1, block_cells // n_columns)
+    codes = np.empty((n_columns, min(block_rows, n_rows)), dtype=np.intp)
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        block = codes[:, : stop - start]
+        for j, values in enumerate(arrays):
+            chunk = values[start:stop]
+            if chunk.dtype.kind == "f":
+                shifted = chunk - shifts[j]
+                shifted[np.isnan(chunk)] = j * slots + n_bins
+                block[j] = shifted
+            else:
+                np.subtract(chunk, shifts[j], out=block[j], dtype=np.intp)
+        counts += np.bincount(block.ravel(), minlength=counts.size)
+    return counts.reshape(n_columns, slots)
+
+
+def compare_histograms(
+    base_counts: np.ndarray, current_counts: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Chi-square test of homogeneity and PSI for every row of two
+    (n_columns, n_bins) count matrices, vectorized across columns
+    """
+    base_counts = np.asarray(base_counts, dtype=np.float64)
+    current_counts = np.asarray(current_counts, dtype=np.float64)
+    n_base = base_counts.sum(axis=1, keepdims=True)
+    n_current = current_counts.sum(axis=1, keepdims=True)
+    total = base_counts + current_counts
+    n_total = n_base + n_current
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected_base = total * (n_base / n_total)
+        expected_current = total * (n_current / n_total)
+        cells = np.where(
+            total > 0,
+            (base_counts - expected_base) ** 2 / expected_base
+            + (current_counts - expected_current) ** 2 / expected_current,
+            0.0,
+        )
+        base_share = np.maximum(base_counts / n_base, PSI_EPSILON)
+        current_share = np.maximum(current_counts / n_current, PSI_EPSILON)
+    statistic = np.nan_to_num(cells.sum(axis=1))
+    dof = (total > 0).sum(axis=1) - 1
+    both_present = (n_base[:, 0] > 0) & (n_current[:, 0] > 0)
+    p_value = np.where(
+        (dof > 0) & both_present, chi2.sf(statistic, np.maximum(dof, 1)), 1.0
+    )
+    psi = np.where(
+        both_present,
+        ((current_share - base_share) * np.log(current_share / base_share)).sum(axis=1),
+        0.0,
+    )
+    return {"statistic": statistic, "p_value": p_value, "psi": psi}
+
+
+class DriftDetector:
+    """
+    Compares two datasets column by column.
+
+    Integer columns with at most max_categories distinct values (the
+    phishing features only take -1, 0 and 1) are histogrammed together in
+    one vectorized pass and get a chi-square test and PSI; the remaining
+    columns get a two sample KS test and a decile PSI. Column groups and KS
+    tests run on a thread pool, numpy and scipy release the GIL for the
+    heavy parts.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DATA_VALIDATION_DRIFT_THRESHOLD,
+        max_categories: int = DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+        psi_bins: int = DATA_VALIDATION_DRIFT_PSI_BINS,
+        block_cells: int = DATA_VALIDATION_DRIFT_BLOCK_CELLS,
+        max_workers: int = DATA_VALIDATION_DRIFT_MAX_WORKERS,
+    ):
+        self.threshold = threshold
+        self.max_categories = max_categories
+        self.psi_bins = psi_bins
+        self.block_cells = block_cells
+        self.max_workers = max(1, max_workers)
+
+    def _discrete_group(self, base: List[np.ndarray], current: List[np.ndarray], lows, n_bins):
+        base_counts = histogram_columns(base, lows, n_bins, self.block_cells)
+        current_counts = histogram_columns(current, lows, n_bins, self.block_cells)
+        tests = compare_histograms(base_counts[:, :-1], current_counts[:, :-1])
+        return tests, base_counts[:, -1], current_counts[:, -1]
+
+    def _continuous_column(self, base: np.ndarray, current: np.ndarray) -> dict:
+        base_missing, current_missing = np.isnan(base), np.isnan(current)
+        base, current = base[~base_missing], current[~current_missing]
+        if base.size == 0 or current.size == 0:
+            statistic, p_value, psi = 0.0, 1.0, 0.0
+        else:
+            result = ks_2samp(base, current)
+            statistic, p_value = float(result.statistic), float(result.pvalue)
+            edges = np.unique(
+                np.quantile(base, np.linspace(0, 1, self.psi_bins + 1)[1:-1])
+            )
+            counts = np.stack(
+                [
+                    np.bincount(np.searchsorted(edges, values), minlength=edges.size + 1)
+                    for values in (base, current)
+                ]
+            )
+            psi = float(compare_histograms(counts[:1], counts[1:])["psi"][0])
+        return {
+            "test": "ks",
+            "statistic": statistic,
+            "p_value": p_value,
+            "psi": psi,
+            "missing_base": int(base_missing.sum()),
+            "missing_current": int(current_missing.sum()),
+        }
+
+    def detect(self, base: Columns, current: Columns) -> Dict[str, dict]:
+        """
+        Per column test, statistic, p_value, psi, missing counts and
+        drift_status (p_value below threshold), in the column order of base
+        """
+        try:
+            base_arrays = to_column_arrays(base)
+            current_arrays = to_column_arrays(current)
+            missing_columns = set(base_arrays) - set(current_arrays)
+            if missing_columns:
+                raise ValueError(f"Columns missing from current data: {missing_columns}")
+
+            discrete, continuous = [], []
+            for column, values in base_arrays.items():
+                value_range = discrete_range(
+                    [values, current_arrays[column]], self.max_categories
+                )
+                if value_range is None:
+                    continuous.append(column)
+                else:
+                    discrete.append((column, value_range))
+
+            results = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                group_size = -(-len(discrete) // self.max_workers) if discrete else 1
+                group_futures = []
+                for start in range(0, len(discrete), group_size):
+                    group = discrete[start : start + group_size]
+                    n_bins = max(n_values for _, (_, n_values) in group)
+                    lows = np.array([low for _, (low, _) in group], dtype=np.intp)
+                    future = pool.submit(
+                        self._discrete_group,
+                        [base_arrays[column] for column, _ in group],
+                        [current_arrays[column] for column, _ in group],
+                        lows,
+                        n_bins,
+                    )
+                    group_futures.append((group, future))
+                continuous_futures = {
+                    column: pool.submit(
+                        self._continuous_column,
+                        np.asarray(base_arrays[column], dtype=np.float64),
+                        np.asarray(current_arrays[column], dtype=np.float64),
+                    )
+                    for column in continuous
+                }
+
+                for group, future in group_futures:
+                    tests, base_missing, current_missing = future.result()
+                    for j, (column, _) in enumerate(group):
+                        results[column] = {
+                            "test": "chi2",
+                            "statistic": float(tests["statistic"][j]),
+                            "p_value": float(tests["p_value"][j]),
+                            "psi": float(tests["psi"][j]),
+                            "missing_base": int(base_missing[j]),
+                            "missing_current": int(current_missing[j]),
+                        }
+                for column, future in continuous_futures.items():
+                    results[column] = future.result()
+
+            for result in results.values():
+                result["drift_status"] = bool(result["p_value"] < self.threshold)
+            return {column: results[column] for column in base_arrays}
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def drift_report(results: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    The report.yaml layout: {column: {p_value, drift_status}}
+    """
+    return {
+        column: {
+            "p_value": float(result["p_value"]),
+            "drift_status": bool(result["drift_status"]),
+        }
+        for column, result in results.items()
+    }
+
+
+def benchmark_drift_detector(
+    n_rows: int = 10_000_000, n_columns: int = 100, ks_columns: int = 3, seed: int = 42
+) -> dict:
+    """
+    DriftDetector against the per column ks_2samp loop on {-1, 0, 1}
+    features. The loop is timed on ks_columns columns and extrapolated.
+    """
+    try:
+        rng = np.random.default_rng(seed)
+        values = np.array([-1, 0, 1], dtype=np.int8)
+        base = {
+            f"f{j}": rng.choice(values, size=n_rows, p=[0.3, 0.2, 0.5])
+            for j in range(n_columns)
+        }
+        ## every tenth column drifts
+        current = {
+            f"f{j}": rng.choice(
+                values, size=n_rows, p=[0.35, 0.2, 0.45] if j % 10 == 0 else [0.3, 0.2, 0.5]
+            )
+            for j in range(n_columns)
+        }
+
+        start = time.perf_counter()
+        results = DriftDetector().detect(base, current)
+        engine_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for j in range(ks_columns):
+            ks_2samp(base[f"f{j}"], current[f"f{j}"])
+        ks_loop_seconds = (time.perf_counter() - start) * n_columns / ks_columns
+
+        return {
+            "rows": n_rows,
+            "columns": n_columns,
+            "drifted_columns": sum(result["drift_status"] for result in results.values()),
+            "engine_seconds": engine_seconds,
+            "engine_cells_per_sec": 2 * n_rows * n_columns / engine_seconds,
+            "ks_loop_seconds_estimated": ks_loop_seconds,
+            "speedup": ks_loop_seconds / engine_seconds,
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    for key, value in benchmark_drift_detector(n_rows, n_columns).items():
+        print(f"{key}: {value}")
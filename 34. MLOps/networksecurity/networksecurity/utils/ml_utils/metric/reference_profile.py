@@ -0,0 +1,383 @@
+import sys
+from typing import Dict, Iterable
+
+import numpy as np
+from scipy.stats import kstwo
+
+from networksecurity.constant.training_pipeline import (
+    DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+    DATA_VALIDATION_DRIFT_PSI_BINS,
+    DATA_VALIDATION_DRIFT_THRESHOLD,
+    DATA_VALIDATION_SKETCH_COMPRESSION,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.artifact_store import Columns, to_column_arrays
+from networksecurity.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from networksecurity.utils.ml_utils.metric.drift_metric import compare_histograms, discrete_range
+
+
+class QuantileSketch:
+    """
+    Mergeable t-digest style quantile sketch.
+
+    Values are kept as weighted centroids. Compression groups neighbouring
+    centroids along the k1 scale function, so centroids stay small in the
+    tails and the sketch holds about compression / 2 of them whatever the
+    number of values seen. update and merge are one sort plus reduceat.
+    """
+
+    def __init__(self, compression: int = DATA_VALIDATION_SKETCH_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _add_centroids(self, means: np.ndarray, weights: np.ndarray):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        if means.size == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        starts = np.flatnonzero(np.diff(np.floor(k - k[0]), prepend=-1.0))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def update(self, values: np.ndarray, weights: np.ndarray = None):
+        values = np.asarray(values, dtype=np.float64)
+        if weights is None:
+            weights = np.ones_like(values)
+        keep = ~np.isnan(values) & (np.asarray(weights) > 0)
+        values, weights = values[keep], np.asarray(weights, dtype=np.float64)[keep]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._add_centroids(values, weights)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._add_centroids(other.means, other.weights)
+        return self
+
+    def _curve(self):
+        positions = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        return (
+            np.concatenate([[0.0], positions, [1.0]]),
+            np.concatenate([[self.min], self.means, [self.max]]),
+        )
+
+    def quantile(self, q) -> np.ndarray:
+        quantiles, values = self._curve()
+        return np.interp(q, quantiles, values)
+
+    def cdf(self, x) -> np.ndarray:
+        quantiles, values = self._curve()
+        return np.interp(x, values, quantiles)
+
+    def to_dict(self) -> dict:
+        return {
+            "compression": self.compression,
+            "min": float(self.min),
+            "max": float(self.max),
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "QuantileSketch":
+        sketch = cls(content["compression"])
+        sketch.min, sketch.max = content["min"], content["max"]
+        sketch.means = np.asarray(content["means"], dtype=np.float64)
+        sketch.weights = np.asarray(content["weights"], dtype=np.float64)
+        return sketch
+
+
+class ColumnProfile:
+    """
+    Missing value count plus either an exact histogram over consecutive
+    integer values (discrete) or a QuantileSketch (continuous). A discrete
+    column turns continuous once it outgrows max_categories.
+    """
+
+    def __init__(
+        self,
+        max_categories: int = DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+        compression: int = DATA_VALIDATION_SKETCH_COMPRESSION,
+    ):
+        self.max_categories = max_categories
+        self.compression = compression
+        self.missing = 0
+        self.low: int = None
+        self.counts: np.ndarray = None
+        self.sketch: QuantileSketch = None
+
+    @property
+    def kind(self) -> str:
+        return "continuous" if self.sketch is not None else "discrete"
+
+    @property
+    def count(self) -> float:
+        if self.sketch is not None:
+            return self.sketch.count
+        return 0.0 if self.counts is None else float(self.counts.sum())
+
+    def as_sketch(self) -> QuantileSketch:
+        if self.sketch is not None:
+            return self.sketch
+        sketch = QuantileSketch(self.compression)
+        if self.counts is not None:
+            sketch.update(self.low + np.arange(self.counts.size), self.counts)
+        return sketch
+
+    def _add_counts(self, low: int, counts: np.ndarray):
+        if self.counts is None:
+            self.low, self.counts = low, counts.astype(np.int64)
+            return
+        new_low = min(self.low, low)
+        size = max(self.low + self.counts.size, low + counts.size) - new_low
+        merged = np.zeros(size, dtype=np.int64)
+        merged[self.low - new_low : self.low - new_low + self.counts.size] += self.counts
+        merged[low - new_low : low - new_low + counts.size] += counts
+        self.low, self.counts = new_low, merged
+
+    def _to_continuous(self):
+        self.sketch = self.as_sketch()
+        self.low, self.counts = None, None
+
+    def update(self, values: np.ndarray) -> "ColumnProfile":
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            missing = np.isnan(values)
+            self.missing += int(missing.sum())
+            values = values[~missing]
+        if self.sketch is None:
+            value_range = discrete_range([values], self.max_categories)
+            if value_range is not None:
+                low, n_values = value_range
+                counts = np.bincount(values.astype(np.int64) - low, minlength=n_values)
+                self._add_counts(low, counts)
+                if self.counts.size > self.max_categories:
+                    self._to_continuous()
+                return self
+            self._to_continuous()
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        self.missing += other.missing
+        if self.sketch is None and other.sketch is None:
+            if other.counts is not None:
+                self._add_counts(other.low, other.counts)
+            if self.counts is not None and self.counts.size > self.max_categories:
+                self._to_continuous()
+            return self
+        if self.sketch is None:
+            self._to_continuous()
+        self.sketch.merge(other.as_sketch())
+        return self
+
+    def to_dict(self) -> dict:
+        content = {"kind": self.kind, "missing": self.missing}
+        if self.sketch is not None:
+            content["sketch"] = self.sketch.to_dict()
+        elif self.counts is not None:
+            content["low"] = self.low
+            content["counts"] = self.counts.tolist()
+        return content
+
+    @classmethod
+    def from_dict(
+        cls,
+        content: dict,
+        max_categories: int = DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+        compression: int = DATA_VALIDATION_SKETCH_COMPRESSION,
+    ) -> "ColumnProfile":
+        profile = cls(max_categories, compression)
+        profile.missing = content["missing"]
+        if "sketch" in content:
+            profile.sketch = QuantileSketch.from_dict(content["sketch"])
+        elif "counts" in content:
+            profile.low = content["low"]
+            profile.counts = np.asarray(content["counts"], dtype=np.int64)
+        return profile
+
+
+class ReferenceProfile:
+    """
+    Compact, mergeable summary of a dataset persisted at training time.
+
+    New data is profiled batch by batch in O(batch) memory and compared with
+    compare(), so drift checks never need the training rows again.
+    Profiles of separate partitions combine with merge().
+    """
+
+    def __init__(
+        self,
+        max_categories: int = DATA_VALIDATION_DRIFT_MAX_CATEGORIES,
+        compression: int = DATA_VALIDATION_SKETCH_COMPRESSION,
+    ):
+        self.max_categories = max_categories
+        self.compression = compression
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, batch: Columns) -> "ReferenceProfile":
+        try:
+            arrays = to_column_arrays(batch)
+            for column, values in arrays.items():
+                if column not in self.columns:
+                    self.columns[column] = ColumnProfile(
+                        self.max_categories, self.compression
+                    )
+                self.columns[column].update(values)
+            self.rows += len(next(iter(arrays.values()))) if arrays else 0
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Columns], **kwargs) -> "ReferenceProfile":
+        profile = cls(**kwargs)
+        for batch in batches:
+            profile.update(batch)
+        return profile
+
+    def merge(self, other: "ReferenceProfile") -> "ReferenceProfile":
+        try:
+            for column, column_profile in other.columns.items():
+                if column not in self.columns:
+                    self.columns[column] = ColumnProfile(
+                        self.max_categories, self.compression
+                    )
+                self.columns[column].merge(column_profile)
+            self.rows += other.rows
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def _compare_sketches(
+        reference: QuantileSketch, current: QuantileSketch, psi_bins: int
+    ) -> dict:
+        n, m = reference.count, current.count
+        if n == 0 or m == 0:
+            return {"statistic": 0.0, "p_value": 1.0, "psi": 0.0}
+        points = np.union1d(reference.means, current.means)
+        statistic = float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+        ## asymptotic two sample KS p value, as ks_2samp(method="asymp")
+        p_value = float(kstwo.sf(statistic, np.round(n * m / (n + m))))
+        edges = np.unique(reference.quantile(np.linspace(0, 1, psi_bins + 1)[1:-1]))
+        shares = [
+            np.diff(np.concatenate([[0.0], sketch.cdf(edges), [1.0]]))
+            for sketch in (reference, current)
+        ]
+        psi = float(
+            compare_histograms(shares[0][np.newaxis] * n, shares[1][np.newaxis] * m)[
+                "psi"
+            ][0]
+        )
+        return {"statistic": statistic, "p_value": p_value, "psi": psi}
+
+    def compare(
+        self,
+        current: "ReferenceProfile",
+        threshold: float = DATA_VALIDATION_DRIFT_THRESHOLD,
+        psi_bins: int = DATA_VALIDATION_DRIFT_PSI_BINS,
+    ) -> Dict[str, dict]:
+        """
+        Drift of current against this profile, in the DriftDetector result
+        layout: chi-square on the histograms when both sides are discrete,
+        a KS test between the sketches otherwise.
+        """
+        try:
+            missing_columns = set(self.columns) - set(current.columns)
+            if missing_columns:
+                raise ValueError(f"Columns missing from current data: {missing_columns}")
+
+            results = {}
+            discrete = []
+            for column, reference in self.columns.items():
+                other = current.columns[column]
+                result = {"missing_base": reference.missing, "missing_current": other.missing}
+                if reference.kind == "discrete" and other.kind == "discrete":
+                    discrete.append(column)
+                    result["test"] = "chi2"
+                else:
+                    result["test"] = "ks"
+                    result.update(
+                        self._compare_sketches(
+                            reference.as_sketch(), other.as_sketch(), psi_bins
+                        )
+                    )
+                results[column] = result
+
+            if discrete:
+                ## align every discrete column on one value grid for a single vectorized test
+                spans = []
+                for column in discrete:
+                    for profile in (self.columns[column], current.columns[column]):
+                        if profile.counts is not None:
+                            spans.append((profile.low, profile.low + profile.counts.size))
+                low = min((start for start, _ in spans), default=0)
+                width = max((stop for _, stop in spans), default=1) - low
+                grids = np.zeros((2, len(discrete), width), dtype=np.int64)
+                for j, column in enumerate(discrete):
+                    for side, profile in enumerate(
+                        (self.columns[column], current.columns[column])
+                    ):
+                        if profile.counts is not None:
+                            offset = profile.low - low
+                            grids[side, j, offset : offset + profile.counts.size] = (
+                                profile.counts
+                            )
+                tests = compare_histograms(grids[0], grids[1])
+                for j, column in enumerate(discrete):
+                    for key in ("statistic", "p_value", "psi"):
+                        results[column][key] = float(tests[key][j])
+
+            for result in results.values():
+                result["drift_status"] = bool(result["p_value"] < threshold)
+            return results
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def to_dict(self) -> dict:
+        return {
+            "max_categories": self.max_categories,
+            "compression": self.compression,
+            "rows": self.rows,
+            "columns": {
+                column: profile.to_dict() for column, profile in self.columns.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "ReferenceProfile":
+        profile = cls(content["max_categories"], content["compression"])
+        profile.rows = content["rows"]
+        profile.columns = {
+            column: ColumnProfile.from_dict(
+                column_content, profile.max_categories, profile.compression
+            )
+            for column, column_content in content["columns"].items()
+        }
+        return profile
+
+    def save(self, file_path: str):
+        write_yaml_file(file_path, self.to_dict(), replace=True)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ReferenceProfile":
+        return cls.from_dict(read_yaml_file(file_path))
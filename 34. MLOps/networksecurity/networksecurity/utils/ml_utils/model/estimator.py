@@ -1,18 +1,35 @@
 import sys
+from networksecurity.constant.training_pipeline import COMPILED_ENGINE_MAX_ROWS
 from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.model.tree_engine import compile_tree_ensemble
 
 
 class NetworkModel:
-    def __init__(self, preprocessor, model):
+    def __init__(self, preprocessor, model, engine=None):
         try:
             self.preprocessor = preprocessor
             self.model = model
+            ## optional CompiledTreeEnsemble used for small batches
+            self.engine = engine
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def compile(self):
+        """
+        Export the model to the compiled tree engine when it is a supported ensemble
+        """
+        try:
+            self.engine = compile_tree_ensemble(self.model)
+            return self
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def predict(self, x):
         try:
             x_transform = self.preprocessor.transform(x)
+            engine = getattr(self, "engine", None)
+            if engine is not None and len(x_transform) <= COMPILED_ENGINE_MAX_ROWS:
+                return engine.predict(x_transform)
             y_hat = self.model.predict(x_transform)
             return y_hat
         except Exception as e:
@@ -0,0 +1,100 @@
+import sys
+from typing import Dict, Iterator, List
+
+import numpy as np
+from sklearn.base import clone
+
+from networksecurity.constant.training_pipeline import (
+    MODEL_TRAINER_INCREMENTAL_CHUNK_SIZE,
+    MODEL_TRAINER_INCREMENTAL_EPOCHS,
+)
+from networksecurity.entity.artifact_entity import ClassificationMetricArtifact
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.metric.classification_metric import ConfusionMatrix
+
+
+def iter_chunks(
+    arrays: List[np.ndarray],
+    chunk_size: int = MODEL_TRAINER_INCREMENTAL_CHUNK_SIZE,
+    shuffle: bool = False,
+    random_state: int = None,
+) -> Iterator[List[np.ndarray]]:
+    """
+    Row aligned chunks of arrays. With memory mapped arrays only the rows of
+    the current chunk are read into memory; shuffle visits the chunks in a
+    random order and shuffles the rows inside each chunk.
+    """
+    n_rows = len(arrays[0])
+    starts = np.arange(0, n_rows, chunk_size)
+    rng = np.random.default_rng(random_state)
+    if shuffle:
+        starts = rng.permutation(starts)
+    for start in starts:
+        chunk = [np.array(array[start : start + chunk_size]) for array in arrays]
+        if shuffle:
+            order = rng.permutation(len(chunk[0]))
+            chunk = [values[order] for values in chunk]
+        yield chunk
+
+
+class IncrementalTrainer:
+    """
+    Out of core training of estimators that support partial_fit.
+
+    Every epoch is one pass over the chunks of the training arrays, each
+    chunk is fed to every model before the next one is read, so all models
+    share the same I/O. Validation is one streaming pass over the test
+    arrays that accumulates the confusion matrix of every model.
+    """
+
+    def __init__(
+        self,
+        models: dict,
+        chunk_size: int = MODEL_TRAINER_INCREMENTAL_CHUNK_SIZE,
+        epochs: int = MODEL_TRAINER_INCREMENTAL_EPOCHS,
+        random_state: int = 42,
+    ):
+        self.models = models
+        self.chunk_size = chunk_size
+        self.epochs = epochs
+        self.random_state = random_state
+
+    def fit(self, X, y) -> "IncrementalTrainer":
+        try:
+            ## partial_fit needs every class on its first call
+            classes = np.unique(
+                np.concatenate(
+                    [np.unique(y_chunk) for (y_chunk,) in iter_chunks([y], self.chunk_size)]
+                )
+            )
+            self.classes_ = classes
+            self.models_ = {name: clone(model) for name, model in self.models.items()}
+            for epoch in range(self.epochs):
+                for X_chunk, y_chunk in iter_chunks(
+                    [X, y], self.chunk_size, shuffle=True, random_state=self.random_state + epoch
+                ):
+                    for model in self.models_.values():
+                        model.partial_fit(X_chunk, y_chunk, classes=classes)
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def score_stream(
+        self, X, y, models: dict = None, pos_label=1
+    ) -> Dict[str, ClassificationMetricArtifact]:
+        """
+        f1, precision and recall of every fitted model (or of models) in
+        one pass over X, y
+        """
+        try:
+            models = self.models_ if models is None else models
+            matrices = {name: ConfusionMatrix(self.classes_) for name in models}
+            for X_chunk, y_chunk in iter_chunks([X, y], self.chunk_size):
+                for name, model in models.items():
+                    matrices[name].update(y_chunk, model.predict(X_chunk))
+            return {
+                name: matrix.to_metric_artifact(pos_label)
+                for name, matrix in matrices.items()
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,273 @@
+import sys
+import time
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.metrics.pairwise import nan_euclidean_distances
+
+from networksecurity.constant.training_pipeline import (
+    DATA_TRANSFORMATION_IMPUTER_MAX_MEMORY_MB,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+
+
+class ChunkedKNNImputer(TransformerMixin, BaseEstimator):
+    """
+    KNN imputation with the semantics of sklearn's KNNImputer (nan_euclidean
+    distance, n_neighbors donors that have the column, column mean when no
+    donor is reachable) that scales past a few hundred thousand rows.
+
+    - only rows with a missing value are searched, complete rows pass through
+    - complete donor rows are deduplicated into an index of unique rows with
+      their multiplicity; the discrete phishing features collapse to a small
+      fraction of the rows
+    - the nan_euclidean distance of a chunk of receivers to every indexed
+      donor is a single matrix product, exact for integer valued features
+    - the few donors with missing values themselves are scanned in blocks
+      with nan_euclidean_distances
+    - receivers are processed in chunks sized to stay under max_memory_mb
+
+    max_memory_mb bounds the working set of transform on top of the imputed
+    copy of X. It includes the donor-term matrix, n_donors x (2 F + 1)
+    float64, which is kept between calls. When that matrix alone exceeds
+    max_memory_mb the bound cannot be met and receivers go one row at a time.
+
+    The donor matrix is rebuilt lazily after unpickling, so the fitted
+    imputer pickles as small as its donor index. Ties between equally
+    distant donors may be broken differently than in KNNImputer.
+    """
+
+    def __init__(
+        self,
+        missing_values=np.nan,
+        n_neighbors: int = 5,
+        weights: str = "uniform",
+        max_memory_mb: float = DATA_TRANSFORMATION_IMPUTER_MAX_MEMORY_MB,
+    ):
+        self.missing_values = missing_values
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.max_memory_mb = max_memory_mb
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_donor_matrix", None)
+        return state
+
+    def _to_array(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        if not (isinstance(self.missing_values, float) and np.isnan(self.missing_values)):
+            X[X == self.missing_values] = np.nan
+        return X
+
+    def fit(self, X, y=None):
+        try:
+            if self.weights not in ("uniform", "distance"):
+                raise ValueError(f"Unsupported weights {self.weights}")
+            if hasattr(X, "columns"):
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            X = self._to_array(X)
+            self.n_features_in_ = X.shape[1]
+            mask = np.isnan(X)
+            ## like KNNImputer, columns without any value are dropped
+            self.valid_mask_ = ~mask.all(axis=0)
+            X, mask = X[:, self.valid_mask_], mask[:, self.valid_mask_]
+            complete = ~mask.any(axis=1)
+            self.donors_, self.donor_counts_ = np.unique(
+                X[complete], axis=0, return_counts=True
+            )
+            self.incomplete_X_ = np.ascontiguousarray(X[~complete])
+            self.column_means_ = np.nanmean(X, axis=0)
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _donor_terms(self) -> np.ndarray:
+        """
+        [-2 y, -y**2, |y|**2] per donor, so that [x0, m, 1] @ terms.T + |x0|**2
+        is the squared distance over the columns present in x (x0 is x with
+        zeros at its missing columns m)
+        """
+        if getattr(self, "_donor_matrix", None) is None:
+            ## filled in place, so building it needs no more memory than it holds
+            n_donors, n_features = self.donors_.shape
+            terms = np.empty((n_donors, 2 * n_features + 1))
+            np.multiply(self.donors_, -2.0, out=terms[:, :n_features])
+            np.square(self.donors_, out=terms[:, n_features:-1])
+            np.sum(terms[:, n_features:-1], axis=1, out=terms[:, -1])
+            np.negative(terms[:, n_features:-1], out=terms[:, n_features:-1])
+            self._donor_matrix = terms
+        return self._donor_matrix
+
+    def _chunk_sizes(self) -> tuple:
+        """
+        receivers per chunk and incomplete donors per nan_euclidean_distances
+        call, so that a chunk stays under max_memory_mb
+        """
+        (n_donors, n_features), n_incomplete = self.donors_.shape, self.incomplete_X_.shape[0]
+        budget = self.max_memory_mb * 2**20 - 8 * n_donors * (2 * n_features + 1)
+        ## nan_euclidean_distances copies its donor block about four times, an
+        ## eighth of the budget goes to that; below 1024 rows the calls cost
+        ## more than the copies
+        block_rows = min(max(n_incomplete, 1), max(1024, int(budget // 8 // (32 * n_features))))
+        budget -= 32 * n_features * block_rows
+        ## per receiver: squared distances (float64) and argpartition indices (intp)
+        ## per indexed donor; per incomplete donor the distances and, per missing
+        ## column, the stacked distances, values, counts, masks and indices
+        row_bytes = 16 * n_donors + 48 * n_incomplete + 64 * n_features
+        return max(1, int(budget // row_bytes)), block_rows
+
+    def _weights(self, distances: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        if self.weights == "uniform":
+            return counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = np.where(counts > 0, counts / distances, 0.0)
+        ## donors at distance zero take all the weight, as in sklearn
+        exact = (counts > 0) & (distances == 0)
+        has_exact = exact.any(axis=1, keepdims=True)
+        return np.where(has_exact, np.where(exact, counts, 0.0), weights)
+
+    def _nearest_donors(self, chunk_zeroed: np.ndarray, missing: np.ndarray, scale: np.ndarray):
+        """
+        distances, rows and counts of the nearest indexed donors per receiver,
+        the full distance matrix is released on return
+        """
+        n_donors = self.donors_.shape[0]
+        n_nearest = min(self.n_neighbors, n_donors)
+        if not n_nearest:
+            return None
+        query = np.hstack([chunk_zeroed, missing, np.ones((chunk_zeroed.shape[0], 1))])
+        squared = query @ self._donor_terms().T
+        squared += (chunk_zeroed**2).sum(axis=1, keepdims=True)
+        np.maximum(squared, 0.0, out=squared)
+        if n_donors > n_nearest:
+            nearest = np.argpartition(squared, n_nearest - 1, axis=1)[:, :n_nearest].copy()
+        else:
+            nearest = np.broadcast_to(np.arange(n_donors), squared.shape)
+        distances = np.sqrt(np.take_along_axis(squared, nearest, axis=1) * scale[:, None])
+        return distances, self.donors_[nearest], self.donor_counts_[nearest].astype(float)
+
+    def _impute_chunk(self, X: np.ndarray, rows: np.ndarray, block_rows: int):
+        chunk = X[rows]
+        missing = np.isnan(chunk)
+        n_features = chunk.shape[1]
+        n_present = n_features - missing.sum(axis=1)
+        chunk_zeroed = np.where(missing, 0.0, chunk)
+        ## rows without any present column get no distance, hence the column mean
+        scale = np.where(n_present > 0, n_features / np.maximum(n_present, 1), np.nan)
+
+        indexed = self._nearest_donors(chunk_zeroed, missing, scale)
+        if self.incomplete_X_.shape[0]:
+            incomplete_distances = np.empty((rows.size, self.incomplete_X_.shape[0]))
+            for start in range(0, self.incomplete_X_.shape[0], block_rows):
+                block = slice(start, start + block_rows)
+                incomplete_distances[:, block] = nan_euclidean_distances(
+                    chunk, self.incomplete_X_[block]
+                )
+            incomplete_distances[np.isnan(incomplete_distances)] = np.inf
+
+        for column in np.flatnonzero(missing.any(axis=0)):
+            receivers = np.flatnonzero(missing[:, column])
+            distances, values, counts = [], [], []
+            if indexed is not None:
+                distances.append(indexed[0][receivers])
+                values.append(indexed[1][receivers, :, column])
+                counts.append(indexed[2][receivers])
+            if self.incomplete_X_.shape[0]:
+                shape = (receivers.size, self.incomplete_X_.shape[0])
+                distances.append(incomplete_distances[receivers])
+                values.append(np.broadcast_to(self.incomplete_X_[:, column], shape))
+                counts.append(np.ones(shape))
+            distances, values, counts = np.hstack(distances), np.hstack(values), np.hstack(counts)
+            ## donors without the column or without a shared present column are unreachable
+            unreachable = np.isnan(values) | ~np.isfinite(distances)
+            distances[unreachable] = np.inf
+            counts[unreachable] = 0.0
+
+            if distances.shape[1] > self.n_neighbors:
+                nearest = np.argpartition(distances, self.n_neighbors - 1, axis=1)
+                nearest = nearest[:, : self.n_neighbors]
+                distances = np.take_along_axis(distances, nearest, axis=1)
+                values = np.take_along_axis(values, nearest, axis=1)
+                counts = np.take_along_axis(counts, nearest, axis=1)
+            ## a deduplicated donor stands for counts rows, keep n_neighbors rows in total
+            order = np.argsort(distances, axis=1, kind="stable")
+            distances = np.take_along_axis(distances, order, axis=1)
+            values = np.take_along_axis(values, order, axis=1)
+            counts = np.take_along_axis(counts, order, axis=1)
+            taken_before = np.cumsum(counts, axis=1) - counts
+            counts = np.clip(self.n_neighbors - taken_before, 0.0, counts)
+
+            weights = self._weights(distances, counts)
+            total = weights.sum(axis=1)
+            weighted = (weights * np.nan_to_num(values)).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                X[rows[receivers], column] = np.where(
+                    total > 0, weighted / total, self.column_means_[column]
+                )
+
+    def transform(self, X) -> np.ndarray:
+        try:
+            X = self._to_array(X)
+            if not self.valid_mask_.all():
+                X = X[:, self.valid_mask_]
+            receivers = np.flatnonzero(np.isnan(X).any(axis=1))
+            chunk_rows, block_rows = self._chunk_sizes()
+            for start in range(0, receivers.size, chunk_rows):
+                self._impute_chunk(X, receivers[start : start + chunk_rows], block_rows)
+            return X
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def benchmark_knn_imputer(
+    n_rows: int = 200_000,
+    n_features: int = 30,
+    missing_share: float = 0.01,
+    reference_rows: int = 20_000,
+    seed: int = 42,
+) -> dict:
+    """
+    fit_transform time of ChunkedKNNImputer on -1/0/1 features with
+    missing_share of the rows missing one value. KNNImputer is timed on
+    reference_rows rows for comparison, it is quadratic in the row count.
+    """
+    try:
+        from sklearn.impute import KNNImputer
+
+        rng = np.random.default_rng(seed)
+        X = rng.choice(np.array([-1.0, 0.0, 1.0]), size=(n_rows, n_features))
+        missing_rows = rng.choice(n_rows, size=int(n_rows * missing_share), replace=False)
+        X[missing_rows, rng.integers(0, n_features, missing_rows.size)] = np.nan
+
+        start = time.perf_counter()
+        ChunkedKNNImputer(n_neighbors=3).fit_transform(X)
+        chunked_seconds = time.perf_counter() - start
+
+        sample = X[:reference_rows]
+        start = time.perf_counter()
+        expected = KNNImputer(n_neighbors=3).fit_transform(sample)
+        reference_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        imputed = ChunkedKNNImputer(n_neighbors=3).fit_transform(sample)
+        chunked_sample_seconds = time.perf_counter() - start
+
+        sample_missing = np.isnan(sample)
+        return {
+            "rows": n_rows,
+            "chunked_seconds": chunked_seconds,
+            "reference_rows": reference_rows,
+            "knn_imputer_seconds": reference_seconds,
+            "chunked_reference_seconds": chunked_sample_seconds,
+            ## imputed values can differ only where equally distant donors tie
+            "matching_imputations": float(
+                np.mean(np.isclose(expected[sample_missing], imputed[sample_missing]))
+            ),
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    for key, value in benchmark_knn_imputer().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy as np
+import sklearn
+from sklearn.base import clone
+
+from networksecurity.constant.training_pipeline import (
+    MODEL_CACHE_DIR,
+    MODEL_CACHE_MAX_SIZE_MB,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+
+
+def estimator_identity(estimator) -> list:
+    """
+    Class and full parameters of an estimator; nested estimators (pipeline
+    steps) appear through their repr
+    """
+    return [
+        f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+        sorted((name, repr(value)) for name, value in estimator.get_params(deep=False).items()),
+    ]
+
+
+class FittedModelCache:
+    """
+    Content addressed, on disk cache of fitted estimators and cv scores.
+
+    A key is the sha256 of the training data fingerprint, the estimator
+    class and its full parameters, the numpy and scikit-learn versions and
+    whatever else identifies the fit (fold, n_estimators path), so a run on
+    unchanged arrays with an unchanged grid fits nothing, and a changed grid
+    only fits the new combinations. Each entry is one pickle file written
+    atomically; reading an entry touches its mtime, and trim evicts the
+    least recently used entries until the cache fits in max_size_mb.
+    """
+
+    EXTENSION = ".pkl"
+
+    def __init__(
+        self, cache_dir: str = MODEL_CACHE_DIR, max_size_mb: float = MODEL_CACHE_MAX_SIZE_MB
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 2**20)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(*arrays) -> str:
+        """
+        sha256 over dtype, shape and bytes of every array
+        """
+        digest = hashlib.sha256()
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(memoryview(array).cast("B"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(kind: str, data_fingerprint: str, estimator, params: dict = None, **extra) -> str:
+        estimator = clone(estimator).set_params(**(params or {}))
+        identity = [
+            kind,
+            data_fingerprint,
+            *estimator_identity(estimator),
+            sorted((name, repr(value)) for name, value in extra.items()),
+            np.__version__,
+            sklearn.__version__,
+        ]
+        return hashlib.sha256(repr(identity).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.EXTENSION)
+
+    def get(self, key: str, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file_obj:
+                value = pickle.load(file_obj)
+            os.utime(path)
+            self.hits += 1
+            return value
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            ## written next to the entry and renamed, readers never see a partial pickle
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file_obj:
+                pickle.dump(value, file_obj)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _entries(self) -> list:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def trim(self) -> int:
+        """
+        Evicts least recently used entries above max_bytes, returns how many
+        """
+        try:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                evicted += 1
+            return evicted
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
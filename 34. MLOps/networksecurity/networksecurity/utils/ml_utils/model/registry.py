@@ -0,0 +1,292 @@
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from networksecurity.constant.training_pipeline import (
+    COMPILED_ENGINE_ENABLED,
+    FINAL_MODEL_CURRENT_FILE_NAME,
+    FINAL_MODEL_DIR,
+    FINAL_MODEL_FILE_NAME,
+    FINAL_MODEL_KEEP_VERSIONS,
+    FINAL_MODEL_MANIFEST_FILE_NAME,
+    FINAL_PREPROCESSOR_FILE_NAME,
+    MODEL_REGISTRY_POLL_INTERVAL,
+    MODEL_REGISTRY_USE_CHECKSUM,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.utils import (
+    load_object,
+    read_yaml_file,
+    save_object,
+    write_yaml_file,
+)
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+
+def file_checksum(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(file_path: str, content: str):
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w") as file_obj:
+        file_obj.write(content)
+        file_obj.flush()
+        os.fsync(file_obj.fileno())
+    os.replace(tmp_path, file_path)
+
+
+def published_version(model_dir: str = FINAL_MODEL_DIR) -> str:
+    """
+    Version named by the CURRENT file of model_dir, None before the first publish
+    """
+    current_file_path = os.path.join(model_dir, FINAL_MODEL_CURRENT_FILE_NAME)
+    if not os.path.exists(current_file_path):
+        return None
+    with open(current_file_path) as file_obj:
+        return file_obj.read().strip() or None
+
+
+def published_file_path(file_name: str, model_dir: str = FINAL_MODEL_DIR) -> str:
+    """
+    Path of file_name in the published version of model_dir
+    """
+    version = published_version(model_dir)
+    if version is None:
+        raise Exception(f"No model published in {model_dir}")
+    return os.path.join(model_dir, version, file_name)
+
+
+def publish_model(
+    network_model: NetworkModel,
+    version: str,
+    model_dir: str = FINAL_MODEL_DIR,
+    extra_files: dict = None,
+    keep_versions: int = FINAL_MODEL_KEEP_VERSIONS,
+) -> str:
+    """
+    Publish the preprocessor and model of network_model (and extra_files,
+    {file name: source path}) as model_dir/version.
+
+    Everything is written into a hidden staging directory, the manifest
+    with the checksum of every file last, and the directory is renamed to
+    its version. Only then the CURRENT file is swapped with one os.replace,
+    so a reader sees either the previous version or the complete new one.
+    Returns the version directory.
+    """
+    try:
+        os.makedirs(model_dir, exist_ok=True)
+        staging_dir = os.path.join(model_dir, f".{version}.staging")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        save_object(
+            os.path.join(staging_dir, FINAL_PREPROCESSOR_FILE_NAME),
+            network_model.preprocessor,
+        )
+        save_object(os.path.join(staging_dir, FINAL_MODEL_FILE_NAME), network_model.model)
+        for file_name, source_path in (extra_files or {}).items():
+            shutil.copyfile(source_path, os.path.join(staging_dir, file_name))
+
+        manifest = {
+            "version": version,
+            "published_at": time.time(),
+            "files": {
+                file_name: file_checksum(os.path.join(staging_dir, file_name))
+                for file_name in sorted(os.listdir(staging_dir))
+            },
+        }
+        write_yaml_file(os.path.join(staging_dir, FINAL_MODEL_MANIFEST_FILE_NAME), manifest)
+
+        version_dir = os.path.join(model_dir, version)
+        if os.path.exists(version_dir):
+            ## a resumed run publishes its version again
+            stale_dir = os.path.join(model_dir, f".{version}.stale")
+            shutil.rmtree(stale_dir, ignore_errors=True)
+            os.replace(version_dir, stale_dir)
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        os.replace(staging_dir, version_dir)
+
+        _write_atomic(os.path.join(model_dir, FINAL_MODEL_CURRENT_FILE_NAME), version)
+        logging.info(f"Published model version {version} to {version_dir}")
+        prune_versions(model_dir, keep_versions)
+        return version_dir
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def prune_versions(
+    model_dir: str = FINAL_MODEL_DIR, keep_versions: int = FINAL_MODEL_KEEP_VERSIONS
+):
+    """
+    Delete all but the keep_versions newest published versions, never the current one
+    """
+    try:
+        current = published_version(model_dir)
+        versions = [
+            entry.name
+            for entry in os.scandir(model_dir)
+            if entry.is_dir()
+            and not entry.name.startswith(".")
+            and os.path.exists(os.path.join(entry.path, FINAL_MODEL_MANIFEST_FILE_NAME))
+        ]
+        versions.sort(
+            key=lambda name: os.path.getmtime(
+                os.path.join(model_dir, name, FINAL_MODEL_MANIFEST_FILE_NAME)
+            ),
+            reverse=True,
+        )
+        for name in versions[keep_versions:]:
+            if name != current:
+                shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    network_model: NetworkModel
+    version: str
+    ## mtime of the manifest, a resumed run publishes its version again
+    published_at: int
+    loaded_at: float
+
+
+class ModelRegistry:
+    """
+    Process wide holder of the serving NetworkModel.
+
+    The preprocessor and model are unpickled once and served from memory. A
+    daemon thread watches the CURRENT file of the model directory and, when
+    another version is published, loads that version's pair in the
+    background and swaps it in with a single reference assignment, so
+    requests in flight keep the model they already fetched. Published
+    versions are never modified, a version without its manifest is ignored.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = FINAL_MODEL_DIR,
+        poll_interval: float = MODEL_REGISTRY_POLL_INTERVAL,
+        use_checksum: bool = MODEL_REGISTRY_USE_CHECKSUM,
+    ):
+        try:
+            self.model_dir = model_dir
+            self.poll_interval = poll_interval
+            self.use_checksum = use_checksum
+            self._current: LoadedModel = None
+            self._load_lock = threading.Lock()
+            self._stop_event = threading.Event()
+            self._watcher: threading.Thread = None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _read_manifest(self, version_dir: str) -> dict:
+        manifest_file_path = os.path.join(version_dir, FINAL_MODEL_MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_file_path):
+            raise Exception(f"Model version {version_dir} is incomplete, it has no manifest")
+        manifest = read_yaml_file(manifest_file_path)
+        for file_name in (FINAL_PREPROCESSOR_FILE_NAME, FINAL_MODEL_FILE_NAME):
+            if file_name not in manifest["files"]:
+                raise Exception(f"Model version {version_dir} has no {file_name}")
+        if self.use_checksum:
+            for file_name, checksum in manifest["files"].items():
+                if file_checksum(os.path.join(version_dir, file_name)) != checksum:
+                    raise Exception(f"Checksum of {file_name} in {version_dir} does not match")
+        return manifest
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the published version if it is not the served one.
+        Returns True when a new model was swapped in.
+        """
+        try:
+            with self._load_lock:
+                version = published_version(self.model_dir)
+                if version is None:
+                    raise Exception(f"No model published in {self.model_dir}")
+                version_dir = os.path.join(self.model_dir, version)
+                manifest_file_path = os.path.join(version_dir, FINAL_MODEL_MANIFEST_FILE_NAME)
+                published_at = (
+                    os.stat(manifest_file_path).st_mtime_ns
+                    if os.path.exists(manifest_file_path)
+                    else None
+                )
+                if (
+                    self._current is not None
+                    and self._current.version == version
+                    and self._current.published_at == published_at
+                ):
+                    return False
+
+                self._read_manifest(version_dir)
+                preprocessor = load_object(
+                    os.path.join(version_dir, FINAL_PREPROCESSOR_FILE_NAME)
+                )
+                model = load_object(os.path.join(version_dir, FINAL_MODEL_FILE_NAME))
+
+                network_model = NetworkModel(preprocessor=preprocessor, model=model)
+                if COMPILED_ENGINE_ENABLED:
+                    network_model.compile()
+
+                self._current = LoadedModel(
+                    network_model=network_model,
+                    version=version,
+                    published_at=published_at,
+                    loaded_at=time.time(),
+                )
+                logging.info(f"Model registry loaded model version {version}")
+                return True
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_model(self) -> NetworkModel:
+        try:
+            current = self._current
+            if current is None:
+                self.reload_if_changed()
+                current = self._current
+            if current is None:
+                raise Exception("Model artifacts are not available yet")
+            return current.network_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _watch(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                ## keep serving the previous model until a valid one appears
+                logging.info(f"Model registry reload failed: {e}")
+
+    def start(self):
+        try:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logging.info(f"Model registry initial load failed: {e}")
+            self._stop_event.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, name="model-registry-watcher", daemon=True
+            )
+            self._watcher.start()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,523 @@
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import accuracy_score, r2_score
+from sklearn.model_selection import ParameterGrid, check_cv
+
+from networksecurity.constant.training_pipeline import (
+    MODEL_TRAINER_SEARCH_CV,
+    MODEL_TRAINER_SEARCH_N_JOBS,
+    MODEL_TRAINER_SEARCH_PATH_AWARE,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.model.model_cache import FittedModelCache
+
+
+## parameter whose smaller values are prefixes of the model fitted at its largest value
+PATH_PARAM = "n_estimators"
+
+
+@dataclass
+class SearchTask:
+    """
+    One fit on one fold. A path task fits params once along path, the
+    PATH_PARAM values of candidates, and scores every candidate.
+    """
+
+    family: str
+    candidates: List[int]
+    fold: int
+    params: dict
+    path: Optional[List[int]] = None
+    cost: float = 1.0
+
+
+@lru_cache(maxsize=8)
+def _shared_array(file_path: str) -> np.ndarray:
+    ## opened once per worker process, the pages are shared through the os cache
+    return np.load(file_path, mmap_mode="r")
+
+
+def _npy_file(array) -> Optional[str]:
+    """
+    Path of the .npy file array was memory mapped from by np.load, None for
+    in memory arrays and views, which have to be written out first
+    """
+    ## a view of a memmap has the memmap, not the mmap, as base
+    if not isinstance(array, np.memmap) or not isinstance(array.base, mmap.mmap):
+        return None
+    if not array.filename or not array.filename.endswith(".npy"):
+        return None
+    try:
+        mapped = np.load(array.filename, mmap_mode="r")
+    except Exception:
+        return None
+    same = (mapped.shape, mapped.dtype, mapped.offset) == (array.shape, array.dtype, array.offset)
+    return array.filename if same and array.flags.c_contiguous else None
+
+
+def _timed(function, *args) -> dict:
+    start, start_cpu = time.time(), time.process_time()
+    try:
+        result, error = function(*args), None
+    except Exception as e:
+        result, error = None, repr(e)
+    return {
+        "result": result,
+        "error": error,
+        "start": start,
+        "end": time.time(),
+        "cpu_seconds": time.process_time() - start_cpu,
+        "pid": os.getpid(),
+    }
+
+
+def path_method(estimator) -> Optional[str]:
+    """
+    "staged" for boosting models, whose staged_predict gives the prediction
+    of every prefix of the ensemble, "warm_start" for models that can grow
+    more estimators onto a fitted ensemble, else None
+    """
+    params = estimator.get_params()
+    if PATH_PARAM not in params:
+        return None
+    if hasattr(estimator, "staged_predict"):
+        return "staged"
+    if "warm_start" in params:
+        return "warm_start"
+    return None
+
+
+def _score(estimator, y_true, y_pred) -> float:
+    ## the default estimator.score of GridSearchCV
+    if is_classifier(estimator):
+        return float(accuracy_score(y_true, y_pred))
+    return float(r2_score(y_true, y_pred))
+
+
+def _fit_and_score(
+    estimator, params: dict, path: Optional[List[int]], X_path: str, y_path: str, train, test
+) -> List[float]:
+    X, y = _shared_array(X_path), _shared_array(y_path)
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    model = clone(estimator).set_params(**params)
+    if path is None:
+        model.fit(X_train, y_train)
+        return [float(model.score(X_test, y_test))]
+
+    scores = {}
+    if path_method(model) == "staged":
+        ## boosting stages only depend on the earlier ones, stage n predicts like a model of n
+        model.set_params(**{PATH_PARAM: max(path)}).fit(X_train, y_train)
+        wanted = set(path)
+        y_pred = None
+        for stage, y_pred in enumerate(model.staged_predict(X_test), start=1):
+            if stage in wanted:
+                scores[stage] = _score(model, y_test, y_pred)
+        ## boosting that stops early keeps predicting with its last stage
+        for n_estimators in wanted - set(scores):
+            scores[n_estimators] = _score(model, y_test, y_pred)
+    else:
+        ## a warm started forest draws the seeds of the new trees after the old ones
+        model.set_params(warm_start=True)
+        for n_estimators in sorted(set(path)):
+            model.set_params(**{PATH_PARAM: n_estimators}).fit(X_train, y_train)
+            scores[n_estimators] = float(model.score(X_test, y_test))
+    return [scores[n_estimators] for n_estimators in path]
+
+
+def _refit(estimator, params: dict, X_path: str, y_path: str):
+    X, y = _shared_array(X_path), _shared_array(y_path)
+    return clone(estimator).set_params(**params).fit(np.array(X), np.array(y))
+
+
+class ParallelModelSearch:
+    """
+    Grid search over several model families on one shared process pool.
+
+    Every (family, candidate params, cv fold) fit is a task of a single
+    flat queue, so a cheap family does not leave cores idle while an
+    expensive one runs, and the best candidate of every family is then
+    refit on the same pool. Tasks are dispatched longest first, estimated
+    by n_estimators. X and y are written once to a temporary folder and
+    every worker memory maps them, tasks only carry the fold indices.
+
+    Candidates are scored like GridSearchCV(model, params, cv=cv): same
+    folds, estimator.score, best mean fold score with ties going to the
+    first candidate, and a failed fit scores NaN.
+
+    With path_aware, candidates that only differ in n_estimators share one
+    fit per fold: boosting models are fit at the largest value and scored
+    at every smaller one through staged_predict, forests are grown with
+    warm_start and scored after each increment. The scores are the ones of
+    separate fits (with a fixed random_state, identical).
+
+    With a FittedModelCache, fold scores and refit estimators of earlier
+    searches on the same data are reused and only the missing fits run.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, object],
+        param: Dict[str, dict],
+        cv: int = MODEL_TRAINER_SEARCH_CV,
+        n_jobs: int = MODEL_TRAINER_SEARCH_N_JOBS,
+        temp_folder: str = None,
+        path_aware: bool = MODEL_TRAINER_SEARCH_PATH_AWARE,
+        cache: FittedModelCache = None,
+    ):
+        self.models = models
+        self.param = param
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.temp_folder = temp_folder
+        self.path_aware = path_aware
+        self.cache = cache
+
+    @staticmethod
+    def _task_cost(model, params: dict) -> float:
+        return float(clone(model).set_params(**params).get_params().get(PATH_PARAM, 1))
+
+    def _family_tasks(self, name: str, grid: List[dict]) -> List[tuple]:
+        """
+        (candidate indices, params, path) per fit, grouping candidates along
+        PATH_PARAM when the model supports it
+        """
+        model = self.models[name]
+        path_values = {params.get(PATH_PARAM) for params in grid}
+        if not self.path_aware or path_method(model) is None or len(path_values) < 2:
+            return [([i], params, None) for i, params in enumerate(grid)]
+
+        groups = defaultdict(list)
+        for i, params in enumerate(grid):
+            rest = {key: value for key, value in params.items() if key != PATH_PARAM}
+            groups[repr(sorted(rest.items()))].append((i, rest))
+        fits = []
+        for members in groups.values():
+            indices = [i for i, _ in members]
+            path = [
+                grid[i].get(PATH_PARAM, model.get_params()[PATH_PARAM]) for i in indices
+            ]
+            fits.append((indices, members[0][1], path))
+        return fits
+
+    def _tasks(self, candidates: Dict[str, List[dict]], n_folds: Dict[str, int]) -> List[SearchTask]:
+        tasks = []
+        for name, grid in candidates.items():
+            for indices, params, path in self._family_tasks(name, grid):
+                cost_params = params if path is None else {**params, PATH_PARAM: max(path)}
+                cost = self._task_cost(self.models[name], cost_params)
+                tasks.extend(
+                    SearchTask(name, indices, fold, params, path, cost)
+                    for fold in range(n_folds[name])
+                )
+        return sorted(tasks, key=lambda task: -task.cost)
+
+    def _task_keys(self, task: SearchTask, data_fingerprint: str, test) -> List[str]:
+        """
+        One key per candidate and fold, so a path task can reuse the scores
+        of separate fits and the other way round
+        """
+        fold = self.cache.fingerprint(test)
+        candidate_params = (
+            [task.params]
+            if task.path is None
+            else [{**task.params, PATH_PARAM: value} for value in task.path]
+        )
+        return [
+            self.cache.key("cv", data_fingerprint, self.models[task.family], params, fold=fold)
+            for params in candidate_params
+        ]
+
+    def _record(self, family: str, outcome: dict):
+        timing = self._timings[family]
+        timing["start"] = min(timing.get("start", np.inf), outcome["start"])
+        timing["end"] = max(timing.get("end", -np.inf), outcome["end"])
+        timing["cpu_seconds"] = timing.get("cpu_seconds", 0.0) + outcome["cpu_seconds"]
+        timing["tasks"] = timing.get("tasks", 0) + 1
+
+    def fit(self, X, y) -> "ParallelModelSearch":
+        """
+        X and y memory mapped from .npy files (np.load with mmap_mode) are
+        mapped by the workers directly, other arrays are first saved to
+        temp_folder
+        """
+        try:
+            X_file, y_file = _npy_file(X), _npy_file(y)
+            X, y = np.asarray(X), np.asarray(y)
+            self.n_workers_ = effective_n_jobs(self.n_jobs)
+            self._timings = defaultdict(dict)
+            candidates = {name: list(ParameterGrid(self.param[name])) for name in self.models}
+            folds = {
+                name: list(check_cv(self.cv, y, classifier=is_classifier(model)).split(X, y))
+                for name, model in self.models.items()
+            }
+            tasks = self._tasks(candidates, {name: len(f) for name, f in folds.items()})
+            scores = {
+                name: np.full((len(grid), len(folds[name])), np.nan)
+                for name, grid in candidates.items()
+            }
+
+            start = time.time()
+            self.cache_hits_ = defaultdict(int)
+            task_keys = {}
+            if self.cache is not None:
+                data_fingerprint = self.cache.fingerprint(X, y)
+                pending = []
+                for task in tasks:
+                    keys = self._task_keys(task, data_fingerprint, folds[task.family][task.fold][1])
+                    cached = [self.cache.get(key) for key in keys]
+                    if any(score is None for score in cached):
+                        task_keys[id(task)] = keys
+                        pending.append(task)
+                    else:
+                        scores[task.family][task.candidates, task.fold] = cached
+                        self.cache_hits_[task.family] += 1
+                tasks = pending
+            folder = tempfile.mkdtemp(prefix="model_search_", dir=self.temp_folder)
+            try:
+                X_path = X_file or os.path.join(folder, "X.npy")
+                y_path = y_file or os.path.join(folder, "y.npy")
+                if X_file is None:
+                    np.save(X_path, X)
+                if y_file is None:
+                    np.save(y_path, y)
+                with Parallel(n_jobs=self.n_workers_, batch_size=1) as parallel:
+                    outcomes = parallel(
+                        delayed(_timed)(
+                            _fit_and_score,
+                            self.models[task.family],
+                            task.params,
+                            task.path,
+                            X_path,
+                            y_path,
+                            *folds[task.family][task.fold],
+                        )
+                        for task in tasks
+                    )
+                    self.errors_ = []
+                    for task, outcome in zip(tasks, outcomes):
+                        self._record(task.family, outcome)
+                        if outcome["error"] is None:
+                            scores[task.family][task.candidates, task.fold] = outcome["result"]
+                            for key, score in zip(task_keys.get(id(task), []), outcome["result"]):
+                                self.cache.put(key, score)
+                        else:
+                            self.errors_.append((task.family, task.params, outcome["error"]))
+
+                    self.cv_results_ = {}
+                    self.best_params_ = {}
+                    self.best_score_ = {}
+                    for name, grid in candidates.items():
+                        mean_scores = scores[name].mean(axis=1)
+                        if np.isnan(mean_scores).all():
+                            raise ValueError(f"Every candidate of {name} failed: {self.errors_}")
+                        best = int(np.nanargmax(mean_scores))
+                        self.cv_results_[name] = {
+                            "params": grid,
+                            "split_test_scores": scores[name],
+                            "mean_test_score": mean_scores,
+                        }
+                        self.best_params_[name] = grid[best]
+                        self.best_score_[name] = float(mean_scores[best])
+
+                    self.best_estimators_ = {}
+                    refit_keys = {}
+                    for name in self.models:
+                        if self.cache is None:
+                            continue
+                        key = self.cache.key(
+                            "refit", data_fingerprint, self.models[name], self.best_params_[name]
+                        )
+                        cached = self.cache.get(key)
+                        if cached is None:
+                            refit_keys[name] = key
+                        else:
+                            self.best_estimators_[name] = cached
+                            self.cache_hits_[name] += 1
+                    names = [name for name in self.models if name not in self.best_estimators_]
+                    refits = parallel(
+                        delayed(_timed)(
+                            _refit, self.models[name], self.best_params_[name], X_path, y_path
+                        )
+                        for name in names
+                    )
+            finally:
+                _shared_array.cache_clear()
+                shutil.rmtree(folder, ignore_errors=True)
+
+            for name, outcome in zip(names, refits):
+                if outcome["error"] is not None:
+                    raise ValueError(f"Refit of {name} failed: {outcome['error']}")
+                self._record(name, outcome)
+                self.best_estimators_[name] = outcome["result"]
+                if name in refit_keys:
+                    self.cache.put(refit_keys[name], outcome["result"])
+            self.best_estimators_ = {name: self.best_estimators_[name] for name in self.models}
+            if self.cache is not None:
+                self.cache.trim()
+            self.wall_seconds_ = time.time() - start
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def report(self) -> dict:
+        """
+        Wall clock seconds, cpu seconds and core utilization per family and
+        for the whole search. A family's wall time spans its first task
+        start to its last task end, so families overlap; cores_used is its
+        cpu time over that span and utilization the share of the pool.
+        Fits served by the cache count as cache_hits, not tasks.
+        """
+        families = {}
+        total_cpu = 0.0
+        for name in self.models:
+            timing = self._timings.get(name) or {"start": 0.0, "end": 0.0, "cpu_seconds": 0.0}
+            wall = max(timing["end"] - timing["start"], 1e-9)
+            total_cpu += timing["cpu_seconds"]
+            families[name] = {
+                "tasks": timing.get("tasks", 0),
+                "cache_hits": self.cache_hits_.get(name, 0),
+                "best_params": self.best_params_[name],
+                "best_score": self.best_score_[name],
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(timing["cpu_seconds"], 3),
+                "cores_used": round(timing["cpu_seconds"] / wall, 3),
+                "utilization": round(timing["cpu_seconds"] / wall / self.n_workers_, 3),
+            }
+        return {
+            "workers": self.n_workers_,
+            "wall_seconds": round(self.wall_seconds_, 3),
+            "cpu_seconds": round(total_cpu, 3),
+            "utilization": round(total_cpu / self.wall_seconds_ / self.n_workers_, 3),
+            "failed_fits": len(self.errors_),
+            "families": families,
+        }
+
+
+def benchmark_model_search(n_rows: int = 5_000, n_features: int = 30, seed: int = 42) -> dict:
+    """
+    ParallelModelSearch against the sequential GridSearchCV loop of
+    evaluate_models on -1/0/1 features, with a reduced version of the
+    ModelTrainer grids
+    """
+    try:
+        from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.model_selection import GridSearchCV
+        from sklearn.tree import DecisionTreeClassifier
+
+        rng = np.random.default_rng(seed)
+        X = rng.choice(np.array([-1.0, 0.0, 1.0]), size=(n_rows, n_features))
+        y = np.where(X[:, :5].sum(axis=1) + rng.normal(0, 1, n_rows) > 0, 1.0, 0.0)
+        models = {
+            "Random Forest": RandomForestClassifier(random_state=seed),
+            "Decision Tree": DecisionTreeClassifier(random_state=seed),
+            "Logistic Regression": LogisticRegression(),
+            "AdaBoost": AdaBoostClassifier(random_state=seed),
+        }
+        param = {
+            "Random Forest": {"n_estimators": [8, 16, 32, 64]},
+            "Decision Tree": {"criterion": ["gini", "entropy", "log_loss"]},
+            "Logistic Regression": {},
+            "AdaBoost": {"learning_rate": [0.1, 0.01], "n_estimators": [8, 16, 32, 64]},
+        }
+
+        start = time.perf_counter()
+        sequential_params = {}
+        for name, model in models.items():
+            gs = GridSearchCV(model, param[name], cv=MODEL_TRAINER_SEARCH_CV).fit(X, y)
+            sequential_params[name] = gs.best_params_
+            clone(model).set_params(**gs.best_params_).fit(X, y)
+        sequential_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        search = ParallelModelSearch(models, param).fit(X, y)
+        shared_pool_seconds = time.perf_counter() - start
+
+        return {
+            "rows": n_rows,
+            "fits": sum(timing["tasks"] for timing in search.report()["families"].values()),
+            "sequential_seconds": sequential_seconds,
+            "shared_pool_seconds": shared_pool_seconds,
+            "speedup": sequential_seconds / shared_pool_seconds,
+            "same_best_params": {
+                name: search.best_params_[name] == sequential_params[name]
+                for name in models
+            },
+            "search_report": search.report(),
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def benchmark_path_search(n_rows: int = 5_000, n_features: int = 30, seed: int = 42) -> dict:
+    """
+    Path aware search against one fit per n_estimators value on the
+    ModelTrainer n_estimators grids, with seeded models so that the cv
+    scores of both searches must be identical
+    """
+    try:
+        from sklearn.ensemble import (
+            AdaBoostClassifier,
+            GradientBoostingClassifier,
+            RandomForestClassifier,
+        )
+
+        rng = np.random.default_rng(seed)
+        X = rng.choice(np.array([-1.0, 0.0, 1.0]), size=(n_rows, n_features))
+        y = np.where(X[:, :5].sum(axis=1) + rng.normal(0, 1, n_rows) > 0, 1.0, 0.0)
+        n_estimators = [8, 16, 32, 64, 128, 256]
+        models = {
+            "Random Forest": RandomForestClassifier(random_state=seed),
+            "Gradient Boosting": GradientBoostingClassifier(random_state=seed),
+            "AdaBoost": AdaBoostClassifier(random_state=seed),
+        }
+        param = {
+            "Random Forest": {"n_estimators": n_estimators[:-1]},
+            "Gradient Boosting": {"subsample": [0.7, 0.9], "n_estimators": n_estimators},
+            "AdaBoost": {"learning_rate": [0.1, 0.01], "n_estimators": n_estimators},
+        }
+
+        timings, searches = {}, {}
+        for path_aware in (False, True):
+            start = time.perf_counter()
+            searches[path_aware] = ParallelModelSearch(models, param, path_aware=path_aware).fit(
+                X, y
+            )
+            timings[path_aware] = time.perf_counter() - start
+
+        return {
+            "rows": n_rows,
+            "per_value_seconds": timings[False],
+            "path_aware_seconds": timings[True],
+            "speedup": timings[False] / timings[True],
+            "identical_scores": {
+                name: bool(
+                    np.array_equal(
+                        searches[False].cv_results_[name]["split_test_scores"],
+                        searches[True].cv_results_[name]["split_test_scores"],
+                    )
+                )
+                for name in models
+            },
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    benchmark = benchmark_path_search if "path" in sys.argv[1:] else benchmark_model_search
+    for key, value in benchmark().items():
+        print(f"{key}: {value}")
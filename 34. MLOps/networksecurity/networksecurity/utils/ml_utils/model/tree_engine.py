@@ -0,0 +1,300 @@
+import sys
+import time
+
+import numpy as np
+from scipy.special import expit
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    GradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.extmath import softmax
+
+from networksecurity.constant.training_pipeline import COMPILED_ENGINE_BATCH_ROWS
+from networksecurity.exception.exception import NetworkSecurityException
+
+
+class CompiledTreeEnsemble:
+    """
+    Tree ensemble flattened into contiguous node arrays.
+
+    All trees are evaluated together, one tree level per step, over a whole
+    batch. Inputs are cast to float32 and compared against the float64
+    thresholds exactly like sklearn, and leaf contributions are summed
+    sequentially in tree order (np.cumsum), so outputs are bit for bit the
+    ones of the source estimator.
+
+    kind is "forest" (averaged leaf probabilities, also used for a single
+    DecisionTreeClassifier) or "boosting" (init raw score plus
+    learning_rate times the leaf value of every stage).
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        classes: np.ndarray,
+        n_features: int,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        missing_go_to_left: np.ndarray,
+        value: np.ndarray,
+        is_leaf: np.ndarray,
+        tree_class: np.ndarray = None,
+        init_raw: np.ndarray = None,
+        learning_rate: float = None,
+        batch_rows: int = COMPILED_ENGINE_BATCH_ROWS,
+    ):
+        self.kind = kind
+        self.classes_ = classes
+        self.n_features = n_features
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        ## left and right child of node i at 2 * i and 2 * i + 1
+        self.children = children
+        self.missing_go_to_left = missing_go_to_left
+        self.value = value
+        self.is_leaf = is_leaf
+        self.tree_class = tree_class
+        self.init_raw = init_raw
+        self.learning_rate = learning_rate
+        self.batch_rows = batch_rows
+
+    @staticmethod
+    def _flatten_trees(trees: list) -> dict:
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        feature, threshold, left, right, missing, value, leaf = ([] for _ in range(7))
+        for offset, tree in zip(offsets[:-1], trees):
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            leaf.append(is_leaf)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            value.append(tree.value[:, 0, :])
+        return dict(
+            roots=np.ascontiguousarray(offsets[:-1], dtype=np.intp),
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            children=np.ascontiguousarray(
+                np.column_stack([np.concatenate(left), np.concatenate(right)]).ravel(),
+                dtype=np.intp,
+            ),
+            missing_go_to_left=np.ascontiguousarray(np.concatenate(missing)),
+            value=np.concatenate(value).astype(np.float64),
+            is_leaf=np.concatenate(leaf),
+        )
+
+    @classmethod
+    def from_estimator(cls, estimator) -> "CompiledTreeEnsemble":
+        """
+        Export a fitted RandomForest/ExtraTrees/DecisionTree or
+        GradientBoosting classifier. Raises for anything else.
+        """
+        if getattr(estimator, "n_outputs_", 1) != 1:
+            raise ValueError("Only single output estimators can be compiled")
+
+        if isinstance(
+            estimator,
+            (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier),
+        ):
+            trees = (
+                [estimator.tree_]
+                if isinstance(estimator, DecisionTreeClassifier)
+                else [tree.tree_ for tree in estimator.estimators_]
+            )
+            arrays = cls._flatten_trees(trees)
+            ## predict_proba of a tree normalises the leaf values per row
+            value = arrays["value"]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            arrays["value"] = value / normalizer
+            return cls(
+                kind="forest",
+                classes=estimator.classes_,
+                n_features=estimator.n_features_in_,
+                **arrays,
+            )
+
+        if isinstance(estimator, GradientBoostingClassifier):
+            if estimator.loss != "log_loss":
+                raise ValueError(f"Unsupported boosting loss {estimator.loss}")
+            if not (
+                estimator.init_ == "zero" or isinstance(estimator.init_, DummyClassifier)
+            ):
+                raise ValueError("Only constant init estimators can be compiled")
+            n_stages, n_trees_per_stage = estimator.estimators_.shape
+            trees = [
+                estimator.estimators_[stage, k].tree_
+                for stage in range(n_stages)
+                for k in range(n_trees_per_stage)
+            ]
+            arrays = cls._flatten_trees(trees)
+            arrays["value"] = np.ascontiguousarray(arrays["value"][:, 0])
+            ## the init estimator predicts the same raw score for every row
+            init_raw = estimator._raw_predict_init(
+                np.zeros((1, estimator.n_features_in_), dtype=np.float32)
+            )[0]
+            return cls(
+                kind="boosting",
+                classes=estimator.classes_,
+                n_features=estimator.n_features_in_,
+                tree_class=np.tile(np.arange(n_trees_per_stage), n_stages),
+                init_raw=np.asarray(init_raw, dtype=np.float64),
+                learning_rate=float(estimator.learning_rate),
+                **arrays,
+            )
+
+        raise ValueError(f"Unsupported estimator {type(estimator).__name__}")
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Leaf index of every (row, tree) pair in the flattened node arrays.
+        Each step advances only the pairs still sitting on an internal node.
+        """
+        n_samples, n_trees = X.shape[0], self.roots.shape[0]
+        values = X.ravel()
+        has_missing = np.isnan(values).any()
+        nodes = np.tile(self.roots, n_samples)
+        row_offsets = np.repeat(np.arange(n_samples) * X.shape[1], n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            x = values[row_offsets[active] + self.feature[current]]
+            go_right = ~(x <= self.threshold[current])
+            if has_missing:
+                go_right = np.where(
+                    np.isnan(x), ~self.missing_go_to_left[current], go_right
+                )
+            current = self.children[2 * current + go_right]
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_samples, n_trees)
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.apply(X)
+        if self.kind == "forest":
+            ## sequential sum over trees, then average, as ForestClassifier does
+            proba = np.cumsum(self.value[leaves], axis=1)[:, -1]
+            proba /= leaves.shape[1]
+            return proba
+
+        n_classes = self.init_raw.shape[0]
+        contributions = self.learning_rate * self.value[leaves]
+        raw = np.empty((X.shape[0], n_classes), dtype=np.float64)
+        for k in range(n_classes):
+            stage_values = contributions[:, self.tree_class == k]
+            init = np.full((X.shape[0], 1), self.init_raw[k])
+            raw[:, k] = np.cumsum(np.hstack([init, stage_values]), axis=1)[:, -1]
+        return raw
+
+    def _predict_scores(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_samples, {self.n_features})"
+            )
+        return np.concatenate(
+            [
+                self._predict_chunk(X[start : start + self.batch_rows])
+                for start in range(0, max(X.shape[0], 1), self.batch_rows)
+            ]
+        )
+
+    def decision_function(self, X) -> np.ndarray:
+        if self.kind != "boosting":
+            raise ValueError("decision_function is only defined for boosting")
+        raw = self._predict_scores(X)
+        return raw.ravel() if raw.shape[1] == 1 else raw
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self._predict_scores(X)
+        if self.kind == "forest":
+            return scores
+        if scores.shape[1] == 1:
+            proba = np.empty((scores.shape[0], 2), dtype=np.float64)
+            proba[:, 1] = expit(scores[:, 0])
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+        return softmax(scores, copy=False)
+
+    def predict(self, X) -> np.ndarray:
+        scores = self._predict_scores(X)
+        if self.kind == "boosting" and scores.shape[1] == 1:
+            return self.classes_[(scores[:, 0] >= 0).astype(int)]
+        return self.classes_.take(np.argmax(scores, axis=1), axis=0)
+
+
+def compile_tree_ensemble(estimator) -> CompiledTreeEnsemble:
+    """
+    Export estimator to a CompiledTreeEnsemble, or None when it is not supported
+    """
+    try:
+        return CompiledTreeEnsemble.from_estimator(estimator)
+    except ValueError:
+        return None
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def benchmark_tree_engine(
+    estimator, X: np.ndarray, batch_sizes=(1, 8, 64, 512, 4096), repeats: int = 20
+) -> list:
+    """
+    Median latency and throughput of sklearn predict vs the compiled engine
+    for every batch size, checking both produce identical labels.
+    """
+    try:
+        engine = CompiledTreeEnsemble.from_estimator(estimator)
+        results = []
+        for batch_size in batch_sizes:
+            batch = X[np.arange(batch_size) % X.shape[0]]
+            if not np.array_equal(engine.predict(batch), estimator.predict(batch)):
+                raise ValueError(f"Compiled engine mismatch at batch size {batch_size}")
+            row = {"batch_size": batch_size}
+            for name, predict in (
+                ("sklearn", estimator.predict),
+                ("compiled", engine.predict),
+            ):
+                timings = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    predict(batch)
+                    timings.append(time.perf_counter() - start)
+                latency = float(np.median(timings))
+                row[f"{name}_latency_ms"] = latency * 1000
+                row[f"{name}_rows_per_sec"] = batch_size / latency
+            results.append(row)
+        return results
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from networksecurity.constant.training_pipeline import TARGET_COLUMN
+
+    data = pd.read_csv("Network_Data/phisingData.csv")
+    X = data.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y = data[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    for estimator in (
+        RandomForestClassifier(n_estimators=128, random_state=42),
+        GradientBoostingClassifier(n_estimators=128, random_state=42),
+    ):
+        estimator.fit(X, y)
+        print(type(estimator).__name__)
+        for row in benchmark_tree_engine(estimator, X):
+            print(
+                "batch {batch_size:>5}: sklearn {sklearn_latency_ms:8.3f} ms "
+                "{sklearn_rows_per_sec:>12.0f} rows/s | compiled "
+                "{compiled_latency_ms:8.3f} ms {compiled_rows_per_sec:>12.0f} rows/s".format(
+                    **row
+                )
+            )
@@ -1,11 +1,20 @@
 import os
 import sys
 import json
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 import certifi
+import numpy as np
 import pandas as pd
 import pymongo
+from bson import ObjectId
+from networksecurity.constant.training_pipeline import (
+    DATA_INGESTION_BULK_LOAD_COLLECTION_SUFFIX,
+)
 from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
 
 load_dotenv()
 
@@ -46,11 +55,200 @@ class NetworkDataExtract:
             raise NetworkSecurityException(e, sys)
 
 
+class NetworkDataBulkLoader:
+    """
+    Streams a csv into mongodb in chunks, inserting them concurrently with
+    ordered=False over one pooled client.
+
+    Every row gets a deterministic ObjectId built from the load's start time,
+    a random load nonce and the row number, so re-inserting a chunk after a
+    crash only hits duplicate key errors, which are counted and ignored. The
+    checkpoint file records the load identity and the finished chunks; a
+    rerun with the same checkpoint skips them.
+
+    All rows of a load carry its start time, also when the load is resumed
+    much later, and chunks land out of row order. The load is therefore
+    registered in the <collection>_bulk_loads collection until it finishes,
+    and incremental ingestion does not read past the start of a registered
+    load, which keeps its watermark below every row still to come. An
+    interrupted load holds ingestion back until it is resumed to the end
+    (or its entry is deleted).
+    """
+
+    DUPLICATE_KEY_ERROR = 11000
+
+    def __init__(
+        self,
+        mongo_url: str = MONGO_DB_URL,
+        chunksize: int = 10_000,
+        max_workers: int = 4,
+        mongo_client: pymongo.MongoClient = None,
+    ):
+        try:
+            self.chunksize = chunksize
+            self.max_workers = max_workers
+            self.mongo_client = mongo_client or pymongo.MongoClient(
+                mongo_url, maxPoolSize=max_workers
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def documents_from_chunk(chunk: pd.DataFrame, ids: list) -> list:
+        columns = ["_id"] + list(chunk.columns)
+        values = [ids]
+        for column in chunk.columns:
+            array = chunk[column].to_numpy()
+            if array.dtype.kind == "f" and np.isnan(array).any():
+                array = np.where(np.isnan(array), None, array)
+            values.append(array.tolist())
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    @staticmethod
+    def make_ids(started_at: int, nonce: int, first_row: int, rows: int) -> list:
+        prefix = started_at.to_bytes(4, "big") + nonce.to_bytes(2, "big")
+        return [
+            ObjectId(prefix + row.to_bytes(6, "big"))
+            for row in range(first_row, first_row + rows)
+        ]
+
+    def insert_chunk(self, collection, documents: list) -> tuple:
+        try:
+            result = collection.insert_many(documents, ordered=False)
+            return len(result.inserted_ids), 0
+        except pymongo.errors.BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = sum(
+                error.get("code") == self.DUPLICATE_KEY_ERROR for error in errors
+            )
+            if duplicates != len(errors):
+                raise
+            return e.details.get("nInserted", 0), duplicates
+
+    @staticmethod
+    def read_checkpoint(checkpoint_path: str) -> dict:
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r") as file_obj:
+                return json.load(file_obj)
+        return None
+
+    @staticmethod
+    def write_checkpoint(checkpoint_path: str, checkpoint: dict):
+        if not checkpoint_path:
+            return
+        with open(checkpoint_path + ".tmp", "w") as file_obj:
+            json.dump(checkpoint, file_obj)
+        os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+    def load(
+        self, file_path: str, database: str, collection: str, checkpoint_path: str = None
+    ) -> dict:
+        try:
+            checkpoint = self.read_checkpoint(checkpoint_path)
+            if checkpoint is None or checkpoint["file_path"] != file_path:
+                checkpoint = {
+                    "file_path": file_path,
+                    "chunksize": self.chunksize,
+                    "started_at": int(time.time()),
+                    "nonce": int.from_bytes(os.urandom(2), "big"),
+                    "completed_chunks": [],
+                }
+                ## before any insert, so a resume after a crash reuses the ids
+                self.write_checkpoint(checkpoint_path, checkpoint)
+            ## chunk boundaries must not move between a run and its resume
+            chunksize = checkpoint["chunksize"]
+            completed = set(checkpoint["completed_chunks"])
+            target = self.mongo_client[database][collection]
+            loads = self.mongo_client[database][
+                collection + DATA_INGESTION_BULK_LOAD_COLLECTION_SUFFIX
+            ]
+            load_id = f"{checkpoint['started_at']:08x}{checkpoint['nonce']:04x}"
+            loads.replace_one(
+                {"_id": load_id},
+                {
+                    "_id": load_id,
+                    "file_path": file_path,
+                    "started_at": checkpoint["started_at"],
+                    "updated_at": int(time.time()),
+                },
+                upsert=True,
+            )
+
+            stats = {"rows": 0, "inserted": 0, "duplicates": 0, "skipped_chunks": 0}
+            start = time.perf_counter()
+            pending = {}
+
+            def collect(done):
+                for future in done:
+                    index, rows = pending.pop(future)
+                    inserted, duplicates = future.result()
+                    completed.add(index)
+                    stats["rows"] += rows
+                    stats["inserted"] += inserted
+                    stats["duplicates"] += duplicates
+                checkpoint["completed_chunks"] = sorted(completed)
+                self.write_checkpoint(checkpoint_path, checkpoint)
+                elapsed = time.perf_counter() - start
+                logging.info(
+                    f"Loaded {stats['rows']} rows, {stats['rows'] / elapsed:.0f} rows/s"
+                )
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for index, chunk in enumerate(
+                    pd.read_csv(file_path, chunksize=chunksize)
+                ):
+                    if index in completed:
+                        stats["skipped_chunks"] += 1
+                        continue
+                    ids = self.make_ids(
+                        checkpoint["started_at"],
+                        checkpoint["nonce"],
+                        index * chunksize,
+                        len(chunk),
+                    )
+                    documents = self.documents_from_chunk(chunk, ids)
+                    future = executor.submit(self.insert_chunk, target, documents)
+                    pending[future] = (index, len(documents))
+
+                    ## bound read-ahead to two chunks per worker
+                    if len(pending) >= 2 * self.max_workers:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                if pending:
+                    collect(wait(pending).done)
+            ## every row is in, ingestion may read past the load's start
+            loads.delete_one({"_id": load_id})
+
+            stats["seconds"] = time.perf_counter() - start
+            stats["rows_per_sec"] = stats["rows"] / stats["seconds"]
+            logging.info(f"Bulk load of {file_path} finished: {stats}")
+            return stats
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
 if __name__ == "__main__":
-    FILE_PATH = "Network_Data\phisingData.csv"
-    DATABASE = "RibhavJain"
-    Collection = "NetworkData"
-    networkobj = NetworkDataExtract()
-    records = networkobj.csv_to_json_convertor(file_path=FILE_PATH)
-    no_of_records = networkobj.insert_data_mongodb(records, DATABASE, Collection)
-    print(no_of_records)
+    parser = argparse.ArgumentParser(description="Bulk load a csv into mongodb")
+    parser.add_argument(
+        "--file-path", default=os.path.join("Network_Data", "phisingData.csv")
+    )
+    parser.add_argument("--database", default="RibhavJain")
+    parser.add_argument("--collection", default="NetworkData")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--checkpoint",
+        default="push_data.checkpoint.json",
+        help="resume state; delete it to load the same file again",
+    )
+    args = parser.parse_args()
+
+    loader = NetworkDataBulkLoader(chunksize=args.chunksize, max_workers=args.workers)
+    stats = loader.load(
+        file_path=args.file_path,
+        database=args.database,
+        collection=args.collection,
+        checkpoint_path=args.checkpoint,
+    )
+    print(
+        f"{stats['rows']} rows in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_sec']:.0f} rows/s), {stats['duplicates']} already present"
+    )